@@ -12,4 +12,136 @@ DB_COLLECTION_PRJ = "projects"
 DB_COLLECTION_TC = "test-cases"
 DB_COLLECTION_TE = "test-executions"
 DB_COLLECTION_TCY = "test-cycles"
+DB_COLLECTION_TCM = "test-cycle-members"
+DB_COLLECTION_JOB = "jobs"
+DB_COLLECTION_FLD = "folders"
+DB_COLLECTION_RLP = "rollups"
 
+# List endpoint page sizes and total count cache lifetime (seconds)
+PAGE_LIMIT_DEFAULT = 1000
+PAGE_LIMIT_MAX = 10000
+COUNT_CACHE_TTL = 30
+COUNT_CACHE_SIZE = 1024
+
+# Cycle result counter key of executions without a result
+RESULT_NONE = "none"
+
+# Execution results counted as passed by pass rates, and flipped
+# between by flaky test cases
+RESULT_PASS = "pass"
+RESULT_FAIL = "fail"
+
+# Recent executions per test case scored for flakiness by default and at most
+FLAKY_WINDOW_DEFAULT = 50
+FLAKY_WINDOW_MAX = 1000
+
+# Trend buckets returned by default and at most, and the project trend
+# views (bucket unit and grouping) whose closed bucket points are cached
+TREND_BUCKETS_DEFAULT = 30
+TREND_BUCKETS_MAX = 366
+TREND_CACHE_SIZE = 256
+
+# Project summary cache lifetime (seconds), entries are also dropped on
+# writes to the project
+SUMMARY_CACHE_TTL = 300
+SUMMARY_CACHE_SIZE = 1024
+
+# Documents fetched per cursor batch when streaming results
+STREAM_BATCH_SIZE = 500
+
+# Folder tree levels returned by a single request
+FOLDER_DEPTH_MAX = 10
+
+# Documents removed per batch by background cascade deletes
+DELETE_BATCH_SIZE = 1000
+
+# Background job states
+JOB_PENDING = "pending"
+JOB_RUNNING = "running"
+JOB_COMPLETED = "completed"
+JOB_FAILED = "failed"
+JOB_CANCELLED = "cancelled"
+
+# Background job kinds
+JOB_KIND_RESET = "reset"
+JOB_KIND_DELETE_PROJECT = "delete_project"
+JOB_KIND_DELETE_TEST_CASES = "delete_test_cases"
+JOB_KIND_DELETE_TEST_CASE = "delete_test_case"
+JOB_KIND_REBUILD_FOLDERS = "rebuild_folders"
+JOB_KIND_REBUILD_ROLLUPS = "rebuild_rollups"
+JOB_KIND_RECOMPUTE_CYCLE = "recompute_cycle"
+
+# Jobs run concurrently by the in-process job runner
+JOB_CONCURRENCY = 2
+
+# Time fields stored natively, as BSON dates in MongoDB and epoch seconds
+# in SQLite. The API reads and writes them as ISO UTC strings.
+DB_DATETIME_FIELDS = {
+    DB_COLLECTION_TE: ["started_at", "finished_at", "executed_at"],
+    DB_COLLECTION_RLP: ["day"]
+}
+
+# Fields list endpoints can sort by within a project, besides _id. Each has
+# a (project_key, field, _id) index so keyset pages are read in index order.
+# Collections not listed sort by any model field.
+DB_SORT_FIELDS = {
+    DB_COLLECTION_TC: ["title", "status", "priority", "folder", "last_result", "created_at", "updated_at"],
+    DB_COLLECTION_TE: ["result", "executed_at"],
+    DB_COLLECTION_TCY: ["title", "status", "created_at"]
+}
+
+# Secondary indexes per collection, reconciled on configure().
+# Keys are (field, direction) pairs, 1 for ascending and -1 for descending.
+DB_INDEXES = {
+    DB_COLLECTION_PRJ: [
+        {"keys": [("project_key", 1)], "unique": True}
+    ],
+    DB_COLLECTION_TC: [
+        {"keys": [("test_case_key", 1)], "unique": True},
+        {"keys": [("project_key", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("title", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("status", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("status", 1), ("priority", 1)]},
+        {"keys": [("project_key", 1), ("priority", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("folder", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("last_result", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("created_at", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("updated_at", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("labels", 1)], "multikey": True},
+        {"keys": [("project_key", 1), ("test_frequency", 1)], "multikey": True},
+        {"keys": [("project_key", 1), ("title", "text"), ("description", "text"), ("labels", "text")],
+         "weights": {"title": 10, "labels": 5, "description": 1}}
+    ],
+    DB_COLLECTION_TE: [
+        {"keys": [("execution_key", 1)], "unique": True},
+        {"keys": [("project_key", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("test_case_key", 1), ("executed_at", 1)]},
+        {"keys": [("project_key", 1), ("test_case_key", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("executed_at", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("result", 1), ("_id", 1)]},
+        {"keys": [("test_cycle_key", 1)]}
+    ],
+    DB_COLLECTION_TCY: [
+        {"keys": [("test_cycle_key", 1)], "unique": True},
+        {"keys": [("project_key", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("title", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("status", 1), ("_id", 1)]},
+        {"keys": [("project_key", 1), ("created_at", 1), ("_id", 1)]}
+    ],
+    DB_COLLECTION_TCM: [
+        {"keys": [("test_cycle_key", 1), ("execution_key", 1)], "unique": True},
+        {"keys": [("execution_key", 1)]},
+        {"keys": [("project_key", 1), ("_id", 1)]}
+    ],
+    DB_COLLECTION_FLD: [
+        {"keys": [("project_key", 1), ("path", 1)], "unique": True},
+        {"keys": [("project_key", 1), ("depth", 1)]}
+    ],
+    DB_COLLECTION_RLP: [
+        {"keys": [("project_key", 1), ("test_case_key", 1), ("day", 1)], "unique": True},
+        {"keys": [("project_key", 1), ("day", 1)]}
+    ],
+    DB_COLLECTION_JOB: [
+        {"keys": [("status", 1)]}
+    ]
+}
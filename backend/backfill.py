@@ -0,0 +1,92 @@
+# ================================================================
+# Orbit API
+# Description: Backfill test case last results, execution times and rollups from execution history.
+# Version: 0.1.0
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+import argparse
+import asyncio
+import logging
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import DBType
+from backend.db.mongodb import MongoClient
+from backend.db.sqlite import SqliteClient
+from backend.services.rollups import rebuild_rollups
+from backend.services.test_cases import backfill_last_results
+from backend.services.test_executions import backfill_executed_at
+
+logger = logging.getLogger(__name__)
+
+
+def build_parser():
+    """ Build argument parser. """
+
+    parser = argparse.ArgumentParser(
+        description='Orbit test case last result, execution time and rollup backfill'
+    )
+    parser.add_argument(
+        '--db',
+        dest='db_type',
+        type=lambda x: DBType(x),
+        choices=[DBType.MONGODB, DBType.SQLITE],
+        default=DBType.MONGODB,
+        help='Set database type, choices: mongodb, sqlite. (default: mongodb)'
+    )
+    parser.add_argument(
+        '--project',
+        dest='project_key',
+        default=None,
+        help='Only backfill test cases of this project (default: all)'
+    )
+    parser.add_argument(
+        '--batch-size',
+        dest='batch_size',
+        type=int,
+        default=STREAM_BATCH_SIZE,
+        help=f'Test cases recomputed per batch (default: {STREAM_BATCH_SIZE})'
+    )
+    return parser
+
+
+async def main(args) -> int:
+    """ Derive missing execution times, then recompute last results
+        of all matching test cases and the rollups of their projects.
+    """
+
+    if args.db_type == DBType.MONGODB:
+        client = MongoClient()
+
+    else:
+        client = SqliteClient()
+
+    await client.connect()
+    await client.configure()
+
+    try:
+        query = {"project_key": args.project_key} if args.project_key else {}
+        executions = await backfill_executed_at(client, query, args.batch_size)
+        total = await backfill_last_results(client, query, args.batch_size)
+
+        rollups = 0
+        async for project in client.find_iter(DB_COLLECTION_PRJ, query, fields=["_id"]):
+            rollups += await rebuild_rollups(client, project["_id"], args.batch_size)
+
+    finally:
+        await client.close()
+
+    logger.info(f"Backfilled execution times of {executions} test executions")
+    logger.info(f"Backfilled last results of {total} test cases")
+    logger.info(f"Rebuilt {rollups} daily rollups")
+
+    return total
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    asyncio.run(main(build_parser().parse_args()))
@@ -25,6 +25,14 @@ class DBMode(Enum):
     RELEASE = 1
 
 
+class WriteError(Exception):
+    """ Raised when the database rejects a write. """
+
+
+class DuplicateKeyError(WriteError):
+    """ Raised when a write violates a unique key constraint. """
+
+
 class DatabaseClient(ABC):
     """ Abstract base class for database implementations supporting SQLite and MongoDB. """
 
@@ -86,9 +94,49 @@ class DatabaseClient(ABC):
         """ Set the database mode. """
         self._db_mode = db_mode
 
+    @staticmethod
+    def keyset_query(query: dict,
+                     sort: list,
+                     after: dict) -> dict:
+        """ Extend a query to match only records sorted after a keyset position.
+            Sort is a list of (field, direction), after maps each field to the
+            value of the last record seen. Nulls sort first, as in MongoDB.
+        """
+
+        branches = []
+        for i, (field, direction) in enumerate(sort):
+            prefix = {name: after[name] for name, _ in sort[:i]}
+            value = after[field]
+            if direction == 1 and value is None:
+                branches.append({**prefix, field: {"$ne": None}})
+
+            elif direction == 1:
+                branches.append({**prefix, field: {"$gt": value}})
+
+            elif value is not None:
+                branches.append({**prefix, field: {"$lt": value}})
+                branches.append({**prefix, field: None})
+
+        keyset = {"$or": branches} if branches else {"_id": {"$in": []}}
+
+        return {"$and": [query, keyset]} if query else keyset
+
+    @staticmethod
+    def update_document(update_data: dict) -> dict:
+        """ Normalize update data to a MongoDB style update document.
+            A plain field -> value mapping is treated as $set.
+        """
+
+        if update_data and all(key.startswith("$") for key in update_data):
+            return update_data
+
+        return {"$set": update_data}
+
     @abstractmethod
     def configure(self, **kwargs):
-        """ Configure database connection & init parameters """
+        """ Configure database connection & init parameters,
+            clean_db drops all data except the tables listed in keep
+        """
 
     @abstractmethod
     def connect(self):
@@ -100,19 +148,95 @@ class DatabaseClient(ABC):
 
     @abstractmethod
     def create(self, table: str, data: dict):
-        """Insert a new record into the database."""
+        """Insert a new record into the database.
+           Raises DuplicateKeyError if a unique key already exists.
+        """
 
     @abstractmethod
-    def find(self, table: str, query: dict):
-        """Retrieve records from the database."""
+    def create_many(self, table: str, data: list):
+        """Insert multiple records into the database, unordered.
+           Returns the inserted count and a map of failed index -> WriteError.
+        """
+
+    @abstractmethod
+    def bulk_write(self, table: str, operations: list):
+        """Apply a batch of write operations, unordered.
+           Operations are tuples: ("insert_one", doc), ("update_one", query, data),
+           ("update_many", query, data), ("delete_one", query), ("delete_many", query).
+           Returns a counts dict and a map of failed index -> WriteError.
+        """
+
+    @abstractmethod
+    def find(self, table: str, query: dict, sort: list = None, limit: int = None, after: dict = None,
+             fields: list = None):
+        """Retrieve records from the database.
+           Sort is a list of (field, direction), after is a keyset position,
+           fields limits the returned fields (_id is always returned).
+        """
+
+    @abstractmethod
+    def find_iter(self, table: str, query: dict, sort: list = None, after: dict = None, batch_size: int = None,
+                  fields: list = None):
+        """Asynchronously iterate over records, fetching them in batches
+           so memory use does not grow with the result size.
+        """
+
+    @abstractmethod
+    def count(self, table: str, query: dict, estimated: bool = False):
+        """Count records in the database, using collection metadata if estimated."""
+
+    @abstractmethod
+    def find_linked(self, link_table: str, link_query: dict, link_field: str, table: str, query: dict,
+                    sort: list = None, limit: int = None, after: dict = None, fields: list = None):
+        """Retrieve records of table whose _id is the link_field of a link_table
+           record matching link_query, joined in a single query.
+           Query, sort, after and fields apply to the joined records.
+        """
+
+    @abstractmethod
+    def count_linked(self, link_table: str, link_query: dict, link_field: str, table: str, query: dict):
+        """Count the records find_linked would return."""
+
+    @abstractmethod
+    def search(self, table: str, query: dict, text: str, limit: int = None, after: dict = None,
+               fields: list = None):
+        """Retrieve records matching query whose text indexed fields contain
+           any word of text, most relevant first. Each record gets a score,
+           higher is more relevant, and after is a score and _id keyset position.
+        """
+
+    @abstractmethod
+    def group_count(self, table: str, query: dict, fields: list):
+        """Count records matching query grouped by the values of fields.
+           Returns a record per group with the field values and the count.
+        """
+
+    @abstractmethod
+    def find_latest(self, table: str, query: dict, group_field: str, sort: list, limit: int,
+                    fields: list = None):
+        """Retrieve the last limit records in sort order of each group_field
+           value among records matching query, selected in the database with a
+           window over the groups. Records are ordered by group then sort.
+        """
 
     @abstractmethod
-    def find_one(self, table: str, query: dict):
+    def find_one(self, table: str, query: dict, fields: list = None):
         """Retrieve records from the database."""
 
     @abstractmethod
     def update(self, table: str, query: dict, update_data: dict):
-        """Update records in the database."""
+        """Update records in the database.
+           Update data is a field mapping to $set, or an update document
+           using $set, $inc, $addToSet (with $each) and $pull (with $in).
+           $inc accepts "field.key" paths into dict fields.
+           Returns the result and the matched count.
+        """
+
+    @abstractmethod
+    def update_one_returning(self, table: str, query: dict, update_data: dict, before: bool = False):
+        """Update a single record and return it as it is after the update,
+           or as it was before if requested, or None if no record matched.
+        """
 
     @abstractmethod
     def delete(self, table: str, query: dict):
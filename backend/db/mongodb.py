@@ -9,27 +9,68 @@
 
 import logging
 import os
+from collections import Counter
+from datetime import datetime
 
 from bson import ObjectId
 from motor.motor_asyncio import AsyncIOMotorClient
+from pymongo import (
+    IndexModel,
+    ReturnDocument,
+    InsertOne,
+    UpdateOne,
+    UpdateMany,
+    DeleteOne,
+    DeleteMany
+)
+from pymongo.errors import (
+    BulkWriteError,
+    DuplicateKeyError as MongoDuplicateKeyError,
+    WriteError as MongoWriteError
+)
 
 from backend.app_def.app_def import (
     DB_NAME,
     DB_COLLECTION_PRJ,
     DB_COLLECTION_TC,
     DB_COLLECTION_TE,
-    DB_COLLECTION_TCY
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    DB_COLLECTION_JOB,
+    DB_COLLECTION_FLD,
+    DB_COLLECTION_RLP,
+    DB_DATETIME_FIELDS,
+    DB_INDEXES,
+    RESULT_NONE,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DBType,
+    DBMode,
+    WriteError,
+    DuplicateKeyError
 )
-from backend.db.db import DatabaseClient, DBType, DBMode
+from backend.models.folders import Folder
+from backend.models.jobs import Job
 from backend.models.projects import Project
+from backend.models.rollups import Rollup
 from backend.models.test_cases import TestCase
-from backend.models.test_cycles import TestCycle
+from backend.models.test_cycles import (
+    TestCycle,
+    TestCycleMember
+)
 from backend.models.test_executions import TestExecution
+from backend.tools.tools import (
+    format_utc_time,
+    parse_utc_time
+)
 
 
-def pydantic_to_mongo_jsonschema(pydantic_schema: dict):
+def pydantic_to_mongo_jsonschema(pydantic_schema: dict,
+                                 datetimes: list = ()):
     """ Convert a Pydantic JSON schema to a MongoDB JSON schema,
-        supporting Optionals (| None).
+        supporting Optionals (| None). Datetime fields are BSON dates.
     """
 
     def is_required(field_name):
@@ -90,6 +131,11 @@ def pydantic_to_mongo_jsonschema(pydantic_schema: dict):
             elif field.get("type"):
                 bson_types.add(type_map.get(field["type"], field["type"]))
 
+        # ISO time strings are stored as BSON dates
+        if name in datetimes and "string" in bson_types:
+            bson_types.discard("string")
+            bson_types.add("date")
+
         # Convert array:string to MongoDB array of string
         if "array:string" in bson_types:
             bson_types.discard("array:string")
@@ -110,7 +156,7 @@ def pydantic_to_mongo_jsonschema(pydantic_schema: dict):
         else:
             # If multiple types, use a list
             if len(bson_types) > 1:
-                props["_id" if name == "id" else name] = {"bsonType": list(bson_types)}
+                props["_id" if name == "id" else name] = {"bsonType": sorted(bson_types)}
 
             elif len(bson_types) == 1:
                 props["_id" if name == "id" else name] = {"bsonType": list(bson_types)[0]}
@@ -129,16 +175,29 @@ def pydantic_to_mongo_jsonschema(pydantic_schema: dict):
 
 PROJECT_SCHEMA = pydantic_to_mongo_jsonschema(Project.model_json_schema())
 TEST_CASE_SCHEMA = pydantic_to_mongo_jsonschema(TestCase.model_json_schema())
-TEST_EXECUTION_SCHEMA = pydantic_to_mongo_jsonschema(TestExecution.model_json_schema())
+TEST_EXECUTION_SCHEMA = pydantic_to_mongo_jsonschema(TestExecution.model_json_schema(),
+                                                     DB_DATETIME_FIELDS[DB_COLLECTION_TE])
 TEST_CYCLE_SCHEMA = pydantic_to_mongo_jsonschema(TestCycle.model_json_schema())
+TEST_CYCLE_MEMBER_SCHEMA = pydantic_to_mongo_jsonschema(TestCycleMember.model_json_schema())
+JOB_SCHEMA = pydantic_to_mongo_jsonschema(Job.model_json_schema())
+FOLDER_SCHEMA = pydantic_to_mongo_jsonschema(Folder.model_json_schema())
+ROLLUP_SCHEMA = pydantic_to_mongo_jsonschema(Rollup.model_json_schema(),
+                                             DB_DATETIME_FIELDS[DB_COLLECTION_RLP])
 
 DB_COLLECTIONS = [
     (DB_COLLECTION_PRJ, PROJECT_SCHEMA),
     (DB_COLLECTION_TC, TEST_CASE_SCHEMA),
     (DB_COLLECTION_TE, TEST_EXECUTION_SCHEMA),
-    (DB_COLLECTION_TCY, TEST_CYCLE_SCHEMA)
+    (DB_COLLECTION_TCY, TEST_CYCLE_SCHEMA),
+    (DB_COLLECTION_TCM, TEST_CYCLE_MEMBER_SCHEMA),
+    (DB_COLLECTION_JOB, JOB_SCHEMA),
+    (DB_COLLECTION_FLD, FOLDER_SCHEMA),
+    (DB_COLLECTION_RLP, ROLLUP_SCHEMA)
 ]
 
+# Server error code for unique index violations
+MONGODB_DUPLICATE_KEY = 11000
+
 MONGODB_HOST = os.getenv("MONGODB_HOST", "localhost")
 MONGODB_PORT = os.getenv("MONGODB_PORT", "27017")
 MONGODB_USER = os.getenv("MONGODB_USER", "admin")
@@ -158,14 +217,66 @@ class MongoClient(DatabaseClient):
 
         super().__init__(db_name, db_url, db_type, db_mode)
 
-    def _convert_objectid(self, doc: dict) -> dict:
-        """Convert ObjectId to string in a MongoDB document."""
+    def _decode(self, doc: dict) -> dict:
+        """Convert ObjectId to string and dates to ISO strings in a MongoDB document."""
 
         if doc and "_id" in doc and isinstance(doc["_id"], ObjectId):
             doc["_id"] = str(doc["_id"])
 
+        for name, value in (doc or {}).items():
+            if isinstance(value, datetime):
+                doc[name] = format_utc_time(value)
+
         return doc
 
+    def _encode_time(self, value):
+        """Convert ISO strings to datetimes in a value, list or operator document."""
+
+        if isinstance(value, str):
+            return parse_utc_time(value)
+
+        if isinstance(value, list):
+            return [self._encode_time(v) for v in value]
+
+        if isinstance(value, dict):
+            return {op: self._encode_time(v) for op, v in value.items()}
+
+        return value
+
+    def _encode(self, table: str, data: dict) -> dict:
+        """Convert the datetime fields of a document or query to BSON dates."""
+
+        fields = DB_DATETIME_FIELDS.get(table)
+        if not fields or not data:
+            return data
+
+        encoded = {}
+        for name, value in data.items():
+            if name in ("$and", "$or"):
+                value = [self._encode(table, sub) for sub in value]
+            elif name in fields:
+                value = self._encode_time(value)
+            encoded[name] = value
+
+        return encoded
+
+    def _encode_update(self, table: str, update_data: dict) -> dict:
+        """Build the update document of update data, converting $set datetimes."""
+
+        update = self.update_document(update_data)
+        if "$set" in update:
+            update = {**update, "$set": self._encode(table, update["$set"])}
+
+        return update
+
+    def _projection(self, fields: list) -> dict | None:
+        """Build a projection returning only the given fields."""
+
+        if not fields:
+            return None
+
+        return {field: 1 for field in ["_id", *fields]}
+
     async def connect(self):
         """Get the MongoDB client with optional authentication."""
 
@@ -188,9 +299,15 @@ class MongoClient(DatabaseClient):
                         **kwargs) -> None:
         """Configure database connection parameters"""
 
-        # Drop the database if in debug mode
+        # Drop the database if in debug mode, sparing the collections to keep
         clean_db = "clean_db" in kwargs and kwargs["clean_db"]
-        if self._db_mode == 'debug' or clean_db:
+        keep = kwargs.get("keep") or []
+        if clean_db and keep:
+            for collection in await self._db_client[self._db_name].list_collection_names():
+                if collection not in keep:
+                    await self._db_client[self._db_name].drop_collection(collection)
+
+        elif self._db_mode == 'debug' or clean_db:
             await self._db_client.drop_database(self._db_name)
 
         # Initialize the database
@@ -205,33 +322,395 @@ class MongoClient(DatabaseClient):
                 await self._db_client[self._db_name].create_collection(collection,
                                                                        validator={"$jsonSchema": schema})
 
+            elif collection in DB_DATETIME_FIELDS:
+                await self._migrate_datetimes(collection, schema)
+
+            # Reconcile secondary indexes
+            await self._reconcile_indexes(collection, DB_INDEXES.get(collection, []))
+
+        await self._migrate_cycle_members()
+
+    async def _migrate_cycle_members(self) -> None:
+        """ Move the executions lists embedded in test cycles before membership
+            had its own collection into test cycle members, recounting the
+            results of each cycle moved and dropping its list.
+        """
+
+        db = self._db_client[self._db_name]
+        moved = 0
+        async for cycle in db[DB_COLLECTION_TCY].find({"executions": {"$exists": True}},
+                                                      {"executions": 1, "created_at": 1}):
+            # Executions that no longer exist are dropped from the cycle
+            executions = await self.find(DB_COLLECTION_TE,
+                                         {"_id": {"$in": cycle["executions"] or []}},
+                                         fields=["project_key", "result"])
+            await self.create_many(DB_COLLECTION_TCM, [{"_id": f"{cycle['_id']}/{execution['_id']}",
+                                                        "test_cycle_key": cycle["_id"],
+                                                        "execution_key": execution["_id"],
+                                                        "project_key": execution["project_key"],
+                                                        "added_at": cycle.get("created_at")}
+                                                       for execution in executions])
+
+            counts = Counter(RESULT_NONE if execution.get("result") is None else execution["result"]
+                             for execution in executions)
+            await db[DB_COLLECTION_TCY].update_one({"_id": cycle["_id"]},
+                                                   {"$set": {"result_counts": dict(counts)},
+                                                    "$unset": {"executions": ""}})
+            moved += 1
+
+        if moved:
+            logging.info(f"Moved embedded executions of {moved} {DB_COLLECTION_TCY} to {DB_COLLECTION_TCM}")
+
+    async def _migrate_datetimes(self,
+                                 collection: str,
+                                 schema: dict) -> None:
+        """ Convert ISO string times stored before datetime fields were BSON dates.
+            The validator is updated first, moderate validation lets the
+            documents still holding strings be updated in place. Collections
+            already validated by the current schema are skipped.
+        """
+
+        db = self._db_client[self._db_name]
+        async for info in await db.list_collections(filter={"name": collection}):
+            if info.get("options", {}).get("validator") == {"$jsonSchema": schema}:
+                return
+
+        await db.command("collMod", collection,
+                         validator={"$jsonSchema": schema},
+                         validationLevel="moderate")
+
+        for field in DB_DATETIME_FIELDS[collection]:
+            result = await db[collection].update_many({field: {"$type": "string"}},
+                                                      [{"$set": {field: {"$toDate": f"${field}"}}}])
+            if result.modified_count:
+                logging.info(f"Converted {field} of {result.modified_count} {collection} to dates")
+
+        await db.command("collMod", collection, validationLevel="strict")
+
+    async def _reconcile_indexes(self,
+                                 collection: str,
+                                 indexes: list) -> None:
+        """ Create missing declared indexes and drop stale ones. """
+
+        db_collection = self._db_client[self._db_name][collection]
+        existing = await db_collection.index_information()
+
+        declared = {}
+        for spec in indexes:
+            name = "_".join(f"{field}_{direction}" for field, direction in spec["keys"])
+            declared[name] = spec
+
+        # Drop indexes no longer declared or with changed options
+        for name, info in existing.items():
+            if name == "_id_":
+                continue
+
+            spec = declared.get(name)
+            if spec is None or info.get("unique", False) != spec.get("unique", False):
+                logging.info(f"Dropping index {name} on {collection}")
+                await db_collection.drop_index(name)
+
+            else:
+                del declared[name]
+
+        # Create the missing indexes in one call
+        if declared:
+            logging.info(f"Creating indexes {list(declared)} on {collection}")
+            await db_collection.create_indexes([
+                IndexModel(spec["keys"], name=name, unique=spec.get("unique", False),
+                           **({"weights": spec["weights"]} if "weights" in spec else {}))
+                for name, spec in declared.items()])
+
     async def create(self,
                      table: str,
                      data: dict) -> bool:
         """Insert a new record into the database."""
 
-        await self._db_client[self._db_name][table].insert_one(data)
+        try:
+            await self._db_client[self._db_name][table].insert_one(self._encode(table, data))
+
+        except MongoDuplicateKeyError as e:
+            raise DuplicateKeyError(str(e)) from e
+
+        except MongoWriteError as e:
+            raise WriteError(str(e)) from e
 
         return True
 
+    def _write_errors(self, error: BulkWriteError) -> dict:
+        """ Map bulk write errors to operation index -> WriteError. """
+
+        errors = {}
+        for write_error in error.details.get("writeErrors", []):
+            if write_error["code"] == MONGODB_DUPLICATE_KEY:
+                errors[write_error["index"]] = DuplicateKeyError(write_error["errmsg"])
+            else:
+                errors[write_error["index"]] = WriteError(write_error["errmsg"])
+
+        return errors
+
+    async def create_many(self,
+                          table: str,
+                          data: list) -> tuple:
+        """Insert multiple records into the database, unordered."""
+
+        if not data:
+            return 0, {}
+
+        try:
+            result = await self._db_client[self._db_name][table].insert_many([self._encode(table, doc) for doc in data],
+                                                                             ordered=False)
+            return len(result.inserted_ids), {}
+
+        except BulkWriteError as e:
+            return e.details["nInserted"], self._write_errors(e)
+
+    async def bulk_write(self,
+                         table: str,
+                         operations: list) -> tuple:
+        """Apply a batch of write operations, unordered."""
+
+        if not operations:
+            return {"inserted": 0, "matched": 0, "deleted": 0}, {}
+
+        requests = []
+        for op, *args in operations:
+            if op == "insert_one":
+                requests.append(InsertOne(self._encode(table, args[0])))
+            elif op == "update_one":
+                requests.append(UpdateOne(self._encode(table, args[0]), self._encode_update(table, args[1])))
+            elif op == "update_many":
+                requests.append(UpdateMany(self._encode(table, args[0]), self._encode_update(table, args[1])))
+            elif op == "delete_one":
+                requests.append(DeleteOne(self._encode(table, args[0])))
+            elif op == "delete_many":
+                requests.append(DeleteMany(self._encode(table, args[0])))
+            else:
+                raise ValueError(f"Unsupported bulk operation {op}")
+
+        try:
+            result = await self._db_client[self._db_name][table].bulk_write(requests, ordered=False)
+            details, errors = result.bulk_api_result, {}
+
+        except BulkWriteError as e:
+            details, errors = e.details, self._write_errors(e)
+
+        counts = {"inserted": details["nInserted"],
+                  "matched": details["nMatched"],
+                  "deleted": details["nRemoved"]}
+
+        return counts, errors
+
     async def find(self,
                    table: str,
-                   query: dict) -> list:
+                   query: dict,
+                   sort: list = None,
+                   limit: int = None,
+                   after: dict = None,
+                   fields: list = None) -> list:
         """Retrieve records from the database."""
 
-        cursor = self._db_client[self._db_name][table].find(query)
-        results = await cursor.to_list()
-        results = [self._convert_objectid(p) for p in results]
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+
+        query = self._encode(table, query)
+        cursor = self._db_client[self._db_name][table].find(query, self._projection(fields))
+        if sort:
+            cursor = cursor.sort(sort)
+
+        if limit:
+            cursor = cursor.limit(limit)
+
+        results = await cursor.to_list(length=limit)
+        results = [self._decode(p) for p in results]
 
         return results
 
+    async def find_iter(self,
+                        table: str,
+                        query: dict,
+                        sort: list = None,
+                        after: dict = None,
+                        batch_size: int = STREAM_BATCH_SIZE,
+                        fields: list = None):
+        """Asynchronously iterate over records, fetching them in batches."""
+
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+
+        query = self._encode(table, query)
+        cursor = self._db_client[self._db_name][table].find(query,
+                                                             self._projection(fields),
+                                                             batch_size=batch_size)
+        if sort:
+            cursor = cursor.sort(sort)
+
+        async for doc in cursor:
+            yield self._decode(doc)
+
+    async def count(self,
+                    table: str,
+                    query: dict,
+                    estimated: bool = False) -> int:
+        """Count records in the database, using collection metadata if estimated."""
+
+        if estimated and not query:
+            return await self._db_client[self._db_name][table].estimated_document_count()
+
+        return await self._db_client[self._db_name][table].count_documents(self._encode(table, query))
+
+    def _linked_pipeline(self,
+                         link_table: str,
+                         link_query: dict,
+                         link_field: str,
+                         table: str,
+                         query: dict,
+                         sort: list = None,
+                         after: dict = None) -> list:
+        """ Build an aggregation joining link records to the records they reference.
+            Sorting by _id alone is applied to the link field before the $lookup,
+            so pages are read in index order without joining skipped records.
+        """
+
+        pipeline = [{"$match": self._encode(link_table, link_query)}]
+        if sort and [field for field, _ in sort] == ["_id"]:
+            link_sort = [(link_field, sort[0][1])]
+            if after is not None:
+                pipeline.append({"$match": self._encode(link_table,
+                                                    self.keyset_query({}, link_sort, {link_field: after["_id"]}))})
+            pipeline.append({"$sort": dict(link_sort)})
+            sort, after = None, None
+
+        pipeline += [{"$lookup": {"from": table,
+                                  "localField": link_field,
+                                  "foreignField": "_id",
+                                  "as": "_linked"}},
+                     {"$unwind": "$_linked"},
+                     {"$replaceRoot": {"newRoot": "$_linked"}}]
+
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+        if query:
+            pipeline.append({"$match": self._encode(table, query)})
+        if sort:
+            pipeline.append({"$sort": dict(sort)})
+
+        return pipeline
+
+    async def find_linked(self,
+                          link_table: str,
+                          link_query: dict,
+                          link_field: str,
+                          table: str,
+                          query: dict,
+                          sort: list = None,
+                          limit: int = None,
+                          after: dict = None,
+                          fields: list = None) -> list:
+        """Retrieve records joined through a link collection with $lookup."""
+
+        pipeline = self._linked_pipeline(link_table, link_query, link_field, table, query, sort, after)
+        if limit:
+            pipeline.append({"$limit": limit})
+        if fields:
+            pipeline.append({"$project": self._projection(fields)})
+
+        cursor = self._db_client[self._db_name][link_table].aggregate(pipeline)
+        results = await cursor.to_list(length=limit)
+
+        return [self._decode(doc) for doc in results]
+
+    async def count_linked(self,
+                           link_table: str,
+                           link_query: dict,
+                           link_field: str,
+                           table: str,
+                           query: dict) -> int:
+        """Count records joined through a link collection with $lookup."""
+
+        pipeline = self._linked_pipeline(link_table, link_query, link_field, table, query)
+        pipeline.append({"$count": "count"})
+
+        cursor = self._db_client[self._db_name][link_table].aggregate(pipeline)
+        results = await cursor.to_list(length=1)
+
+        return results[0]["count"] if results else 0
+
+    async def search(self,
+                     table: str,
+                     query: dict,
+                     text: str,
+                     limit: int = None,
+                     after: dict = None,
+                     fields: list = None) -> list:
+        """Retrieve records matching a $text search, ranked by textScore."""
+
+        sort = [("score", -1), ("_id", 1)]
+        pipeline = [{"$match": {"$text": {"$search": text}, **self._encode(table, query)}},
+                    {"$addFields": {"score": {"$meta": "textScore"}}}]
+        if after is not None:
+            pipeline.append({"$match": self._encode(table, self.keyset_query({}, sort, after))})
+
+        pipeline.append({"$sort": dict(sort)})
+        if limit:
+            pipeline.append({"$limit": limit})
+
+        if fields:
+            pipeline.append({"$project": self._projection([*fields, "score"])})
+
+        cursor = self._db_client[self._db_name][table].aggregate(pipeline)
+        results = await cursor.to_list(length=limit)
+
+        return [self._decode(p) for p in results]
+
+    async def group_count(self,
+                          table: str,
+                          query: dict,
+                          fields: list) -> list:
+        """Count records grouped by fields with $group."""
+
+        group = {field: f"${field}" for field in fields}
+        pipeline = [{"$match": self._encode(table, query)},
+                    {"$group": {"_id": group, "count": {"$sum": 1}}}]
+
+        cursor = self._db_client[self._db_name][table].aggregate(pipeline)
+        results = await cursor.to_list(length=None)
+
+        return [self._decode({**doc["_id"], "count": doc["count"]}) for doc in results]
+
+    async def find_latest(self,
+                          table: str,
+                          query: dict,
+                          group_field: str,
+                          sort: list,
+                          limit: int,
+                          fields: list = None) -> list:
+        """Retrieve the last records of each group numbered by $setWindowFields
+           over the group, newest in sort order first.
+        """
+
+        sort = [*sort, ("_id", sort[-1][1])]
+        pipeline = [{"$match": self._encode(table, query)},
+                    {"$setWindowFields": {"partitionBy": f"${group_field}",
+                                          "sortBy": {name: -direction for name, direction in sort},
+                                          "output": {"row_number": {"$documentNumber": {}}}}},
+                    {"$match": {"row_number": {"$lte": limit}}},
+                    {"$sort": dict([(group_field, 1), *sort])},
+                    {"$project": self._projection(fields) or {"row_number": 0}}]
+
+        cursor = self._db_client[self._db_name][table].aggregate(pipeline, allowDiskUse=True)
+        results = await cursor.to_list(length=None)
+
+        return [self._decode(doc) for doc in results]
+
     async def find_one(self,
                        table: str,
-                       query: dict) -> dict:
+                       query: dict,
+                       fields: list = None) -> dict:
         """Retrieve a single record from the database."""
 
-        result = await self._db_client[self._db_name][table].find_one(query)
-        result = self._convert_objectid(result)
+        result = await self._db_client[self._db_name][table].find_one(self._encode(table, query), self._projection(fields))
+        result = self._decode(result)
 
         return result
 
@@ -241,16 +720,30 @@ class MongoClient(DatabaseClient):
                      update_data: dict) -> tuple:
         """Update records in the database."""
 
-        result = await self._db_client[self._db_name][table].update_many(query,
-                                                                         {"$set": update_data})
+        result = await self._db_client[self._db_name][table].update_many(self._encode(table, query),
+                                                                         self._encode_update(table, update_data))
         return result, result.matched_count
 
+    async def update_one_returning(self,
+                                   table: str,
+                                   query: dict,
+                                   update_data: dict,
+                                   before: bool = False) -> dict:
+        """Update a single record and return it after, or before, the update."""
+
+        result = await self._db_client[self._db_name][table].find_one_and_update(
+            self._encode(table, query),
+            self._encode_update(table, update_data),
+            return_document=ReturnDocument.BEFORE if before else ReturnDocument.AFTER)
+
+        return self._decode(result)
+
     async def delete(self,
                      table: str,
                      query: dict) -> tuple:
         """Delete records from the database."""
 
-        result = await self._db_client[self._db_name][table].delete_many(query)
+        result = await self._db_client[self._db_name][table].delete_many(self._encode(table, query))
 
         return result, result.deleted_count
 
@@ -259,7 +752,7 @@ class MongoClient(DatabaseClient):
                          query: dict) -> tuple:
         """Delete records from the database."""
 
-        result = await self._db_client[self._db_name][table].delete_one(query)
+        result = await self._db_client[self._db_name][table].delete_one(self._encode(table, query))
 
         return result, result.deleted_count
 
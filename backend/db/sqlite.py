@@ -7,23 +7,107 @@
 
 # db/sqlitedb.py
 
+import asyncio
+import json
+import logging
+import os
+import pathlib
+import re
+import sqlite3
+from contextlib import contextmanager
+
 from backend.app_def.app_def import (
     DB_NAME,
     DB_COLLECTION_PRJ,
     DB_COLLECTION_TC,
     DB_COLLECTION_TE,
-    DB_COLLECTION_TCY
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    DB_COLLECTION_JOB,
+    DB_COLLECTION_FLD,
+    DB_COLLECTION_RLP,
+    DB_DATETIME_FIELDS,
+    DB_INDEXES,
+    RESULT_NONE,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DBType,
+    DBMode,
+    WriteError,
+    DuplicateKeyError
+)
+from backend.models.folders import Folder
+from backend.models.jobs import Job
+from backend.models.projects import Project
+from backend.models.rollups import Rollup
+from backend.models.test_cases import TestCase
+from backend.models.test_cycles import (
+    TestCycle,
+    TestCycleMember
+)
+from backend.models.test_executions import TestExecution
+from backend.tools.tools import (
+    epoch_to_utc_time,
+    utc_time_to_epoch
 )
-from backend.db.db import DatabaseClient, DBType, DBMode
+
+
+def pydantic_to_sqlite_columns(pydantic_schema: dict,
+                               datetimes: list = ()) -> dict:
+    """ Convert a Pydantic JSON schema to SQLite column definitions.
+        Scalars map to native columns, lists and dicts to JSON text columns,
+        datetimes to integer epoch seconds.
+    """
+
+    type_map = {
+        "string": ("TEXT", "text"),
+        "integer": ("INTEGER", "int"),
+        "number": ("REAL", "real"),
+        "boolean": ("INTEGER", "bool"),
+        "array": ("TEXT", "json"),
+        "object": ("TEXT", "json")
+    }
+
+    required = pydantic_schema.get("required", [])
+    columns = {"_id": ("TEXT", "text", True)}
+    for name, field in pydantic_schema["properties"].items():
+        options = field.get("anyOf", [field])
+        types = [o.get("type") for o in options if o.get("type") not in (None, "null")]
+        nullable = field.get("nullable", False) or len(types) != len(options)
+
+        sql_type, kind = type_map.get(types[0] if types else "string", ("TEXT", "text"))
+        if name in datetimes:
+            sql_type, kind = "INTEGER", "datetime"
+        columns[name] = (sql_type, kind, name in required and not nullable)
+
+    return columns
+
 
 DB_COLLECTIONS = [
-    DB_COLLECTION_PRJ,
-    DB_COLLECTION_TC,
-    DB_COLLECTION_TE,
-    DB_COLLECTION_TCY
+    (DB_COLLECTION_PRJ, pydantic_to_sqlite_columns(Project.model_json_schema())),
+    (DB_COLLECTION_TC, pydantic_to_sqlite_columns(TestCase.model_json_schema())),
+    (DB_COLLECTION_TE, pydantic_to_sqlite_columns(TestExecution.model_json_schema(),
+                                                  DB_DATETIME_FIELDS[DB_COLLECTION_TE])),
+    (DB_COLLECTION_TCY, pydantic_to_sqlite_columns(TestCycle.model_json_schema())),
+    (DB_COLLECTION_TCM, pydantic_to_sqlite_columns(TestCycleMember.model_json_schema())),
+    (DB_COLLECTION_JOB, pydantic_to_sqlite_columns(Job.model_json_schema())),
+    (DB_COLLECTION_FLD, pydantic_to_sqlite_columns(Folder.model_json_schema())),
+    (DB_COLLECTION_RLP, pydantic_to_sqlite_columns(Rollup.model_json_schema(),
+                                                   DB_DATETIME_FIELDS[DB_COLLECTION_RLP]))
 ]
 
-SQLITE_URL = f""
+SQLITE_URL = os.getenv("SQLITE_URL", str(pathlib.Path(__file__).parents[1] / "tmp" / f"{DB_NAME}.db"))
+SQLITE_POOL_SIZE = int(os.getenv("SQLITE_POOL_SIZE", "4"))
+SQLITE_STATEMENT_CACHE = 512
+
+SQL_COMPARISON_OPS = {
+    "$gt": ">",
+    "$gte": ">=",
+    "$lt": "<",
+    "$lte": "<="
+}
 
 
 class SqliteClient(DatabaseClient):
@@ -37,47 +121,981 @@ class SqliteClient(DatabaseClient):
 
         super().__init__(db_name, db_url, db_type, db_mode)
 
+        # Single writer connection (db_client) plus a pool of WAL readers
+        self._tables = dict(DB_COLLECTIONS)
+        self._writer_lock = asyncio.Lock()
+        self._readers = None
+
+    def _open_connection(self,
+                         read_only: bool = False) -> sqlite3.Connection:
+        """ Open a connection in WAL mode. Statements are compiled once per
+            connection and reused from the sqlite3 statement cache.
+        """
+
+        conn = sqlite3.connect(self._db_url,
+                               isolation_level=None,
+                               check_same_thread=False,
+                               cached_statements=SQLITE_STATEMENT_CACHE)
+        conn.row_factory = sqlite3.Row
+        conn.execute("PRAGMA journal_mode=WAL")
+        conn.execute("PRAGMA synchronous=NORMAL")
+        conn.execute("PRAGMA busy_timeout=5000")
+        if read_only:
+            conn.execute("PRAGMA query_only=ON")
+
+        return conn
+
+    @contextmanager
+    def _transaction(self, conn: sqlite3.Connection):
+        """ Run a block of statements in a single write transaction. """
+
+        conn.execute("BEGIN IMMEDIATE")
+        try:
+            yield conn
+        except BaseException:
+            conn.rollback()
+            raise
+        else:
+            conn.commit()
+
+    async def _read(self, func, *args):
+        """ Run a blocking read on a pooled reader connection. """
+
+        conn = await self._readers.get()
+        try:
+            return await asyncio.to_thread(func, conn, *args)
+        finally:
+            self._readers.put_nowait(conn)
+
+    async def _write(self, func, *args):
+        """ Run a blocking write on the single writer connection. """
+
+        async with self._writer_lock:
+            return await asyncio.to_thread(func, self._db_client, *args)
+
+    def _columns(self, table: str) -> dict:
+        """ Get the column definitions of a table. """
+
+        if table not in self._tables:
+            raise ValueError(f"Unknown table {table}")
+
+        return self._tables[table]
+
+    def _column(self, table: str, name: str) -> tuple:
+        """ Get a single column definition of a table. """
+
+        columns = self._columns(table)
+        if name not in columns:
+            raise ValueError(f"Unknown field {name} for table {table}")
+
+        return columns[name]
+
+    def _select_list(self,
+                     table: str,
+                     fields: list = None) -> str:
+        """ Build the column list of a SELECT, all columns if no fields given. """
+
+        if not fields:
+            return "*"
+
+        names = list(dict.fromkeys(["_id", *fields]))
+        for name in names:
+            self._column(table, name)
+
+        return ", ".join(f'"{name}"' for name in names)
+
+    def _encode_value(self, kind: str, value):
+        """ Convert a python value to its SQLite representation. """
+
+        if value is None:
+            return None
+
+        if kind == "json":
+            return json.dumps(value)
+
+        if kind == "bool":
+            return int(value)
+
+        if kind == "datetime":
+            return utc_time_to_epoch(value)
+
+        return value
+
+    def _encode(self, table: str, data: dict) -> dict:
+        """ Convert a document to a column -> value mapping. """
+
+        columns = self._columns(table)
+        encoded = {}
+        for name, value in data.items():
+            if name not in columns:
+                logging.warning(f"Dropping unknown field {name} for table {table}")
+                continue
+
+            encoded[name] = self._encode_value(columns[name][1], value)
+
+        return encoded
+
+    def _decode(self, table: str, row: sqlite3.Row) -> dict:
+        """ Convert a result row back to a document. """
+
+        columns = self._columns(table)
+        doc = {}
+        for name in row.keys():
+            value = row[name]
+            kind = columns[name][1] if name in columns else "text"
+            if value is not None and kind == "json":
+                value = json.loads(value)
+
+            elif value is not None and kind == "bool":
+                value = bool(value)
+
+            elif value is not None and kind == "datetime":
+                value = epoch_to_utc_time(value)
+
+            doc[name] = value
+
+        return doc
+
+    def _where(self,
+               table: str,
+               query: dict) -> tuple:
+        """ Compile a MongoDB style query into a WHERE clause.
+            Supports equality, $eq, $ne, $in, $nin, $all, $gt(e), $lt(e), $and, $or.
+            Scalar matches against JSON list columns test list membership.
+        """
+
+        clauses = []
+        params = []
+        for name, condition in query.items():
+            if name in ("$and", "$or"):
+                parts = [self._where(table, sub) for sub in condition]
+                joiner = " AND " if name == "$and" else " OR "
+                clauses.append("(" + joiner.join(f"({sql})" for sql, _ in parts) + ")")
+                for _, sub_params in parts:
+                    params.extend(sub_params)
+                continue
+
+            kind = self._column(table, name)[1]
+            if not isinstance(condition, dict) or not any(k.startswith("$") for k in condition):
+                condition = {"$eq": condition}
+
+            for op, value in condition.items():
+                sql, op_params = self._compare(name, kind, op, value)
+                clauses.append(sql)
+                params.extend(op_params)
+
+        return " AND ".join(clauses) if clauses else "1", params
+
+    def _compare(self,
+                 name: str,
+                 kind: str,
+                 op: str,
+                 value) -> tuple:
+        """ Compile a single field comparison. """
+
+        column = f'"{name}"'
+        if kind == "json" and not isinstance(value, (list, dict)) and op in ("$eq", "$ne"):
+            # Scalar against a list column matches any list element
+            sql = f"EXISTS (SELECT 1 FROM json_each({column}) WHERE value = ?)"
+            return (sql if op == "$eq" else f"NOT {sql}"), [value]
+
+        if kind == "json" and op in ("$in", "$nin"):
+            marks = ", ".join("?" * len(value))
+            sql = f"EXISTS (SELECT 1 FROM json_each({column}) WHERE value IN ({marks}))"
+            return (sql if op == "$in" else f"NOT {sql}"), list(value)
+
+        if kind == "json" and op == "$all":
+            sql = (f"NOT EXISTS (SELECT 1 FROM json_each(?) AS wanted "
+                   f"WHERE wanted.value NOT IN (SELECT value FROM json_each({column})))")
+            return sql, [json.dumps(list(value))]
+
+        if op == "$eq":
+            if value is None:
+                return f"{column} IS NULL", []
+            return f"{column} = ?", [self._encode_value(kind, value)]
+
+        if op == "$ne":
+            if value is None:
+                return f"{column} IS NOT NULL", []
+            return f"{column} IS NOT ?", [self._encode_value(kind, value)]
+
+        if op in ("$in", "$nin"):
+            values = [self._encode_value(kind, v) for v in value if v is not None]
+            marks = ", ".join("?" * len(values))
+            sql = f"{column} IN ({marks})"
+            if None in value:
+                sql = f"({sql} OR {column} IS NULL)"
+            return (sql if op == "$in" else f"NOT {sql}"), values
+
+        if op in SQL_COMPARISON_OPS:
+            return f"{column} {SQL_COMPARISON_OPS[op]} ?", [self._encode_value(kind, value)]
+
+        raise ValueError(f"Unsupported query operator {op}")
+
     async def connect(self):
         """Get the client with optional authentication."""
 
+        logging.info(f"Opening SQLite database "
+                     f"at {self._db_url} "
+                     f"with {SQLITE_POOL_SIZE} reader connections")
+
+        pathlib.Path(self._db_url).parent.mkdir(parents=True, exist_ok=True)
+        self._db_client = await asyncio.to_thread(self._open_connection)
+
+        self._readers = asyncio.Queue()
+        for _ in range(SQLITE_POOL_SIZE):
+            conn = await asyncio.to_thread(self._open_connection, True)
+            self._readers.put_nowait(conn)
+
     async def close(self):
         """ Disconnect from the database. """
 
+        logging.info(f"Closing SQLite database "
+                     f"at {self._db_url}")
+
+        if self._readers is not None:
+            while not self._readers.empty():
+                self._readers.get_nowait().close()
+
+        if self._db_client is not None:
+            self._db_client.close()
+
     async def configure(self,
                         **kwargs) -> None:
         """Configure database connection parameters"""
 
+        clean_db = "clean_db" in kwargs and kwargs["clean_db"]
+        await self._write(self._configure, clean_db, kwargs.get("keep") or [])
+
+    def _configure(self,
+                   conn: sqlite3.Connection,
+                   clean_db: bool,
+                   keep: list):
+        """ Create missing tables and columns and migrate changed column types,
+            dropping all data if requested except the tables to keep.
+        """
+
+        with self._transaction(conn):
+            if clean_db:
+                for table, _ in DB_COLLECTIONS:
+                    if table not in keep:
+                        self._drop_text_index(conn, table)
+                        conn.execute(f'DROP TABLE IF EXISTS "{table}"')
+
+            self._migrate_cycle_members(conn)
+            for table, columns in DB_COLLECTIONS:
+                existing = {row["name"]: row["type"] for row in conn.execute(f'PRAGMA table_info("{table}")')}
+                if existing and any(existing.get(name, sql_type) != sql_type
+                                    for name, (sql_type, _, _) in columns.items()):
+                    self._migrate_table(conn, table, columns, existing)
+                    continue
+
+                if not existing:
+                    self._create_table(conn, table, columns)
+                    continue
+
+                # Reconcile columns added to the models since the table was created
+                for name, (sql_type, _, _) in columns.items():
+                    if name not in existing:
+                        conn.execute(f'ALTER TABLE "{table}" ADD COLUMN "{name}" {sql_type}')
+
+            for table, _ in DB_COLLECTIONS:
+                indexes = DB_INDEXES.get(table, [])
+                # List fields are JSON text, multikey indexes do not apply
+                self._reconcile_indexes(conn, table, [spec for spec in indexes
+                                                      if not self._is_text(spec) and not spec.get("multikey")])
+                self._reconcile_text_index(conn, table, self._text_index(table))
+
+    def _migrate_cycle_members(self,
+                               conn: sqlite3.Connection) -> None:
+        """ Move the executions lists embedded in test cycles before membership
+            had its own table into test cycle members, recounting the results
+            of the cycles moved and dropping the column.
+        """
+
+        if "executions" not in {row["name"] for row in conn.execute(f'PRAGMA table_info("{DB_COLLECTION_TCY}")')}:
+            return
+
+        logging.info(f"Moving embedded executions of {DB_COLLECTION_TCY} to {DB_COLLECTION_TCM}")
+        if not conn.execute(f'PRAGMA table_info("{DB_COLLECTION_TCM}")').fetchall():
+            self._create_table(conn, DB_COLLECTION_TCM, self._tables[DB_COLLECTION_TCM])
+
+        # Executions that no longer exist are dropped from the cycle
+        conn.execute(f'INSERT OR IGNORE INTO "{DB_COLLECTION_TCM}" '
+                     f'("_id", "test_cycle_key", "execution_key", "project_key", "added_at") '
+                     f'SELECT c."_id" || \'/\' || e."_id", c."_id", e."_id", e."project_key", c."created_at" '
+                     f'FROM "{DB_COLLECTION_TCY}" c, json_each(c."executions") j '
+                     f'JOIN "{DB_COLLECTION_TE}" e ON e."_id" = j."value" '
+                     f'WHERE json_valid(c."executions")')
+        conn.execute(f'UPDATE "{DB_COLLECTION_TCY}" SET "result_counts" = '
+                     f'(SELECT json_group_object("result", "count") FROM '
+                     f'(SELECT COALESCE(e."result", ?) AS "result", COUNT(*) AS "count" '
+                     f'FROM "{DB_COLLECTION_TCM}" m JOIN "{DB_COLLECTION_TE}" e ON e."_id" = m."execution_key" '
+                     f'WHERE m."test_cycle_key" = "{DB_COLLECTION_TCY}"."_id" GROUP BY 1)) '
+                     f'WHERE "executions" IS NOT NULL',
+                     [RESULT_NONE])
+        conn.execute(f'ALTER TABLE "{DB_COLLECTION_TCY}" DROP COLUMN "executions"')
+
+    @staticmethod
+    def _create_table(conn: sqlite3.Connection,
+                      table: str,
+                      columns: dict) -> None:
+        """ Create a table from its column definitions. """
+
+        column_defs = [f'"{name}" {sql_type}{" NOT NULL" if not_null else ""}'
+                       for name, (sql_type, _, not_null) in columns.items()]
+        column_defs[0] += " PRIMARY KEY"
+        conn.execute(f'CREATE TABLE "{table}" ({", ".join(column_defs)})')
+
+    def _migrate_table(self,
+                       conn: sqlite3.Connection,
+                       table: str,
+                       columns: dict,
+                       existing: dict) -> None:
+        """ Rebuild a table whose column types changed, copying its rows.
+            ISO time text is converted to epoch seconds, indexes are
+            recreated by the reconcile that follows.
+        """
+
+        logging.info(f"Migrating column types of {table}")
+        self._drop_text_index(conn, table)
+        conn.execute(f'ALTER TABLE "{table}" RENAME TO "{table}_old"')
+        self._create_table(conn, table, columns)
+
+        names, values = [], []
+        for name, (sql_type, kind, _) in columns.items():
+            if name not in existing:
+                continue
+
+            names.append(f'"{name}"')
+            if existing[name] == sql_type:
+                values.append(f'"{name}"')
+            elif kind == "datetime":
+                values.append(f'CAST(strftime(\'%s\', "{name}") AS INTEGER)')
+            else:
+                values.append(f'CAST("{name}" AS {sql_type})')
+
+        conn.execute(f'INSERT INTO "{table}" ({", ".join(names)}) '
+                     f'SELECT {", ".join(values)} FROM "{table}_old"')
+        conn.execute(f'DROP TABLE "{table}_old"')
+
+    @staticmethod
+    def _is_text(spec: dict) -> bool:
+        """ Check if an index spec declares a text index. """
+
+        return any(direction == "text" for _, direction in spec["keys"])
+
+    def _text_index(self,
+                    table: str) -> dict | None:
+        """ Get the text index declared on a table, if any. """
+
+        return next((spec for spec in DB_INDEXES.get(table, []) if self._is_text(spec)), None)
+
+    def _drop_text_index(self,
+                         conn: sqlite3.Connection,
+                         table: str) -> None:
+        """ Drop the FTS5 table of a text index with its sync triggers. """
+
+        for trigger in ("insert", "delete", "update"):
+            conn.execute(f'DROP TRIGGER IF EXISTS "{table}_fts_{trigger}"')
+        conn.execute(f'DROP TABLE IF EXISTS "{table}_fts"')
+
+    def _reconcile_text_index(self,
+                              conn: sqlite3.Connection,
+                              table: str,
+                              spec: dict | None) -> None:
+        """ Keep a text index as an external content FTS5 table over the
+            text fields, synced by triggers. It is rebuilt when created
+            or when the declared fields change.
+        """
+
+        fts = f"{table}_fts"
+        existing = conn.execute("SELECT sql FROM sqlite_master WHERE name = ?", (fts,)).fetchone()
+        if spec is None:
+            if existing is not None:
+                logging.info(f"Dropping text index {fts} on {table}")
+                self._drop_text_index(conn, table)
+            return
+
+        columns = [field for field, direction in spec["keys"] if direction == "text"]
+        names = ", ".join(f'"{name}"' for name in columns)
+        create_sql = (f'CREATE VIRTUAL TABLE "{fts}" USING fts5({names}, content=\'{table}\', '
+                      f'content_rowid=\'rowid\', tokenize=\'porter unicode61\')')
+        if existing is not None and existing["sql"] == create_sql:
+            return
+
+        logging.info(f"Creating text index {fts} on {table}")
+        self._drop_text_index(conn, table)
+        conn.execute(create_sql)
+
+        new_values = ", ".join(f'new."{name}"' for name in columns)
+        old_values = ", ".join(f'old."{name}"' for name in columns)
+        insert = f'INSERT INTO "{fts}" (rowid, {names}) VALUES (new.rowid, {new_values});'
+        delete = f'INSERT INTO "{fts}" ("{fts}", rowid, {names}) VALUES (\'delete\', old.rowid, {old_values});'
+        conn.execute(f'CREATE TRIGGER "{fts}_insert" AFTER INSERT ON "{table}" BEGIN {insert} END')
+        conn.execute(f'CREATE TRIGGER "{fts}_delete" AFTER DELETE ON "{table}" BEGIN {delete} END')
+        conn.execute(f'CREATE TRIGGER "{fts}_update" AFTER UPDATE OF {names} ON "{table}" '
+                     f'BEGIN {delete} {insert} END')
+        conn.execute(f'INSERT INTO "{fts}" ("{fts}") VALUES (\'rebuild\')')
+
+    def _reconcile_indexes(self,
+                           conn: sqlite3.Connection,
+                           table: str,
+                           indexes: list) -> None:
+        """ Create missing declared indexes and drop stale ones. """
+
+        existing = {row["name"]: bool(row["unique"])
+                    for row in conn.execute(f'PRAGMA index_list("{table}")')
+                    if row["origin"] == "c"}
+
+        declared = {}
+        for spec in indexes:
+            name = f"{table}_" + "_".join(f"{field}_{direction}" for field, direction in spec["keys"])
+            declared[name] = spec
+
+        # Drop indexes no longer declared or with changed options
+        for name, unique in existing.items():
+            spec = declared.get(name)
+            if spec is None or unique != spec.get("unique", False):
+                logging.info(f"Dropping index {name} on {table}")
+                conn.execute(f'DROP INDEX "{name}"')
+
+            else:
+                del declared[name]
+
+        for name, spec in declared.items():
+            logging.info(f"Creating index {name} on {table}")
+            fields = ", ".join(f'"{field}" {"DESC" if direction == -1 else "ASC"}'
+                               for field, direction in spec["keys"])
+            unique = "UNIQUE " if spec.get("unique", False) else ""
+            conn.execute(f'CREATE {unique}INDEX "{name}" ON "{table}" ({fields})')
+
+    def _insert(self,
+                conn: sqlite3.Connection,
+                table: str,
+                data: dict) -> None:
+        """ Insert a single row, mapping constraint failures to WriteError. """
+
+        encoded = self._encode(table, data)
+        names = ", ".join(f'"{name}"' for name in encoded)
+        marks = ", ".join("?" * len(encoded))
+        sql = f'INSERT INTO "{table}" ({names}) VALUES ({marks})'
+
+        try:
+            conn.execute(sql, list(encoded.values()))
+
+        except sqlite3.IntegrityError as e:
+            if "UNIQUE" in str(e):
+                raise DuplicateKeyError(str(e)) from e
+            raise WriteError(str(e)) from e
+
+    def _assignments(self,
+                     table: str,
+                     update_data: dict) -> tuple:
+        """ Compile a MongoDB style update document into SET assignments.
+            Supports $set, $addToSet (with $each) and $pull (with $in) on
+            JSON list columns, and $inc on numeric columns or "column.key"
+            paths into JSON dict columns, each applied in the statement itself.
+        """
+
+        assignments = []
+        params = []
+        for op, fields in self.update_document(update_data).items():
+            if op == "$set":
+                for name, value in self._encode(table, fields).items():
+                    assignments.append(f'"{name}" = ?')
+                    params.append(value)
+                continue
+
+            if op == "$inc":
+                sql, inc_params = self._inc_assignments(table, fields)
+                assignments.extend(sql)
+                params.extend(inc_params)
+                continue
+
+            for name, value in fields.items():
+                if self._column(table, name)[1] != "json":
+                    raise ValueError(f"{op} requires a list field, got {name}")
+
+                column = f'"{name}"'
+                current = f"json_each(COALESCE({column}, '[]'))"
+                if op == "$addToSet":
+                    values = value["$each"] if isinstance(value, dict) else [value]
+                    assignments.append(
+                        f"{column} = (SELECT json_group_array(value) FROM ("
+                        f"SELECT value FROM {current} UNION ALL "
+                        f"SELECT value FROM json_each(?) "
+                        f"WHERE value NOT IN (SELECT value FROM {current})))")
+                    params.append(json.dumps(list(dict.fromkeys(values))))
+
+                elif op == "$pull":
+                    values = value["$in"] if isinstance(value, dict) else [value]
+                    assignments.append(
+                        f"{column} = (SELECT json_group_array(value) FROM {current} "
+                        f"WHERE value NOT IN (SELECT value FROM json_each(?)))")
+                    params.append(json.dumps(list(values)))
+
+                else:
+                    raise ValueError(f"Unsupported update operator {op}")
+
+        return assignments, params
+
+    def _inc_assignments(self,
+                         table: str,
+                         fields: dict) -> tuple:
+        """ Compile $inc fields into assignments. Keys of the same JSON
+            column are nested json_set calls, SQLite only applies the
+            last assignment of a column.
+        """
+
+        paths = {}
+        for name, value in fields.items():
+            column, _, key = name.partition(".")
+            paths.setdefault(column, []).append((key, value))
+
+        assignments = []
+        params = []
+        for column, increments in paths.items():
+            kind = self._column(table, column)[1]
+            if kind in ("int", "real") and increments == [("", increments[0][1])]:
+                assignments.append(f'"{column}" = COALESCE("{column}", 0) + ?')
+                params.append(increments[0][1])
+                continue
+
+            if kind != "json" or any(not key for key, _ in increments):
+                raise ValueError(f"$inc requires a numeric field or dict key, got {column}")
+
+            expression = f"""COALESCE("{column}", '{{}}')"""
+            for key, value in increments:
+                expression = f'json_set({expression}, ?, COALESCE(json_extract("{column}", ?), 0) + ?)'
+                path = f'$."{key}"'
+                params.extend([path, path, value])
+            assignments.append(f'"{column}" = {expression}')
+
+        return assignments, params
+
+    def _update_sql(self,
+                    table: str,
+                    query: dict,
+                    update_data: dict,
+                    one: bool = False) -> tuple:
+        """ Build an UPDATE statement applying an update document
+            to one or all matching rows.
+        """
+
+        assignments, assignment_params = self._assignments(table, update_data)
+        where, params = self._where(table, query)
+        if one:
+            where = f'rowid IN (SELECT rowid FROM "{table}" WHERE {where} LIMIT 1)'
+
+        # A no-op assignment still reports the matched row count
+        assignments = ", ".join(assignments) or '"_id" = "_id"'
+        sql = f'UPDATE "{table}" SET {assignments} WHERE {where}'
+
+        return sql, assignment_params + params
+
+    def _delete_sql(self,
+                    table: str,
+                    query: dict,
+                    one: bool = False) -> tuple:
+        """ Build a DELETE statement for one or all matching rows. """
+
+        where, params = self._where(table, query)
+        if one:
+            sql = (f'DELETE FROM "{table}" WHERE rowid IN '
+                   f'(SELECT rowid FROM "{table}" WHERE {where} LIMIT 1)')
+        else:
+            sql = f'DELETE FROM "{table}" WHERE {where}'
+
+        return sql, params
+
     async def create(self,
                      table: str,
                      data: dict) -> bool:
         """Insert a new record into the database."""
 
+        await self._write(self._insert, table, data)
+
+        return True
+
+    async def create_many(self,
+                          table: str,
+                          data: list) -> tuple:
+        """Insert multiple records into the database, unordered."""
+
+        def _create_many(conn):
+            inserted, errors = 0, {}
+            with self._transaction(conn):
+                for index, doc in enumerate(data):
+                    try:
+                        self._insert(conn, table, doc)
+                        inserted += 1
+                    except WriteError as e:
+                        errors[index] = e
+
+            return inserted, errors
+
+        if not data:
+            return 0, {}
+
+        return await self._write(_create_many)
+
+    async def bulk_write(self,
+                         table: str,
+                         operations: list) -> tuple:
+        """Apply a batch of write operations, unordered."""
+
+        def _bulk_write(conn):
+            counts, errors = {"inserted": 0, "matched": 0, "deleted": 0}, {}
+            with self._transaction(conn):
+                for index, (op, *args) in enumerate(operations):
+                    try:
+                        if op == "insert_one":
+                            self._insert(conn, table, args[0])
+                            counts["inserted"] += 1
+                        elif op in ("update_one", "update_many"):
+                            sql, params = self._update_sql(table, args[0], args[1], one=op == "update_one")
+                            counts["matched"] += conn.execute(sql, params).rowcount
+                        elif op in ("delete_one", "delete_many"):
+                            sql, params = self._delete_sql(table, args[0], one=op == "delete_one")
+                            counts["deleted"] += conn.execute(sql, params).rowcount
+                        else:
+                            raise ValueError(f"Unsupported bulk operation {op}")
+
+                    except sqlite3.IntegrityError as e:
+                        errors[index] = WriteError(str(e))
+                    except WriteError as e:
+                        errors[index] = e
+
+            return counts, errors
+
+        if not operations:
+            return {"inserted": 0, "matched": 0, "deleted": 0}, {}
+
+        return await self._write(_bulk_write)
+
     async def find(self,
                    table: str,
-                   query: dict) -> list:
+                   query: dict,
+                   sort: list = None,
+                   limit: int = None,
+                   after: dict = None,
+                   fields: list = None) -> list:
         """Retrieve records from the database."""
 
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+
+        where, params = self._where(table, query)
+        sql = f'SELECT {self._select_list(table, fields)} FROM "{table}" WHERE {where}'
+        sql, params = self._order_and_limit(table, sql, params, sort, limit)
+
+        def _find(conn):
+            return [self._decode(table, row) for row in conn.execute(sql, params)]
+
+        return await self._read(_find)
+
+    def _order_and_limit(self,
+                         table: str,
+                         sql: str,
+                         params: list,
+                         sort: list = None,
+                         limit: int = None) -> tuple:
+        """ Append ORDER BY and LIMIT clauses to a SELECT. """
+
+        if sort:
+            for name, _ in sort:
+                self._column(table, name)
+            sql += " ORDER BY " + ", ".join(f'"{name}" {"DESC" if direction == -1 else "ASC"}'
+                                            for name, direction in sort)
+
+        if limit:
+            sql += " LIMIT ?"
+            params = params + [limit]
+
+        return sql, params
+
+    def _linked_where(self,
+                      link_table: str,
+                      link_query: dict,
+                      link_field: str,
+                      table: str,
+                      query: dict) -> tuple:
+        """ Build the WHERE clause of records joined through a link table,
+            as a semi-join on the link table index.
+        """
+
+        self._column(link_table, link_field)
+        link_where, link_params = self._where(link_table, link_query)
+        where, params = self._where(table, query)
+        where = (f'"_id" IN (SELECT "{link_field}" FROM "{link_table}" WHERE {link_where}) '
+                 f'AND ({where})')
+
+        return where, link_params + params
+
+    async def find_linked(self,
+                          link_table: str,
+                          link_query: dict,
+                          link_field: str,
+                          table: str,
+                          query: dict,
+                          sort: list = None,
+                          limit: int = None,
+                          after: dict = None,
+                          fields: list = None) -> list:
+        """Retrieve records joined through a link table."""
+
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+
+        where, params = self._linked_where(link_table, link_query, link_field, table, query)
+        sql = f'SELECT {self._select_list(table, fields)} FROM "{table}" WHERE {where}'
+        sql, params = self._order_and_limit(table, sql, params, sort, limit)
+
+        def _find_linked(conn):
+            return [self._decode(table, row) for row in conn.execute(sql, params)]
+
+        return await self._read(_find_linked)
+
+    async def count_linked(self,
+                           link_table: str,
+                           link_query: dict,
+                           link_field: str,
+                           table: str,
+                           query: dict) -> int:
+        """Count records joined through a link table."""
+
+        where, params = self._linked_where(link_table, link_query, link_field, table, query)
+        sql = f'SELECT COUNT(*) FROM "{table}" WHERE {where}'
+
+        return await self._read(lambda conn: conn.execute(sql, params).fetchone()[0])
+
+    async def search(self,
+                     table: str,
+                     query: dict,
+                     text: str,
+                     limit: int = None,
+                     after: dict = None,
+                     fields: list = None) -> list:
+        """Retrieve records matching a full text search of the FTS5 table,
+           ranked by weighted bm25.
+        """
+
+        spec = self._text_index(table)
+        if spec is None:
+            raise ValueError(f"No text index on {table}")
+
+        words = re.findall(r"\w+", text)
+        if not words:
+            return []
+
+        # Match any of the words, each quoted to escape FTS5 query syntax
+        fts = f"{table}_fts"
+        match = " OR ".join(f'"{word}"' for word in words)
+        weights = ", ".join(str(spec.get("weights", {}).get(field, 1))
+                            for field, direction in spec["keys"] if direction == "text")
+
+        where, params = self._where(table, query)
+        select = self._select_list(table, fields) if fields else f'"{table}".*'
+        sql = (f'SELECT {select}, f."score" FROM "{table}" JOIN '
+               f'(SELECT rowid AS "fts_rowid", -bm25("{fts}", {weights}) AS "score" '
+               f'FROM "{fts}" WHERE "{fts}" MATCH ?) AS f '
+               f'ON "{table}".rowid = f."fts_rowid" WHERE ({where})')
+        params = [match, *params]
+
+        if after is not None:
+            sql += ' AND (f."score" < ? OR (f."score" = ? AND "_id" > ?))'
+            params += [after["score"], after["score"], after["_id"]]
+
+        sql += ' ORDER BY f."score" DESC, "_id" ASC'
+        if limit:
+            sql += " LIMIT ?"
+            params.append(limit)
+
+        def _search(conn):
+            return [self._decode(table, row) for row in conn.execute(sql, params)]
+
+        return await self._read(_search)
+
+    async def group_count(self,
+                          table: str,
+                          query: dict,
+                          fields: list) -> list:
+        """Count records grouped by fields in one GROUP BY."""
+
+        for field in fields:
+            self._column(table, field)
+
+        groups = [f'"{field}"' for field in fields]
+        where, params = self._where(table, query)
+        sql = (f'SELECT {", ".join([*groups, "COUNT(*) AS count"])} FROM "{table}" WHERE {where}'
+               f'{" GROUP BY " + ", ".join(groups) if groups else ""}')
+
+        def _group_count(conn):
+            return [self._decode(table, row) for row in conn.execute(sql, params)]
+
+        return await self._read(_group_count)
+
+    async def find_latest(self,
+                          table: str,
+                          query: dict,
+                          group_field: str,
+                          sort: list,
+                          limit: int,
+                          fields: list = None) -> list:
+        """Retrieve the last records of each group numbered by ROW_NUMBER()
+           over the group, newest in sort order first.
+        """
+
+        sort = [*sort, ("_id", sort[-1][1])]
+        for name, _ in [(group_field, 1), *sort]:
+            self._column(table, name)
+
+        latest = ", ".join(f'"{name}" {"ASC" if direction == -1 else "DESC"}' for name, direction in sort)
+        where, params = self._where(table, query)
+        sql = (f'SELECT {self._select_list(table, fields or list(self._columns(table)))} FROM '
+               f'(SELECT *, ROW_NUMBER() OVER (PARTITION BY "{group_field}" ORDER BY {latest}) AS "row_number" '
+               f'FROM "{table}" WHERE {where}) WHERE "row_number" <= ?')
+        sql, params = self._order_and_limit(table, sql, [*params, limit], [(group_field, 1), *sort])
+
+        def _find_latest(conn):
+            return [self._decode(table, row) for row in conn.execute(sql, params)]
+
+        return await self._read(_find_latest)
+
+    async def find_iter(self,
+                        table: str,
+                        query: dict,
+                        sort: list = None,
+                        after: dict = None,
+                        batch_size: int = STREAM_BATCH_SIZE,
+                        fields: list = None):
+        """Asynchronously iterate over records, fetching them in batches
+           from a single cursor. The cursor runs on its own reader connection
+           so a slow consumer does not hold a pooled one, and is closed once
+           iteration ends or is abandoned.
+        """
+
+        if after is not None:
+            query = self.keyset_query(query, sort, after)
+
+        where, params = self._where(table, query)
+        sql = f'SELECT {self._select_list(table, fields)} FROM "{table}" WHERE {where}'
+        sql, params = self._order_and_limit(table, sql, params, sort)
+
+        def _fetch(cursor):
+            return [self._decode(table, row) for row in cursor.fetchmany(batch_size)]
+
+        conn = await asyncio.to_thread(self._open_connection, True)
+        try:
+            cursor = await asyncio.to_thread(conn.execute, sql, params)
+            while True:
+                batch = await asyncio.to_thread(_fetch, cursor)
+                for doc in batch:
+                    yield doc
+
+                if len(batch) < batch_size:
+                    break
+
+        finally:
+            conn.close()
+
+    async def count(self,
+                    table: str,
+                    query: dict,
+                    estimated: bool = False) -> int:
+        """Count records in the database, using collection metadata if estimated."""
+
+        # SQLite keeps no row count metadata, COUNT(*) scans the smallest index
+        where, params = self._where(table, query)
+        sql = f'SELECT COUNT(*) FROM "{table}" WHERE {where}'
+
+        return await self._read(lambda conn: conn.execute(sql, params).fetchone()[0])
+
     async def find_one(self,
                        table: str,
-                       query: dict) -> dict:
+                       query: dict,
+                       fields: list = None) -> dict:
         """Retrieve a single record from the database."""
 
+        where, params = self._where(table, query)
+        sql = f'SELECT {self._select_list(table, fields)} FROM "{table}" WHERE {where} LIMIT 1'
+
+        def _find_one(conn):
+            row = conn.execute(sql, params).fetchone()
+            return None if row is None else self._decode(table, row)
+
+        return await self._read(_find_one)
+
     async def update(self,
                      table: str,
                      query: dict,
                      update_data: dict) -> tuple:
         """Update records in the database."""
 
+        sql, params = self._update_sql(table, query, update_data)
+        cursor = await self._write(lambda conn: conn.execute(sql, params))
+
+        return None, cursor.rowcount
+
+    async def update_one_returning(self,
+                                   table: str,
+                                   query: dict,
+                                   update_data: dict,
+                                   before: bool = False) -> dict:
+        """Update a single record and return it after, or before, the update."""
+
+        if before:
+            # Read and update the same row on the single writer connection
+            where, where_params = self._where(table, query)
+            select_sql = f'SELECT rowid, * FROM "{table}" WHERE {where} LIMIT 1'
+            assignments, params = self._assignments(table, update_data)
+            assignments = ", ".join(assignments) or '"_id" = "_id"'
+            update_sql = f'UPDATE "{table}" SET {assignments} WHERE rowid = ?'
+
+            def _update_one_before(conn):
+                with self._transaction(conn):
+                    row = conn.execute(select_sql, where_params).fetchone()
+                    if row is None:
+                        return None
+                    conn.execute(update_sql, params + [row["rowid"]])
+
+                doc = self._decode(table, row)
+                del doc["rowid"]
+                return doc
+
+            return await self._write(_update_one_before)
+
+        sql, params = self._update_sql(table, query, update_data, one=True)
+        sql += " RETURNING *"
+
+        def _update_one_returning(conn):
+            # Exhaust the cursor so the statement completes and commits
+            rows = conn.execute(sql, params).fetchall()
+            return self._decode(table, rows[0]) if rows else None
+
+        return await self._write(_update_one_returning)
+
     async def delete(self,
                      table: str,
                      query: dict) -> tuple:
         """Delete records from the database."""
 
+        sql, params = self._delete_sql(table, query)
+        cursor = await self._write(lambda conn: conn.execute(sql, params))
+
+        return None, cursor.rowcount
+
     async def delete_one(self,
                          table: str,
                          query: dict) -> tuple:
         """Delete records from the database."""
 
+        sql, params = self._delete_sql(table, query, one=True)
+        cursor = await self._write(lambda conn: conn.execute(sql, params))
+
+        return None, cursor.rowcount
+
     async def execute_raw(self,
                           command,
                           *args,
@@ -85,3 +1103,14 @@ class SqliteClient(DatabaseClient):
         """ Execute a raw query or command
             (SQL for SQLite, command for MongoDB).
         """
+
+        def _execute(conn):
+            cursor = conn.execute(command, args)
+            if cursor.description is None:
+                return cursor.rowcount
+            return [dict(row) for row in cursor.fetchall()]
+
+        if command.lstrip().upper().startswith(("SELECT", "WITH")):
+            return await self._read(_execute)
+
+        return await self._write(_execute)
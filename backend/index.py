@@ -24,6 +24,12 @@ from backend.db.db import DBType
 from backend.db.mongodb import MongoClient
 from backend.db.sqlite import SqliteClient
 from backend.routes import routers
+from backend.services.job_handlers import (
+    JOB_CANCEL_HANDLERS,
+    JOB_HANDLERS
+)
+from backend.services.jobs import JobRunner
+from backend.tools.errors import OrbitError, orbit_error_handler
 
 logger = logging.getLogger(__name__)
 
@@ -41,9 +47,15 @@ async def lifespan(app):
     await client.connect()
     await client.configure()
 
-    # Attach the database client to the app state
+    # Start the background job runner on the database client
+    jobs = JobRunner(client, JOB_HANDLERS, JOB_CANCEL_HANDLERS)
+    await jobs.start()
+
+    # Attach the database client and job runner to the app state
     app.state.db = client
+    app.state.jobs = jobs
     yield
+    await jobs.stop()
     await client.close()
 
 
@@ -79,6 +91,8 @@ app = FastAPI(title="ORBIT",
 for router in routers:
     app.include_router(router)
 
+app.add_exception_handler(OrbitError, orbit_error_handler)
+
 if __name__ == "__main__":
     log_conf = configure_logging_file(args.debug)
     uvicorn.run("index:app",
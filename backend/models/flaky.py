@@ -0,0 +1,33 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# model/flaky.py
+
+from pydantic import BaseModel, Field
+
+from backend.app_def.app_def import (
+    FLAKY_WINDOW_DEFAULT,
+    FLAKY_WINDOW_MAX,
+    PAGE_LIMIT_DEFAULT,
+    PAGE_LIMIT_MAX
+)
+
+
+class FlakyParams(BaseModel):
+    window: int = Field(FLAKY_WINDOW_DEFAULT, ge=2, le=FLAKY_WINDOW_MAX)
+    limit: int = Field(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX)
+
+
+class FlakyTestCase(BaseModel):
+    test_case_key: str
+    runs: int
+    flips: int
+    flip_rate: float
+    failure_rate: float
+    longest_fail_streak: int
+    current_streak: int
+    current_result: str
@@ -0,0 +1,40 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# model/folders.py
+
+from pydantic import BaseModel, Field
+
+from backend.app_def.app_def import FOLDER_DEPTH_MAX
+
+
+class Folder(BaseModel):
+    _id: str
+    project_key: str
+    path: str
+    parent: str | None
+    name: str
+    depth: int
+    total: int
+    direct: int
+    results: dict[str, int] | None
+    model_config = {"extra": "forbid"}
+
+
+class FolderNode(BaseModel):
+    path: str
+    name: str
+    total: int
+    direct: int
+    results: dict[str, int]
+    has_children: bool
+    children: list["FolderNode"] | None
+
+
+class FolderTreeParams(BaseModel):
+    parent: str | None = None
+    depth: int = Field(1, ge=1, le=FOLDER_DEPTH_MAX)
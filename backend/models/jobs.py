@@ -0,0 +1,24 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# model/jobs.py
+
+from pydantic import BaseModel
+
+
+class Job(BaseModel):
+    _id: str
+    job_id: str
+    kind: str
+    status: str
+    params: dict[str, str] | None
+    progress: dict[str, int] | None
+    error: str | None
+    created_at: str
+    started_at: str | None
+    finished_at: str | None
+    model_config = {"extra": "forbid"}
@@ -10,6 +10,8 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from backend.tools.tools import partial_model
+
 router = APIRouter()
 
 
@@ -20,9 +22,13 @@ class Project(BaseModel):
     created_at: str
     updated_at: str | None
     is_active: bool
+    deleted_at: str | None
     model_config = {"extra": "forbid"}
 
 
+ProjectPartial = partial_model(Project)
+
+
 class ProjectCreate(BaseModel):
     project_key: str
     description: str = ""
@@ -34,3 +40,19 @@ class ProjectUpdate(BaseModel):
     description: str = None
     is_active: bool = None
     model_config = {"extra": "forbid"}
+
+
+class ProjectImport(BaseModel):
+    project_key: str
+    counts: dict[str, int]
+
+
+class ProjectSummary(BaseModel):
+    project_key: str
+    test_cases: int
+    test_cases_by_status: dict[str, int]
+    test_cases_by_priority: dict[str, int]
+    test_cycles: int
+    test_cycles_by_status: dict[str, int]
+    executions: int
+    executions_by_result: dict[str, int]
@@ -0,0 +1,26 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# model/rollups.py
+
+from pydantic import BaseModel
+
+from backend.tools.tools import UtcTime
+
+
+class Rollup(BaseModel):
+    _id: str
+    project_key: str
+    test_case_key: str
+    folder: str | None
+    priority: str | None
+    day: UtcTime
+    executions: int
+    results: dict[str, int] | None
+    duration: int
+    timed: int
+    model_config = {"extra": "forbid"}
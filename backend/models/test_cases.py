@@ -7,9 +7,14 @@
 
 # routes/test_cases.py
 
+from typing import Literal
+
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from backend.tools.pagination import PageParams
+from backend.tools.tools import partial_model
+
 router = APIRouter()
 
 
@@ -28,11 +33,28 @@ class TestCase(BaseModel):
     test_script_type: str | None
     last_result: str | None
     last_execution_key: str | None
+    last_executed_at: str | None
     test_frequency: list[str] | None
     labels: list[str] | None
     links: list[str] | None
 
 
+TestCasePartial = partial_model(TestCase)
+
+
+class TestCaseSearchResult(TestCasePartial):
+    score: float
+
+
+class TestCaseFilters(PageParams):
+    status: str | None = None
+    priority: str | None = None
+    folder: str | None = None
+    labels: str | None = None
+    labels_match: Literal["any", "all"] = "any"
+    test_frequency: str | None = None
+
+
 class TestCaseCreate(BaseModel):
     test_case_key: str
     project_key: str
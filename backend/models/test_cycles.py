@@ -10,6 +10,9 @@
 from fastapi import APIRouter
 from pydantic import BaseModel
 
+from backend.tools.pagination import PageParams
+from backend.tools.tools import partial_model
+
 router = APIRouter()
 
 
@@ -22,7 +25,25 @@ class TestCycle(BaseModel):
     created_at: str | None
     updated_at: str | None
     status: str | None
-    executions: list[str] | None
+    result_counts: dict[str, int] | None
+    model_config = {"extra": "forbid"}
+
+
+TestCyclePartial = partial_model(TestCycle)
+
+
+class TestCycleSummary(BaseModel):
+    test_cycle_key: str
+    total: int
+    results: dict[str, int]
+
+
+class TestCycleMember(BaseModel):
+    _id: str
+    test_cycle_key: str
+    execution_key: str
+    project_key: str
+    added_at: str | None
     model_config = {"extra": "forbid"}
 
 
@@ -35,9 +56,18 @@ class TestCycleCreate(BaseModel):
     model_config = {"extra": "forbid"}
 
 
+class TestCycleExecutionsUpdate(BaseModel):
+    add: list[str] = []
+    remove: list[str] = []
+    model_config = {"extra": "forbid"}
+
+
+class TestCycleExecutionsPage(PageParams):
+    result: str | None = None
+
+
 class TestCycleUpdate(BaseModel):
     title: str = None
     description: str = None
     status: str = None
-    executions: list[str] = []
     model_config = {"extra": "forbid"}
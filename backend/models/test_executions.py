@@ -8,7 +8,13 @@
 # model/execution.py
 
 from fastapi import APIRouter
-from pydantic import BaseModel
+from pydantic import BaseModel, Field, model_validator
+
+from backend.tools.pagination import PageParams
+from backend.tools.tools import (
+    UtcTime,
+    partial_model
+)
 
 router = APIRouter()
 
@@ -22,11 +28,22 @@ class TestExecution(BaseModel):
     result: str | None
     custom_fields: dict[str, str] | None
     comments: str | None
-    started_at: str | None
-    finished_at: str | None
+    started_at: UtcTime | None
+    finished_at: UtcTime | None
+    executed_at: UtcTime | None = None
     links: list[str] | None
     model_config = {"extra": "forbid"}
 
+    @model_validator(mode="after")
+    def derive_executed_at(self):
+        """ Derive the time the execution ran, indexed for history queries. """
+
+        self.executed_at = self.finished_at or self.started_at
+        return self
+
+
+TestExecutionPartial = partial_model(TestExecution)
+
 
 class TestExecutionCreate(BaseModel):
     execution_key: str
@@ -34,8 +51,8 @@ class TestExecutionCreate(BaseModel):
     result: str = None
     custom_fields: dict[str, str] = None
     comments: str = None
-    started_at: str = None
-    finished_at: str = None
+    started_at: UtcTime = None
+    finished_at: UtcTime = None
     links: list[str] = None
     model_config = {"extra": "forbid"}
 
@@ -45,7 +62,24 @@ class TestExecutionUpdate(BaseModel):
     result: str = None
     custom_fields: dict[str, str] = None
     comments: str = None
-    started_at: str = None
-    finished_at: str = None
+    started_at: UtcTime = None
+    finished_at: UtcTime = None
     links: list[str] = None
     model_config = {"extra": "forbid"}
+
+
+class TestExecutionBatchCreate(TestExecutionCreate):
+    test_case_key: str
+    model_config = {"extra": "forbid"}
+
+
+class TestExecutionBatchResult(BaseModel):
+    execution_key: str
+    status_code: int
+    error: str | None = None
+
+
+class TestExecutionHistoryPage(PageParams):
+    sort: str = "-executed_at"
+    from_: UtcTime | None = Field(None, alias="from")
+    to: UtcTime | None = None
@@ -0,0 +1,31 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# model/trends.py
+
+from typing import Literal
+
+from pydantic import BaseModel, Field
+
+from backend.app_def.app_def import (
+    TREND_BUCKETS_DEFAULT,
+    TREND_BUCKETS_MAX
+)
+
+
+class TrendParams(BaseModel):
+    bucket: Literal["day", "week"] = "day"
+    group_by: Literal["folder", "priority"] | None = None
+    buckets: int = Field(TREND_BUCKETS_DEFAULT, ge=1, le=TREND_BUCKETS_MAX)
+
+
+class TrendPoint(BaseModel):
+    bucket: str
+    group: str | None = None
+    total: int
+    results: dict[str, int]
+    pass_rate: float | None
@@ -5,14 +5,20 @@
 # License: MIT
 # ================================================================
 
+from .folders import router as folders_router
+from .jobs import router as jobs_router
 from .projects import router as projects_router
 from .root import router as root_router
 from .test_cases import router as test_cases_router
 from .test_cycles import router as cycles_router
 from .test_executions import router as executions_router
+from .trends import router as trends_router
 
 routers = [root_router,
            projects_router,
            test_cases_router,
            executions_router,
-           cycles_router]
+           cycles_router,
+           folders_router,
+           trends_router,
+           jobs_router]
@@ -0,0 +1,89 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# routes/dependencies.py
+
+from fastapi import Request
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY
+)
+from backend.services.projects import get_project
+from backend.services.test_cases import get_test_case
+from backend.services.test_cycles import get_cycle
+from backend.services.test_executions import get_execution
+
+
+def _resolved(request: Request) -> dict:
+    """ Get the per-request cache of resolved documents. """
+
+    if not hasattr(request.state, "resolved"):
+        request.state.resolved = {}
+
+    return request.state.resolved
+
+
+async def resolve_project(request: Request,
+                          project_key: str) -> dict:
+    """ Resolve a project once per request, raising NotFoundError if missing. """
+
+    resolved = _resolved(request)
+    if (DB_COLLECTION_PRJ, project_key) not in resolved:
+        db = request.app.state.db
+        resolved[(DB_COLLECTION_PRJ, project_key)] = await get_project(db, project_key)
+
+    return resolved[(DB_COLLECTION_PRJ, project_key)]
+
+
+async def resolve_test_case(request: Request,
+                            project_key: str,
+                            test_case_key: str) -> dict:
+    """ Resolve a test case within its project once per request. """
+
+    resolved = _resolved(request)
+    if (DB_COLLECTION_TC, test_case_key) not in resolved:
+        db = request.app.state.db
+        resolved[(DB_COLLECTION_TC, test_case_key)] = await get_test_case(db,
+                                                                          project_key,
+                                                                          test_case_key)
+
+    return resolved[(DB_COLLECTION_TC, test_case_key)]
+
+
+async def resolve_cycle(request: Request,
+                        test_cycle_key: str) -> dict:
+    """ Resolve a test cycle once per request, raising NotFoundError if
+        missing or its project is pending deletion.
+    """
+
+    resolved = _resolved(request)
+    if (DB_COLLECTION_TCY, test_cycle_key) not in resolved:
+        db = request.app.state.db
+        cycle = await get_cycle(db, test_cycle_key)
+        await resolve_project(request, cycle["project_key"])
+        resolved[(DB_COLLECTION_TCY, test_cycle_key)] = cycle
+
+    return resolved[(DB_COLLECTION_TCY, test_cycle_key)]
+
+
+async def resolve_execution(request: Request,
+                            execution_key: str) -> dict:
+    """ Resolve a test execution once per request, raising NotFoundError if
+        missing or its project is pending deletion.
+    """
+
+    resolved = _resolved(request)
+    if (DB_COLLECTION_TE, execution_key) not in resolved:
+        db = request.app.state.db
+        execution = await get_execution(db, execution_key)
+        await resolve_project(request, execution["project_key"])
+        resolved[(DB_COLLECTION_TE, execution_key)] = execution
+
+    return resolved[(DB_COLLECTION_TE, execution_key)]
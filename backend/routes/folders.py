@@ -0,0 +1,67 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# routes/folders.py
+
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    status
+)
+from starlette.responses import JSONResponse
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_FLD,
+    JOB_KIND_REBUILD_FOLDERS,
+    API_VERSION
+)
+from backend.models.folders import (
+    FolderNode,
+    FolderTreeParams
+)
+from backend.routes.dependencies import resolve_project
+from backend.services.folders import folder_tree
+
+router = APIRouter()
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/folders",
+            tags=[DB_COLLECTION_FLD],
+            response_model=list[FolderNode],
+            status_code=status.HTTP_200_OK)
+async def get_folders_by_project(request: Request,
+                                 project_key: str,
+                                 project: Annotated[dict, Depends(resolve_project)],
+                                 tree: Annotated[FolderTreeParams, Query()]):
+    """Get the folder tree of a project with test case counts and last result
+       rollups, from the top level or below a parent folder, depth levels deep.
+    """
+
+    db = request.app.state.db
+    folders = await folder_tree(db, project_key, tree.parent, tree.depth)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=folders)
+
+
+@router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/folders/rebuild",
+             tags=[DB_COLLECTION_FLD],
+             status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_folders_by_project(request: Request,
+                                     project_key: str,
+                                     project: Annotated[dict, Depends(resolve_project)]):
+    """Recount the folder index of a project in the background"""
+
+    job = await request.app.state.jobs.submit(JOB_KIND_REBUILD_FOLDERS, {"project_key": project_key})
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
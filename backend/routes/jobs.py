@@ -0,0 +1,53 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# routes/jobs.py
+
+from fastapi import (
+    APIRouter,
+    Request,
+    status
+)
+from starlette.responses import JSONResponse
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_JOB,
+    API_VERSION
+)
+from backend.models.jobs import Job
+from backend.services.jobs import get_job
+
+router = APIRouter()
+
+
+@router.get(f"/api/{API_VERSION}/tm/jobs/{{job_id}}",
+            tags=[DB_COLLECTION_JOB],
+            response_model=Job,
+            status_code=status.HTTP_200_OK)
+async def get_job_by_id(request: Request,
+                        job_id: str):
+    """Endpoint to get a background job and its progress"""
+
+    db = request.app.state.db
+    job = await get_job(db, job_id)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=job)
+
+
+@router.post(f"/api/{API_VERSION}/tm/jobs/{{job_id}}/cancel",
+             tags=[DB_COLLECTION_JOB],
+             response_model=Job,
+             status_code=status.HTTP_200_OK)
+async def cancel_job_by_id(request: Request,
+                           job_id: str):
+    """Endpoint to cancel a pending or running background job"""
+
+    job = await request.app.state.jobs.cancel(job_id)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=job)
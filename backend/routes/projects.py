@@ -7,25 +7,60 @@
 
 # routes/projects.py
 
+from typing import Annotated
+
 from fastapi import (
     APIRouter,
+    Depends,
+    Query,
     Request,
-    status,
-    Response
+    status
+)
+from starlette.responses import (
+    JSONResponse,
+    StreamingResponse
 )
-from starlette.responses import JSONResponse
 
 from backend.app_def.app_def import (
     DB_COLLECTION_PRJ,
     API_VERSION
 )
+from backend.db.db import DuplicateKeyError
 from backend.models.projects import (
     Project,
     ProjectCreate,
+    ProjectImport,
+    ProjectPartial,
+    ProjectSummary,
     ProjectUpdate
 )
+from backend.routes.dependencies import resolve_project
+from backend.services.projects import (
+    LIVE_PROJECT,
+    delete_project,
+    get_project
+)
+from backend.services.summary import project_summary
+from backend.services.transfer import (
+    export_records,
+    import_project
+)
+from backend.tools.compression import (
+    EXTENSIONS,
+    GZIP,
+    MEDIA_TYPES,
+    check_codec,
+    compress_stream,
+    decompress_lines
+)
+from backend.tools.pagination import (
+    PageParams,
+    find_page
+)
+from backend.tools.streaming import ndjson_lines
 from backend.tools.tools import (
-    get_current_utc_time
+    get_current_utc_time,
+    parse_fields
 )
 
 router = APIRouter()
@@ -33,17 +68,14 @@ router = APIRouter()
 
 @router.get(f"/api/{API_VERSION}/tm/projects",
             tags=[DB_COLLECTION_PRJ],
-            response_model=list[Project],
+            response_model=list[ProjectPartial],
             status_code=status.HTTP_200_OK)
-async def get_all_projects(request: Request):
+async def get_all_projects(request: Request,
+                           page: Annotated[PageParams, Query()]):
     """Endpoint to get projects"""
 
-    # Retrieve all projects from database
-    db = request.app.state.db
-    projects = await db.find(DB_COLLECTION_PRJ, {})
-
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=projects)
+    # Retrieve a page of projects from database
+    return await find_page(request, DB_COLLECTION_PRJ, LIVE_PROJECT, page, Project)
 
 
 @router.post(f"/api/{API_VERSION}/tm/projects",
@@ -60,54 +92,69 @@ async def create_project_by_key(request: Request,
     request_data = project.model_dump()
     project_key = request_data["project_key"]
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code != status.HTTP_404_NOT_FOUND:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"Project {project_key} already exists"})
-
     # Initialize counts and timestamps
     request_data["created_at"] = current_time
     request_data["updated_at"] = current_time
+    request_data["deleted_at"] = None
 
     # Assign _id
     db_insert = Project(**request_data).model_dump()
     db_insert["_id"] = project_key
 
-    # Create the project in the database
+    # Create the project in the database, the unique _id rejects duplicates
     db = request.app.state.db
-    await db.create(DB_COLLECTION_PRJ, db_insert)
+    try:
+        await db.create(DB_COLLECTION_PRJ, db_insert)
 
-    # Retrieve the updated project
-    created_project = await db.find_one(DB_COLLECTION_PRJ,
-                                        {"project_key": project_key})
+    except DuplicateKeyError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"Project {project_key} already exists"})
 
     return JSONResponse(status_code=status.HTTP_201_CREATED,
-                        content=created_project)
+                        content=db_insert)
 
 
 @router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}",
             tags=[DB_COLLECTION_PRJ],
-            response_model=Project,
+            response_model=ProjectPartial,
             status_code=status.HTTP_200_OK)
 async def get_project_by_key(request: Request,
-                             project_key: str):
+                             project_key: str,
+                             fields: str | None = None):
     """Endpoint to get project"""
 
+    try:
+        fields = parse_fields(fields, Project)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
+
     # Retrieve project from database
     db = request.app.state.db
-    result = await db.find_one(DB_COLLECTION_PRJ,
-                               {"project_key": project_key})
+    project = await get_project(db, project_key, fields=fields)
 
-    if result is None:
-        # Project not found
-        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
-                            content={"error": f"Project {project_key} not found"})
-    else:
-        # Convert ObjectId to string
-        return JSONResponse(status_code=status.HTTP_200_OK,
-                            content=result)
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=project)
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/summary",
+            tags=[DB_COLLECTION_PRJ],
+            response_model=ProjectSummary,
+            status_code=status.HTTP_200_OK)
+async def get_project_summary(request: Request,
+                              project_key: str,
+                              project: Annotated[dict, Depends(resolve_project)]):
+    """Get the test case counts by status and priority, test cycle counts
+       by status and execution counts by result of a project.
+    """
+
+    db = request.app.state.db
+    summary = await project_summary(db, project_key)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=summary)
 
 
 @router.put(f"/api/{API_VERSION}/tm/projects/{{project_key}}",
@@ -121,25 +168,20 @@ async def update_project_by_key(request: Request,
 
     current_time = get_current_utc_time()
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
     # Prepare request data, excluding None values
     request_data = project_update.model_dump()
     request_data = {k: v for k, v in request_data.items() if v is not None}
     request_data["updated_at"] = current_time
 
-    # Update the project in the database
+    # Update the project in the database, returning the updated project
     db = request.app.state.db
-    await db.update(DB_COLLECTION_PRJ,
-                    {"project_key": project_key},
-                    request_data)
-
-    # Retrieve the updated project
-    updated_project = await db.find_one(DB_COLLECTION_PRJ,
-                                        {"project_key": project_key})
+    updated_project = await db.update_one_returning(DB_COLLECTION_PRJ,
+                                                    {"_id": project_key, **LIVE_PROJECT},
+                                                    request_data)
+    if updated_project is None:
+        # Project not found
+        return JSONResponse(status_code=status.HTTP_404_NOT_FOUND,
+                            content={"error": f"Project {project_key} not found"})
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=updated_project)
@@ -147,17 +189,13 @@ async def update_project_by_key(request: Request,
 
 @router.delete(f"/api/{API_VERSION}/tm/projects/{{project_key}}",
                tags=[DB_COLLECTION_PRJ],
-               status_code=status.HTTP_204_NO_CONTENT)
+               status_code=status.HTTP_202_ACCEPTED)
 async def delete_project_by_key(request: Request,
                                 project_key: str,
+                                project: Annotated[dict, Depends(resolve_project)],
                                 force: dict = None):
     """Endpoint to delete project"""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
     # Get all test-cases for the project
     db = request.app.state.db
 
@@ -173,12 +211,62 @@ async def delete_project_by_key(request: Request,
         #         status_code=status.HTTP_400_BAD_REQUEST,
         #         content={"error": f"Project {project_key} has linked test-cases"})
 
-    else:
-        # TODO: Delete all test-cases, executions, cycles linked to project
-        pass
+    # Hide the project and delete it with its children in the background
+    job = await delete_project(db, request.app.state.jobs, project_key)
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/export",
+            tags=[DB_COLLECTION_PRJ],
+            status_code=status.HTTP_200_OK)
+async def export_project_by_key(request: Request,
+                                project_key: str,
+                                compression: str = GZIP):
+    """Endpoint to stream a project with its test cases, cycles and executions
+       as compressed JSONL
+    """
+
+    try:
+        check_codec(compression)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
+
+    # Check project exists before streaming
+    db = request.app.state.db
+    project = await get_project(db, project_key)
+
+    filename = f"{project_key}.jsonl.{EXTENSIONS[compression]}"
+    return StreamingResponse(compress_stream(ndjson_lines(export_records(db, project)), compression),
+                             status_code=status.HTTP_200_OK,
+                             media_type=MEDIA_TYPES[compression],
+                             headers={"Content-Disposition": f'attachment; filename="{filename}"'})
 
-    # Delete the project from the database
-    await db.delete(DB_COLLECTION_PRJ,
-                    {"project_key": project_key})
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+@router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/import",
+             tags=[DB_COLLECTION_PRJ],
+             response_model=ProjectImport,
+             status_code=status.HTTP_201_CREATED)
+async def import_project_by_key(request: Request,
+                                project_key: str):
+    """Endpoint to create a project from an uploaded export,
+       gzip, zstd or uncompressed JSONL
+    """
+
+    db = request.app.state.db
+    try:
+        counts = await import_project(db,
+                                      request.app.state.jobs,
+                                      project_key,
+                                      decompress_lines(request.stream()))
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
+
+    return JSONResponse(status_code=status.HTTP_201_CREATED,
+                        content={"project_key": project_key, "counts": counts})
@@ -9,10 +9,13 @@
 
 import logging
 
-from fastapi import APIRouter, Request, status, Response
-from fastapi.responses import RedirectResponse
+from fastapi import APIRouter, Request, status
+from fastapi.responses import JSONResponse, RedirectResponse
 
-from backend.app_def.app_def import API_VERSION
+from backend.app_def.app_def import (
+    API_VERSION,
+    JOB_KIND_RESET
+)
 
 router = APIRouter()
 
@@ -38,11 +41,17 @@ async def root_api(request: Request):
     return RedirectResponse(url="/docs")
 
 
-@router.post(f"/api/{API_VERSION}/tm/reset", tags=["root"])
+@router.post(f"/api/{API_VERSION}/tm/reset",
+             tags=["root"],
+             status_code=status.HTTP_202_ACCEPTED)
 async def reset_server(request: Request):
     """ Root endpoint to reset server. """
 
-    db = request.app.state.db
-    await db.configure(clean_db=True)
+    # Stop running jobs before dropping the data they work on
+    jobs = request.app.state.jobs
+    await jobs.cancel_all()
+    job = await jobs.submit(JOB_KIND_RESET)
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
@@ -7,8 +7,12 @@
 
 # routes/test_cases.py
 
+from typing import Annotated
+
 from fastapi import (
     APIRouter,
+    Depends,
+    Query,
     Request,
     status,
     Response
@@ -17,52 +21,102 @@ from starlette.responses import JSONResponse
 
 from backend.app_def.app_def import (
     DB_COLLECTION_TC,
+    JOB_KIND_DELETE_TEST_CASE,
     API_VERSION
 )
+from backend.db.db import DuplicateKeyError
 from backend.models.test_cases import (
     TestCase,
     TestCaseCreate,
+    TestCaseFilters,
+    TestCasePartial,
+    TestCaseSearchResult,
     TestCaseUpdate
 )
-from backend.routes.projects import get_project_by_key
-from backend.tools.tools import get_current_utc_time
+from backend.routes.dependencies import resolve_project
+from backend.services.folders import (
+    FOLDER_FIELDS,
+    move_test_cases
+)
+from backend.services.projects import (
+    deleted_project_keys,
+    delete_test_cases
+)
+from backend.services.rollups import (
+    ROLLUP_GROUP_FIELDS,
+    regroup_rollups
+)
+from backend.services.summary import forget_summary
+from backend.services.test_cases import (
+    get_test_case,
+    test_case_filter
+)
+from backend.services.trends import forget_trends
+from backend.tools.pagination import (
+    PageParams,
+    SearchParams,
+    find_page,
+    search_page
+)
+from backend.tools.tools import (
+    get_current_utc_time,
+    parse_fields
+)
 
 router = APIRouter()
 
 
 @router.get(f"/api/{API_VERSION}/tm/test-cases",
             tags=[DB_COLLECTION_TC],
-            response_model=list[TestCase])
-async def get_all_test_cases(request: Request):
-    """Get all test cases."""
+            response_model=list[TestCasePartial])
+async def get_all_test_cases(request: Request,
+                             page: Annotated[PageParams, Query()]):
+    """Get all test cases, except those of projects pending deletion."""
 
-    # Retrieve all test cases from database
-    db = request.app.state.db
-    test_cases = await db.find(DB_COLLECTION_TC, {})
+    # Retrieve a page of test cases from database
+    deleted = await deleted_project_keys(request.app.state.db)
+    query = {"project_key": {"$nin": deleted}} if deleted else {}
 
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=test_cases)
+    return await find_page(request, DB_COLLECTION_TC, query, page, TestCase)
 
 
 @router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases",
             tags=[DB_COLLECTION_TC],
-            response_model=list[TestCase])
+            response_model=list[TestCasePartial])
 async def get_all_test_cases_by_project(request: Request,
-                                        project_key: str):
-    """Get all test cases in the specified project."""
-
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Retrieve test cases from database matching project_key
-    db = request.app.state.db
-    test_cases = await db.find(DB_COLLECTION_TC,
-                               {"project_key": project_key})
-
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=test_cases)
+                                        project_key: str,
+                                        project: Annotated[dict, Depends(resolve_project)],
+                                        page: Annotated[TestCaseFilters, Query()]):
+    """Get all test cases in the specified project, optionally filtered by
+       status, priority, folder prefix, labels and test frequency.
+    """
+
+    # Retrieve a page of test cases from database matching the filters
+    return await find_page(request,
+                           DB_COLLECTION_TC,
+                           test_case_filter(project_key, page),
+                           page,
+                           TestCase)
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/search",
+            tags=[DB_COLLECTION_TC],
+            response_model=list[TestCaseSearchResult],
+            status_code=status.HTTP_200_OK)
+async def search_test_cases_by_project(request: Request,
+                                       project_key: str,
+                                       project: Annotated[dict, Depends(resolve_project)],
+                                       search: Annotated[SearchParams, Query()]):
+    """Search test cases in the specified project by words in their title,
+       description or labels, most relevant first.
+    """
+
+    # Retrieve a page of matches from the project text index
+    return await search_page(request,
+                             DB_COLLECTION_TC,
+                             {"project_key": project_key},
+                             search,
+                             TestCase)
 
 
 @router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases",
@@ -70,6 +124,7 @@ async def get_all_test_cases_by_project(request: Request,
              status_code=status.HTTP_201_CREATED)
 async def create_test_case_by_project(request: Request,
                                       project_key: str,
+                                      project: Annotated[dict, Depends(resolve_project)],
                                       test_case: TestCaseCreate):
     """Create a new test case in the specified project."""
 
@@ -79,18 +134,6 @@ async def create_test_case_by_project(request: Request,
     request_data = test_case.model_dump()
     test_case_key = request_data["test_case_key"]
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key already exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code != status.HTTP_404_NOT_FOUND:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"test case {test_case_key} already exists."})
-
     # Validate that test_case starts with project_key
     if not request_data["test_case_key"].startswith(project_key):
         return JSONResponse(
@@ -102,69 +145,67 @@ async def create_test_case_by_project(request: Request,
     request_data["project_key"] = project_key
     request_data["created_at"] = current_time
     request_data["updated_at"] = current_time
+    request_data["last_executed_at"] = None
 
     # Assign _id
     db_insert = TestCase(**request_data).model_dump()
     db_insert["_id"] = test_case_key
 
-    # Create the test case in the database
+    # Create the test case in the database, the unique _id rejects duplicates
     db = request.app.state.db
-    await db.create(DB_COLLECTION_TC, db_insert)
+    try:
+        await db.create(DB_COLLECTION_TC, db_insert)
+
+    except DuplicateKeyError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"test case {test_case_key} already exists."})
+
+    await move_test_cases(db, [(None, db_insert)])
+    forget_summary(project_key)
 
     return Response(status_code=status.HTTP_201_CREATED)
 
 
 @router.delete(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases",
                tags=[DB_COLLECTION_TC],
-               status_code=status.HTTP_204_NO_CONTENT)
+               status_code=status.HTTP_202_ACCEPTED)
 async def delete_all_test_case_by_project(request: Request,
-                                          project_key: str):
+                                          project_key: str,
+                                          project: Annotated[dict, Depends(resolve_project)]):
     """Delete all test cases in the specified project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # TODO: Check if test case is linked to any test executions
-
-    # Delete test cases from database matching project_key
+    # Delete test cases with their executions in the background
     db = request.app.state.db
-    await db.delete(DB_COLLECTION_TC,
-                    {"project_key": project_key})
-
-    # TODO: check test case count
+    job = await delete_test_cases(db, request.app.state.jobs, project_key)
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
 
 
 @router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}",
             tags=[DB_COLLECTION_TC],
-            response_model=TestCase)
+            response_model=TestCasePartial)
 async def get_test_case_by_key(request: Request,
                                project_key: str,
-                               test_case_key: str):
+                               test_case_key: str,
+                               fields: str | None = None):
     """Retrieve a specific test case by its ID within the specified project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
+    try:
+        fields = parse_fields(fields, TestCase)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
 
     # Retrieve test case from database
     db = request.app.state.db
-    result = await db.find_one(DB_COLLECTION_TC,
-                               {"test_case_key": test_case_key,
-                                "project_key": project_key})
-    if result is None:
-        # test case not found
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test case {test_case_key} not found"})
-    else:
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=result)
+    test_case = await get_test_case(db, project_key, test_case_key, fields=fields)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=test_case)
 
 
 @router.put(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}",
@@ -178,32 +219,33 @@ async def update_test_case_by_key(request: Request,
 
     current_time = get_current_utc_time()
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
     # Prepare request data, excluding None values
     request_data = test_case.model_dump()
     request_data = {k: v for k, v in request_data.items() if v is not None}
     request_data["updated_at"] = current_time
 
-    # Update the project in the database
+    # Update the test case in the database, reading the previous values
     db = request.app.state.db
-    await db.update(DB_COLLECTION_TC,
-                    {"test_case_key": test_case_key,
-                     "project_key": project_key},
-                    request_data)
+    previous = await db.update_one_returning(DB_COLLECTION_TC,
+                                             {"_id": test_case_key,
+                                              "project_key": project_key},
+                                             request_data,
+                                             before=True)
+    if previous is None:
+        # Report a missing project before a missing test case
+        await resolve_project(request, project_key)
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": f"Test case {test_case_key} not found"})
 
-    # Retrieve the updated test case
-    updated_test_case = await db.find_one(DB_COLLECTION_TC,
-                                          {"test_case_key": test_case_key,
-                                           "project_key": project_key})
+    updated_test_case = {**previous, **request_data}
+    if {"folder", "last_result"} & request_data.keys():
+        await move_test_cases(db, [(previous, updated_test_case)])
+    if {"status", "priority"} & request_data.keys():
+        forget_summary(project_key)
+    if set(ROLLUP_GROUP_FIELDS) & request_data.keys():
+        await regroup_rollups(db, updated_test_case)
+        forget_trends(project_key)
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=updated_test_case)
@@ -211,28 +253,32 @@ async def update_test_case_by_key(request: Request,
 
 @router.delete(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}",
                tags=[DB_COLLECTION_TC],
-               status_code=status.HTTP_204_NO_CONTENT)
+               status_code=status.HTTP_202_ACCEPTED)
 async def delete_test_case_by_key(request: Request,
                                   project_key: str,
                                   test_case_key: str):
-    """Delete a specific test case by its ID within the specified project."""
-
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # TODO: Check if test case is linked to any test executions
+    """Delete a specific test case by its ID within the specified project,
+       its executions are deleted by a background job.
+    """
 
     # Delete the test case from project from the database
     db = request.app.state.db
-    await db.delete_one(DB_COLLECTION_TC,
-                        {"test_case_key": test_case_key,
-                         "project_key": project_key})
+    test_case = await get_test_case(db, project_key, test_case_key, fields=FOLDER_FIELDS)
+    result, deleted_count = await db.delete_one(DB_COLLECTION_TC,
+                                                {"_id": test_case_key,
+                                                 "project_key": project_key})
+    if deleted_count == 0:
+        return JSONResponse(
+            status_code=status.HTTP_404_NOT_FOUND,
+            content={"error": f"Test case {test_case_key} not found"})
+
+    await move_test_cases(db, [(test_case, None)])
+    forget_summary(project_key)
+
+    # Delete the executions of the test case in the background
+    job = await request.app.state.jobs.submit(JOB_KIND_DELETE_TEST_CASE, {"project_key": project_key,
+                                                                         "test_case_key": test_case_key})
 
-    return Response(status_code=status.HTTP_204_NO_CONTENT)
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
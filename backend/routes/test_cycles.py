@@ -7,10 +7,12 @@
 
 # routes/cycles.py
 
-import json
+from typing import Annotated
 
 from fastapi import (
     APIRouter,
+    Depends,
+    Query,
     Request,
     status,
     Response
@@ -20,43 +22,65 @@ from starlette.responses import JSONResponse
 from backend.app_def.app_def import (
     DB_COLLECTION_TE,
     DB_COLLECTION_TCY,
+    JOB_KIND_RECOMPUTE_CYCLE,
     API_VERSION
 )
+from backend.db.db import DuplicateKeyError
 from backend.models.test_cycles import (
     TestCycle,
     TestCycleCreate,
+    TestCycleExecutionsPage,
+    TestCycleExecutionsUpdate,
+    TestCyclePartial,
+    TestCycleSummary,
     TestCycleUpdate
-
 )
-from backend.routes.projects import get_project_by_key
-from backend.routes.test_executions import (
+from backend.models.test_executions import (
     TestExecution,
-    get_execution
+    TestExecutionPartial
+)
+from backend.routes.dependencies import (
+    resolve_cycle,
+    resolve_project
+)
+from backend.services.cycle_members import cycle_members_link
+from backend.services.summary import forget_summary
+from backend.services.test_cycles import (
+    attach_execution,
+    cycle_summary,
+    delete_cycle,
+    detach_execution,
+    find_cycle_executions,
+    update_cycle_executions
+)
+from backend.tools.pagination import (
+    PageParams,
+    find_page
+)
+from backend.tools.tools import (
+    get_current_utc_time,
+    parse_fields,
+    select_fields
 )
-from backend.tools.tools import get_current_utc_time
 
 router = APIRouter()
 
 
 @router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/cycles",
             tags=[DB_COLLECTION_TCY],
-            response_model=list[TestCycle])
+            response_model=list[TestCyclePartial])
 async def get_all_cycles_for_project(request: Request,
-                                     project_key: str):
+                                     project_key: str,
+                                     project: Annotated[dict, Depends(resolve_project)],
+                                     page: Annotated[PageParams, Query()]):
     """Get all test cycles for project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Retrieve all test cycles from the database matching project_key
-    db = request.app.state.db
-    test_cycles = await db.find(DB_COLLECTION_TCY,
-                                {"project_key": project_key})
-
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=test_cycles)
+    # Retrieve a page of test cycles from the database matching project_key
+    return await find_page(request,
+                           DB_COLLECTION_TCY,
+                           {"project_key": project_key},
+                           page,
+                           TestCycle)
 
 
 @router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/cycles",
@@ -65,26 +89,16 @@ async def get_all_cycles_for_project(request: Request,
              status_code=status.HTTP_201_CREATED)
 async def create_cycle_for_project(request: Request,
                                    project_key: str,
+                                   project: Annotated[dict, Depends(resolve_project)],
                                    cycle: TestCycleCreate):
     """Create a new test cycle for project."""
 
     current_time = get_current_utc_time()
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Prepare request data
+    # Prepare request data, initial executions are added as memberships
     request_data = cycle.model_dump()
     test_cycle_key = request_data["test_cycle_key"]
-
-    # Check if test_cycle already exists
-    response = await get_cycle_by_key(request, test_cycle_key)
-    if response.status_code != status.HTTP_404_NOT_FOUND:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"test cycle {test_cycle_key} already exists."})
+    executions = request_data.pop("executions")
 
     # Validate that test_case_key starts with project_key
     if not test_cycle_key.startswith(project_key):
@@ -97,41 +111,50 @@ async def create_cycle_for_project(request: Request,
     request_data["project_key"] = project_key
     request_data["created_at"] = current_time
     request_data["updated_at"] = current_time
+    request_data["result_counts"] = {}
 
     # Assign _id
     db_insert = TestCycle(**request_data).model_dump()
     db_insert["_id"] = test_cycle_key
 
-    # Create the test cycle in the database
+    # Check the initial executions exist before the cycle is created
     db = request.app.state.db
-    await db.create(DB_COLLECTION_TCY, db_insert)
+    found = await find_cycle_executions(db, executions)
+
+    # Create the test cycle in the database, the unique _id rejects duplicates
+    try:
+        await db.create(DB_COLLECTION_TCY, db_insert)
+
+    except DuplicateKeyError:
+        return JSONResponse(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            content={"error": f"test cycle {test_cycle_key} already exists."})
+
+    if executions:
+        await update_cycle_executions(db, test_cycle_key, executions, [], found)
+    forget_summary(project_key)
 
     return Response(status_code=status.HTTP_201_CREATED)
 
 
 @router.get(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}",
             tags=[DB_COLLECTION_TCY],
-            response_model=TestCycle)
+            response_model=TestCyclePartial)
 async def get_cycle_by_key(request: Request,
-                           test_cycle_key: str):
+                           test_cycle_key: str,
+                           cycle: Annotated[dict, Depends(resolve_cycle)],
+                           fields: str | None = None):
     """Get a specific test cycle by its ID."""
 
-    # Retrieve the test cycle from the database
-    db = request.app.state.db
-    result = await db.find_one(DB_COLLECTION_TCY,
-                               {"test_cycle_key": test_cycle_key})
+    try:
+        fields = parse_fields(fields, TestCycle)
 
-    if result is None:
-        # test case not found
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test cycle {test_cycle_key} not found"})
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
 
-    else:
-        # test case found
-        return JSONResponse(
-            status_code=status.HTTP_200_OK,
-            content=result)
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=select_fields(cycle, fields))
 
 
 @router.put(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}",
@@ -139,6 +162,7 @@ async def get_cycle_by_key(request: Request,
             response_model=TestCycle)
 async def update_cycle_by_key(request: Request,
                               test_cycle_key: str,
+                              test_cycle: Annotated[dict, Depends(resolve_cycle)],
                               cycle: TestCycleUpdate):
     """Update a specific test cycle by its ID."""
 
@@ -149,22 +173,20 @@ async def update_cycle_by_key(request: Request,
     request_data = {k: v for k, v in request_data.items() if v is not None}
     request_data["updated_at"] = current_time
 
-    # Update the cycle in the database
+    # Update the cycle in the database, returning the updated cycle
     db = request.app.state.db
-    result, matched_count = await db.update(
+    updated_test_cycle = await db.update_one_returning(
         DB_COLLECTION_TCY,
-        {"test_cycle_key": test_cycle_key},
+        {"_id": test_cycle_key},
         request_data)
 
-    if matched_count == 0:
+    if updated_test_cycle is None:
         return JSONResponse(
             status_code=status.HTTP_404_NOT_FOUND,
             content={"error": f"Test cycle {test_cycle_key} not found"})
 
-    # Retrieve the updated test case
-    updated_test_cycle = await db.find_one(
-        DB_COLLECTION_TCY,
-        {"test_cycle_key": test_cycle_key})
+    if "status" in request_data:
+        forget_summary(updated_test_cycle["project_key"])
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=updated_test_cycle)
@@ -174,37 +196,39 @@ async def update_cycle_by_key(request: Request,
                tags=[DB_COLLECTION_TCY],
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete_cycle_by_key(request: Request,
-                              test_cycle_key: str):
+                              test_cycle_key: str,
+                              cycle: Annotated[dict, Depends(resolve_cycle)]):
     """Delete a specific test cycle by its ID."""
 
-    # Delete the test_cycle from the database
+    # Delete the test_cycle and its memberships from the database
     db = request.app.state.db
-    result, deleted_count = await db.delete_one(
-        DB_COLLECTION_TCY,
-        {"test_cycle_key": test_cycle_key})
-
-    if deleted_count == 0:
-        # Test case not found
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test cycle {test_cycle_key} not found"})
+    await delete_cycle(db, test_cycle_key)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
 
 
 @router.get(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}/executions",
             tags=[DB_COLLECTION_TCY],
-            response_model=list[TestExecution])
+            response_model=list[TestExecutionPartial])
 async def get_cycle_executions(request: Request,
-                               test_cycle_key: str):
-    """Get all test executions associated with a specific test cycle."""
-
-    response = await get_cycle_by_key(request, test_cycle_key)
-    cycle_data = json.loads(response.body.decode())
-    cycle_executions = cycle_data.get("executions")
-
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=cycle_executions)
+                               test_cycle_key: str,
+                               cycle: Annotated[dict, Depends(resolve_cycle)],
+                               page: Annotated[TestCycleExecutionsPage, Query()]):
+    """Get a page of test executions in a specific test cycle,
+       optionally filtered by a comma separated list of results.
+    """
+
+    query = {}
+    if page.result:
+        query["result"] = {"$in": [r.strip() for r in page.result.split(",")]}
+
+    # Retrieve a page of executions joined through the cycle memberships
+    return await find_page(request,
+                           DB_COLLECTION_TE,
+                           query,
+                           page,
+                           TestExecution,
+                           link=cycle_members_link(test_cycle_key))
 
 
 @router.post(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}/executions",
@@ -212,43 +236,13 @@ async def get_cycle_executions(request: Request,
              status_code=status.HTTP_204_NO_CONTENT)
 async def add_execution_to_cycle(request: Request,
                                  test_cycle_key: str,
+                                 cycle: Annotated[dict, Depends(resolve_cycle)],
                                  execution_key: str):
     """Add a test execution to a specific test cycle."""
 
-    # Check cycle exists
-    response = await get_cycle_by_key(request, test_cycle_key)
-    cycle_data = json.loads(response.body.decode())
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check execution exists
-    response = await get_execution(request, execution_key)
-    execution_data = json.loads(response.body.decode())
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check execution not already in cycle
-    if execution_key in cycle_data["executions"]:
-        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
-                            content={"error": f"Execution {execution_key} "
-                                              f"already in cycle {test_cycle_key}"})
-
-    # Add execution to cycle
+    # Add execution to cycle, returning the updated cycle
     db = request.app.state.db
-    cycle_data["executions"].append(execution_key)
-    await db.update(DB_COLLECTION_TCY,
-                    {"test_cycle_key": test_cycle_key},
-                    cycle_data)
-
-    # Update execution cycle id
-    execution_data["test_cycle_key"] = test_cycle_key
-    await db.update(DB_COLLECTION_TE,
-                    {"execution_key": execution_key},
-                    execution_data)
-
-    # return updated cycle_data
-    response = await get_cycle_by_key(request, test_cycle_key)
-    cycle_data = json.loads(response.body.decode())
+    cycle_data = await attach_execution(db, test_cycle_key, execution_key)
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=cycle_data)
@@ -259,37 +253,61 @@ async def add_execution_to_cycle(request: Request,
                status_code=status.HTTP_204_NO_CONTENT)
 async def remove_executions_from_cycle(request: Request,
                                        test_cycle_key: str,
+                                       cycle: Annotated[dict, Depends(resolve_cycle)],
                                        execution_key: str):
     """Remove test executions from a specific test cycle."""
 
-    # Check cycle exists
-    response = await get_cycle_by_key(request, test_cycle_key)
-    cycle_data = json.loads(response.body.decode())
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
+    # Remove execution from cycle, returning the updated cycle
+    db = request.app.state.db
+    cycle_data = await detach_execution(db, test_cycle_key, execution_key)
 
-    # Check execution exists
-    response = await get_execution(request, execution_key)
-    execution_data = json.loads(response.body.decode())
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=cycle_data)
 
-    # remote execution to cycle
-    db = request.app.state.db
-    cycle_data["executions"] = [e for e in cycle_data["executions"] if e != execution_key]
-    await db.update(DB_COLLECTION_TCY,
-                    {"test_cycle_key": test_cycle_key},
-                    cycle_data)
 
-    # Update execution cycle id
-    execution_data["test_cycle_key"] = None
-    await db.update(DB_COLLECTION_TE,
-                    {"execution_key": execution_key},
-                    execution_data)
+@router.patch(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}/executions",
+              tags=[DB_COLLECTION_TCY],
+              response_model=TestCycle)
+async def update_executions_of_cycle(request: Request,
+                                     test_cycle_key: str,
+                                     cycle: Annotated[dict, Depends(resolve_cycle)],
+                                     executions: TestCycleExecutionsUpdate):
+    """Add and remove many test executions of a specific test cycle in one call."""
 
-    # return updated cycle_data
-    response = await get_cycle_by_key(request, test_cycle_key)
-    cycle_data = json.loads(response.body.decode())
+    # Apply membership changes, returning the updated cycle
+    db = request.app.state.db
+    cycle_data = await update_cycle_executions(db,
+                                               test_cycle_key,
+                                               executions.add,
+                                               executions.remove)
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=cycle_data)
+
+
+@router.get(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}/summary",
+            tags=[DB_COLLECTION_TCY],
+            response_model=TestCycleSummary)
+async def get_cycle_summary_by_key(request: Request,
+                                   test_cycle_key: str,
+                                   cycle: Annotated[dict, Depends(resolve_cycle)]):
+    """Get the execution result counts of a specific test cycle."""
+
+    # Read the counters maintained on the cycle
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=cycle_summary(cycle))
+
+
+@router.post(f"/api/{API_VERSION}/tm/cycles/{{test_cycle_key}}/summary/recompute",
+             tags=[DB_COLLECTION_TCY],
+             status_code=status.HTTP_202_ACCEPTED)
+async def recompute_cycle_summary(request: Request,
+                                  test_cycle_key: str,
+                                  cycle: Annotated[dict, Depends(resolve_cycle)]):
+    """Recount the execution results of a specific test cycle in the background, repairing its counters."""
+
+    job = await request.app.state.jobs.submit(JOB_KIND_RECOMPUTE_CYCLE, {"test_cycle_key": test_cycle_key})
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
@@ -7,8 +7,12 @@
 
 # routes/execution.py
 
+from typing import Annotated
+
 from fastapi import (
     APIRouter,
+    Depends,
+    Query,
     Request,
     status,
     Response
@@ -16,46 +20,66 @@ from fastapi import (
 from starlette.responses import JSONResponse
 
 from backend.app_def.app_def import (
+    DB_COLLECTION_TC,
     DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
     API_VERSION
 )
+from backend.db.db import DuplicateKeyError
 from backend.models.test_executions import (
     TestExecution,
+    TestExecutionBatchCreate,
+    TestExecutionBatchResult,
     TestExecutionCreate,
+    TestExecutionHistoryPage,
+    TestExecutionPartial,
     TestExecutionUpdate
 )
-from backend.routes.projects import get_project_by_key
-from backend.routes.test_cases import get_test_case_by_key
+from backend.routes.dependencies import (
+    resolve_execution,
+    resolve_project,
+    resolve_test_case
+)
+from backend.services.cycle_members import add_members
+from backend.services.rollups import move_executions
+from backend.services.test_cases import record_last_results
+from backend.services.test_executions import (
+    create_execution,
+    delete_execution as delete_execution_by_key,
+    delete_executions,
+    update_execution as update_execution_by_key
+)
+from backend.services.summary import forget_summary
+from backend.services.trends import forget_trends
+from backend.tools.pagination import (
+    PageParams,
+    find_page
+)
+from backend.tools.tools import (
+    parse_fields,
+    select_fields
+)
 
 router = APIRouter()
 
 
 @router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}/executions",
             tags=[DB_COLLECTION_TE],
-            response_model=list[TestExecution])
+            response_model=list[TestExecutionPartial])
 async def get_all_executions_for_test_case(request: Request,
                                            project_key: str,
-                                           test_case_key: str):
+                                           test_case_key: str,
+                                           test_case: Annotated[dict, Depends(resolve_test_case)],
+                                           page: Annotated[PageParams, Query()]):
     """Get all test executions for a specific test case within a project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Retrieve test execution matching project_key and test_case_key
-    db = request.app.state.db
-    test_executions = await db.find(DB_COLLECTION_TE,
-                                    {"project_key": project_key,
-                                     "test_case_key": test_case_key})
-
-    return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=test_executions)
+    # Retrieve a page of test executions matching project_key and test_case_key
+    return await find_page(request,
+                           DB_COLLECTION_TE,
+                           {"project_key": project_key,
+                            "test_case_key": test_case_key},
+                           page,
+                           TestExecution)
 
 
 @router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}/executions",
@@ -65,50 +89,139 @@ async def get_all_executions_for_test_case(request: Request,
 async def create_execution_for_test_case(request: Request,
                                          project_key: str,
                                          test_case_key: str,
+                                         test_case: Annotated[dict, Depends(resolve_test_case)],
                                          execution: TestExecutionCreate):
     """Create a new test execution for a specific test case within a project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
+    # Create the execution in the database
+    db = request.app.state.db
+    await create_execution(db,
+                           project_key,
+                           test_case_key,
+                           execution.model_dump())
 
-    # Prepare request data
-    request_data = execution.model_dump()
-    execution_key = request_data["execution_key"]
+    return Response(status_code=status.HTTP_201_CREATED)
 
-    # Validate execution_key starts with project_key
-    if not execution_key.startswith(project_key):
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"execution_key {execution_key} "
-                              f"does not belong to project {project_key}"})
 
-    # Check if execution_key already exists
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/executions",
+            tags=[DB_COLLECTION_TE],
+            response_model=list[TestExecutionPartial])
+async def get_execution_history(request: Request,
+                                project_key: str,
+                                project: Annotated[dict, Depends(resolve_project)],
+                                page: Annotated[TestExecutionHistoryPage, Query()]):
+    """Get the test executions of a project that ran within [from, to),
+       most recent first by default.
+    """
+
+    # Match the execution time range on the project_key, executed_at index
+    query = {"project_key": project_key}
+    executed_range = {op: value for op, value in (("$gte", page.from_), ("$lt", page.to)) if value is not None}
+    if executed_range:
+        query["executed_at"] = executed_range
+
+    return await find_page(request,
+                           DB_COLLECTION_TE,
+                           query,
+                           page,
+                           TestExecution)
+
+
+@router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/executions/batch",
+             tags=[DB_COLLECTION_TE],
+             response_model=list[TestExecutionBatchResult],
+             status_code=status.HTTP_201_CREATED)
+async def create_executions_batch(request: Request,
+                                  project_key: str,
+                                  project: Annotated[dict, Depends(resolve_project)],
+                                  executions: list[TestExecutionBatchCreate]):
+    """Create many test executions within a project in a single batch.
+       Returns 201 if all were created, otherwise 207 with per-item status.
+    """
+
+    # Retrieve all referenced test cases in one query
     db = request.app.state.db
-    result = await db.find_one(DB_COLLECTION_TE,
-                               {"execution_key": execution_key})
-    if result is not None:
-        return JSONResponse(
-            status_code=status.HTTP_400_BAD_REQUEST,
-            content={"error": f"execution_key {execution_key} "
-                              f"already exists."})
-
-    # Initialize missing keys
-    request_data["project_key"] = project_key
-    request_data["test_case_key"] = test_case_key
-
-    # Assign _id
-    db_insert = TestExecution(**request_data).model_dump()
-    db_insert["_id"] = execution_key
-    await db.create(DB_COLLECTION_TE, db_insert)
-
-    return Response(status_code=status.HTTP_201_CREATED)
+    test_case_keys = list({execution.test_case_key for execution in executions})
+    test_cases = await db.find(DB_COLLECTION_TC,
+                               {"_id": {"$in": test_case_keys},
+                                "project_key": project_key})
+    test_case_keys = {test_case["_id"] for test_case in test_cases}
+
+    # Retrieve all referenced test cycles in one query
+    test_cycle_keys = list({execution.test_cycle_key for execution in executions} - {None})
+    test_cycles = await db.find(DB_COLLECTION_TCY,
+                                {"_id": {"$in": test_cycle_keys}},
+                                fields=["_id"])
+    test_cycle_keys = {test_cycle["_id"] for test_cycle in test_cycles}
+
+    # Validate each execution, collecting the valid ones for insertion
+    results = []
+    db_inserts = []
+    positions = []
+    for execution in executions:
+        request_data = execution.model_dump()
+        execution_key = request_data["execution_key"]
+        test_case_key = request_data["test_case_key"]
+
+        if not execution_key.startswith(project_key):
+            results.append({"execution_key": execution_key,
+                            "status_code": status.HTTP_400_BAD_REQUEST,
+                            "error": f"execution_key {execution_key} "
+                                     f"does not belong to project {project_key}"})
+            continue
+
+        if test_case_key not in test_case_keys:
+            results.append({"execution_key": execution_key,
+                            "status_code": status.HTTP_404_NOT_FOUND,
+                            "error": f"Test case {test_case_key} not found"})
+            continue
+
+        test_cycle_key = request_data["test_cycle_key"]
+        if test_cycle_key is not None and test_cycle_key not in test_cycle_keys:
+            results.append({"execution_key": execution_key,
+                            "status_code": status.HTTP_404_NOT_FOUND,
+                            "error": f"Test cycle {test_cycle_key} not found"})
+            continue
+
+        # Assign _id
+        request_data["project_key"] = project_key
+        db_insert = TestExecution(**request_data).model_dump()
+        db_insert["_id"] = execution_key
+
+        positions.append(len(results))
+        db_inserts.append(db_insert)
+        results.append({"execution_key": execution_key,
+                        "status_code": status.HTTP_201_CREATED,
+                        "error": None})
+
+    # Insert unordered, duplicates are rejected by the unique _id
+    inserted_count, errors = await db.create_many(DB_COLLECTION_TE, db_inserts)
+    for index, error in errors.items():
+        result = results[positions[index]]
+        result["status_code"] = status.HTTP_400_BAD_REQUEST
+        if isinstance(error, DuplicateKeyError):
+            result["error"] = f"execution_key {result['execution_key']} already exists."
+        else:
+            result["error"] = str(error)
+
+    # Add executions created in a test cycle to its members
+    inserted = [db_insert for index, db_insert in enumerate(db_inserts) if index not in errors]
+    await add_members(db, [(db_insert["test_cycle_key"], db_insert)
+                           for db_insert in inserted
+                           if db_insert["test_cycle_key"] is not None])
+
+    # Record the latest inserted execution of each test case as its last result
+    await record_last_results(db, inserted)
+    await move_executions(db, [(None, db_insert) for db_insert in inserted])
+    forget_trends(project_key, [db_insert["executed_at"] for db_insert in inserted])
+    forget_summary(project_key)
+
+    if inserted_count == len(results):
+        return JSONResponse(status_code=status.HTTP_201_CREATED,
+                            content=results)
+
+    return JSONResponse(status_code=status.HTTP_207_MULTI_STATUS,
+                        content=results)
 
 
 @router.delete(f"/api/{API_VERSION}/tm/projects/{{project_key}}/test-cases/{{test_case_key}}/executions",
@@ -116,22 +229,13 @@ async def create_execution_for_test_case(request: Request,
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete_all_execution_for_test_case(request: Request,
                                              project_key: str,
-                                             test_case_key: str):
+                                             test_case_key: str,
+                                             test_case: Annotated[dict, Depends(resolve_test_case)]):
     """Delete all test executions for a specific test case within a project."""
 
-    # Check project exists
-    response = await get_project_by_key(request, project_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
-    # Check if test_case_key exists
-    response = await get_test_case_by_key(request, project_key, test_case_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
     # delete all test executions for the specified test case
     db = request.app.state.db
-    result, deleted_count = await db.delete(DB_COLLECTION_TE,
+    deleted_count = await delete_executions(db,
                                             {"project_key": project_key,
                                              "test_case_key": test_case_key})
     if deleted_count == 0:
@@ -145,23 +249,22 @@ async def delete_all_execution_for_test_case(request: Request,
 
 @router.get(f"/api/{API_VERSION}/tm/executions/{{execution_key}}",
             tags=[DB_COLLECTION_TE],
-            response_model=TestExecution)
+            response_model=TestExecutionPartial)
 async def get_execution(request: Request,
-                        execution_key: str):
+                        execution_key: str,
+                        test_execution: Annotated[dict, Depends(resolve_execution)],
+                        fields: str | None = None):
     """Retrieve a specific test execution by its ID."""
 
-    # Retrieve test execution from database
-    db = request.app.state.db
-    test_execution = await db.find_one(DB_COLLECTION_TE,
-                                       {"execution_key": execution_key})
-    if test_execution is None:
-        # test execution not found
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test execution {execution_key} not found"})
+    try:
+        fields = parse_fields(fields, TestExecution)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
 
     return JSONResponse(status_code=status.HTTP_200_OK,
-                        content=test_execution)
+                        content=select_fields(test_execution, fields))
 
 
 @router.put(f"/api/{API_VERSION}/tm/executions/{{execution_key}}",
@@ -169,34 +272,19 @@ async def get_execution(request: Request,
             response_model=TestExecutionUpdate)
 async def update_execution(request: Request,
                            execution_key: str,
+                           test_execution: Annotated[dict, Depends(resolve_execution)],
                            execution: TestExecutionUpdate):
     """Update a specific test execution by its ID."""
 
-    # Check execution exists
-    response = await get_execution(request, execution_key)
-    if response.status_code == status.HTTP_404_NOT_FOUND:
-        return response
-
     # Prepare request data, excluding None values
     request_data = execution.model_dump()
     request_data = {k: v for k, v in request_data.items() if v is not None}
 
-    # Update the execution in the database
+    # Update the execution in the database, returning the updated execution
     db = request.app.state.db
-    result, matched_count = await db.update(
-        DB_COLLECTION_TE,
-        {"execution_key": execution_key},
-        request_data)
-
-    if matched_count == 0:
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test execution {execution_key} not found"})
-
-    # Retrieve the updated test case
-    updated_test_execution = await db.find_one(
-        DB_COLLECTION_TE,
-        {"execution_key": execution_key})
+    updated_test_execution = await update_execution_by_key(db,
+                                                           execution_key,
+                                                           request_data)
 
     return JSONResponse(status_code=status.HTTP_200_OK,
                         content=updated_test_execution)
@@ -206,19 +294,12 @@ async def update_execution(request: Request,
                tags=[DB_COLLECTION_TE],
                status_code=status.HTTP_204_NO_CONTENT)
 async def delete_execution(request: Request,
-                           execution_key: str):
+                           execution_key: str,
+                           test_execution: Annotated[dict, Depends(resolve_execution)]):
     """Delete a specific test execution by its ID."""
 
-    # Delete the project from the database
+    # Delete the execution from the database
     db = request.app.state.db
-    result, deleted_count = await db.delete_one(
-        DB_COLLECTION_TE,
-        {"execution_key": execution_key})
-
-    if deleted_count == 0:
-        # Test execution not found
-        return JSONResponse(
-            status_code=status.HTTP_404_NOT_FOUND,
-            content={"error": f"Test execution {execution_key} not found"})
+    await delete_execution_by_key(db, execution_key)
 
     return Response(status_code=status.HTTP_204_NO_CONTENT)
@@ -0,0 +1,92 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# routes/trends.py
+
+from typing import Annotated
+
+from fastapi import (
+    APIRouter,
+    Depends,
+    Query,
+    Request,
+    status
+)
+from starlette.responses import JSONResponse
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TE,
+    DB_COLLECTION_RLP,
+    JOB_KIND_REBUILD_ROLLUPS,
+    API_VERSION
+)
+from backend.models.flaky import (
+    FlakyParams,
+    FlakyTestCase
+)
+from backend.models.trends import (
+    TrendParams,
+    TrendPoint
+)
+from backend.routes.dependencies import resolve_project
+from backend.services.flaky import flaky_test_cases
+from backend.services.trends import project_trends
+
+router = APIRouter()
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/trends",
+            tags=[DB_COLLECTION_TE],
+            response_model=list[TrendPoint],
+            status_code=status.HTTP_200_OK)
+async def get_trends_by_project(request: Request,
+                                project_key: str,
+                                project: Annotated[dict, Depends(resolve_project)],
+                                trend: Annotated[TrendParams, Query()]):
+    """Get the execution results and pass rate of a project per UTC day or week,
+       for the last buckets up to the current one, optionally per folder or priority.
+    """
+
+    db = request.app.state.db
+    points = await project_trends(db, project_key, trend.bucket, trend.group_by, trend.buckets)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=points)
+
+
+@router.get(f"/api/{API_VERSION}/tm/projects/{{project_key}}/flaky",
+            tags=[DB_COLLECTION_TE],
+            response_model=list[FlakyTestCase],
+            status_code=status.HTTP_200_OK)
+async def get_flaky_test_cases_by_project(request: Request,
+                                          project_key: str,
+                                          project: Annotated[dict, Depends(resolve_project)],
+                                          flaky: Annotated[FlakyParams, Query()]):
+    """Get the test cases of a project whose result flips between pass and fail
+       over their last window executions, with failure rates and streaks.
+    """
+
+    db = request.app.state.db
+    test_cases = await flaky_test_cases(db, project_key, flaky.window, flaky.limit)
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=test_cases)
+
+
+@router.post(f"/api/{API_VERSION}/tm/projects/{{project_key}}/rollups/rebuild",
+             tags=[DB_COLLECTION_RLP],
+             status_code=status.HTTP_202_ACCEPTED)
+async def rebuild_rollups_by_project(request: Request,
+                                     project_key: str,
+                                     project: Annotated[dict, Depends(resolve_project)]):
+    """Recount the daily execution rollups of a project in the background"""
+
+    job = await request.app.state.jobs.submit(JOB_KIND_REBUILD_ROLLUPS, {"project_key": project_key})
+
+    return JSONResponse(status_code=status.HTTP_202_ACCEPTED,
+                        content=job,
+                        headers={"Location": f"/api/{API_VERSION}/tm/jobs/{job['_id']}"})
@@ -0,0 +1,200 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/cascade.py
+
+import asyncio
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    DB_COLLECTION_FLD,
+    DB_COLLECTION_RLP,
+    DELETE_BATCH_SIZE
+)
+from backend.db.db import DatabaseClient
+from backend.services.cycle_members import remove_members
+from backend.services.jobs import set_job_progress
+from backend.services.summary import forget_summary
+from backend.services.trends import forget_trends
+
+
+async def delete_in_batches(db: DatabaseClient,
+                            table: str,
+                            query: dict,
+                            job_id: str,
+                            progress: dict,
+                            batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """ Delete the documents matching query a batch at a time, reading their
+        _id from a single cursor and recording progress between batches.
+        Returns the number of documents deleted.
+    """
+
+    total = 0
+    batch = []
+    async for doc in db.find_iter(table, query, batch_size=batch_size, fields=["_id"]):
+        batch.append(doc["_id"])
+        if len(batch) >= batch_size:
+            total, batch = total + await delete_batch(db, table, batch, job_id, progress), []
+
+    if batch:
+        total += await delete_batch(db, table, batch, job_id, progress)
+
+    return total
+
+
+async def delete_batch(db: DatabaseClient,
+                       table: str,
+                       keys: list,
+                       job_id: str,
+                       progress: dict) -> int:
+    """ Delete one batch of documents by _id and record the job progress. """
+
+    result, deleted_count = await db.delete(table, {"_id": {"$in": keys}})
+    progress[table] = progress.get(table, 0) + deleted_count
+    await set_job_progress(db, job_id, progress)
+    await asyncio.sleep(0)
+
+    return deleted_count
+
+
+async def remove_members_in_batches(db: DatabaseClient,
+                                    query: dict,
+                                    job_id: str,
+                                    progress: dict,
+                                    batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """ Remove the cycle memberships matching query a batch at a time,
+        uncounting their executions from the cycles they were in.
+        Returns the number of memberships removed.
+    """
+
+    total = 0
+    batch = []
+    async for member in db.find_iter(DB_COLLECTION_TCM, query, batch_size=batch_size, fields=["execution_key"]):
+        batch.append(member)
+        if len(batch) >= batch_size:
+            total, batch = total + await remove_batch(db, batch, job_id, progress), []
+
+    if batch:
+        total += await remove_batch(db, batch, job_id, progress)
+
+    return total
+
+
+async def remove_batch(db: DatabaseClient,
+                       members: list,
+                       job_id: str,
+                       progress: dict) -> int:
+    """ Remove one batch of cycle memberships and record the job progress. """
+
+    execution_keys = list({member["execution_key"] for member in members})
+    executions = await db.find(DB_COLLECTION_TE, {"_id": {"$in": execution_keys}}, fields=["result"])
+    results = dict.fromkeys(execution_keys)
+    results.update((execution["_id"], execution.get("result")) for execution in executions)
+
+    removed_count = await remove_members(db, {"_id": {"$in": [member["_id"] for member in members]}}, results)
+    progress[DB_COLLECTION_TCM] = progress.get(DB_COLLECTION_TCM, 0) + removed_count
+    await set_job_progress(db, job_id, progress)
+    await asyncio.sleep(0)
+
+    return removed_count
+
+
+async def delete_executions_in_batches(db: DatabaseClient,
+                                      query: dict,
+                                      job_id: str,
+                                      progress: dict,
+                                      batch_size: int = DELETE_BATCH_SIZE) -> int:
+    """ Delete the test executions matching query a batch at a time with
+        their cycle memberships, uncounting them from the cycles they were in.
+        Returns the number of executions deleted.
+    """
+
+    total = 0
+    batch = []
+    async for execution in db.find_iter(DB_COLLECTION_TE, query, batch_size=batch_size, fields=["result"]):
+        batch.append(execution)
+        if len(batch) >= batch_size:
+            total, batch = total + await delete_executions_batch(db, batch, job_id, progress), []
+
+    if batch:
+        total += await delete_executions_batch(db, batch, job_id, progress)
+
+    return total
+
+
+async def delete_executions_batch(db: DatabaseClient,
+                                  executions: list,
+                                  job_id: str,
+                                  progress: dict) -> int:
+    """ Delete one batch of test executions with their cycle memberships. """
+
+    execution_keys = [execution["_id"] for execution in executions]
+    removed_count = await remove_members(db,
+                                         {"execution_key": {"$in": execution_keys}},
+                                         {execution["_id"]: execution.get("result") for execution in executions})
+    progress[DB_COLLECTION_TCM] = progress.get(DB_COLLECTION_TCM, 0) + removed_count
+
+    return await delete_batch(db, DB_COLLECTION_TE, execution_keys, job_id, progress)
+
+
+async def purge_project(db: DatabaseClient,
+                        project_key: str,
+                        job_id: str) -> None:
+    """ Delete a tombstoned project and everything it owns, children first
+        so a failed job can be rerun without orphaning documents.
+    """
+
+    progress = {}
+    query = {"project_key": project_key}
+    await remove_members_in_batches(db, query, job_id, progress)
+    for table in (DB_COLLECTION_TE, DB_COLLECTION_TC, DB_COLLECTION_FLD, DB_COLLECTION_RLP):
+        await delete_in_batches(db, table, query, job_id, progress)
+
+    # Cycles may still hold executions of other projects
+    async for cycle in db.find_iter(DB_COLLECTION_TCY, query, fields=["_id"]):
+        await delete_in_batches(db, DB_COLLECTION_TCM, {"test_cycle_key": cycle["_id"]}, job_id, progress)
+    await delete_in_batches(db, DB_COLLECTION_TCY, query, job_id, progress)
+
+    await db.delete(DB_COLLECTION_PRJ, {"_id": project_key})
+    forget_trends(project_key)
+    forget_summary(project_key)
+
+
+async def purge_test_cases(db: DatabaseClient,
+                           project_key: str,
+                           job_id: str) -> None:
+    """ Delete all test cases of a project with their executions, folders
+        and rollups, uncounting the executions from the cycles they were in.
+    """
+
+    progress = {}
+    query = {"project_key": project_key}
+    await remove_members_in_batches(db, query, job_id, progress)
+    for table in (DB_COLLECTION_TE, DB_COLLECTION_TC, DB_COLLECTION_FLD, DB_COLLECTION_RLP):
+        await delete_in_batches(db, table, query, job_id, progress)
+    forget_trends(project_key)
+    forget_summary(project_key)
+
+
+async def purge_test_case(db: DatabaseClient,
+                          project_key: str,
+                          test_case_key: str,
+                          job_id: str) -> None:
+    """ Delete the executions and rollups of a deleted test case,
+        uncounting the executions from the cycles they were in.
+    """
+
+    progress = {}
+    query = {"project_key": project_key, "test_case_key": test_case_key}
+    await delete_executions_in_batches(db, query, job_id, progress)
+    await delete_in_batches(db, DB_COLLECTION_RLP, query, job_id, progress)
+    forget_trends(project_key)
+    forget_summary(project_key)
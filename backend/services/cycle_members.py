@@ -0,0 +1,132 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/cycle_members.py
+
+from collections import Counter, defaultdict
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    RESULT_NONE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DuplicateKeyError
+)
+from backend.models.test_cycles import TestCycleMember
+from backend.tools.tools import get_current_utc_time
+
+
+def result_key(result: str | None) -> str:
+    """ Get the counter key of an execution result. """
+
+    return RESULT_NONE if result is None else result
+
+
+def cycle_member(test_cycle_key: str,
+                 execution: dict,
+                 added_at: str) -> dict:
+    """ Build the membership record of an execution in a test cycle.
+        The _id is derived from both keys so a repeated add is a duplicate.
+    """
+
+    member = TestCycleMember(test_cycle_key=test_cycle_key,
+                             execution_key=execution["_id"],
+                             project_key=execution["project_key"],
+                             added_at=added_at).model_dump()
+    member["_id"] = f"{test_cycle_key}/{execution['_id']}"
+
+    return member
+
+
+def cycle_members_link(test_cycle_key: str) -> tuple:
+    """ Get the link joining a test cycle to its executions, for find_page. """
+
+    return DB_COLLECTION_TCM, {"test_cycle_key": test_cycle_key}, "execution_key"
+
+
+async def inc_cycle_results(db: DatabaseClient,
+                            deltas: dict) -> None:
+    """ Apply test cycle key -> Counter of result deltas to the cycle
+        result counters, one $inc per cycle in a single batch.
+    """
+
+    operations = []
+    for test_cycle_key, counter in deltas.items():
+        inc = {f"result_counts.{result}": delta for result, delta in counter.items() if delta}
+        if inc:
+            operations.append(("update_one", {"_id": test_cycle_key}, {"$inc": inc}))
+
+    await db.bulk_write(DB_COLLECTION_TCY, operations)
+
+
+async def add_members(db: DatabaseClient,
+                      pairs: list) -> list:
+    """ Add (test_cycle_key, execution) memberships unordered, counting the
+        execution results of those inserted. Executions need _id, project_key
+        and result. Returns the pairs inserted, existing members are skipped.
+    """
+
+    added_at = get_current_utc_time()
+    inserted_count, errors = await db.create_many(DB_COLLECTION_TCM,
+                                                  [cycle_member(test_cycle_key, execution, added_at)
+                                                   for test_cycle_key, execution in pairs])
+    for error in errors.values():
+        if not isinstance(error, DuplicateKeyError):
+            raise error
+
+    inserted = [pair for index, pair in enumerate(pairs) if index not in errors]
+    deltas = defaultdict(Counter)
+    for test_cycle_key, execution in inserted:
+        deltas[test_cycle_key][result_key(execution.get("result"))] += 1
+    await inc_cycle_results(db, deltas)
+
+    return inserted
+
+
+async def remove_members(db: DatabaseClient,
+                         query: dict,
+                         results: dict) -> int:
+    """ Remove the memberships matching query, uncounting their executions.
+        Results maps each execution key that may be removed to its result.
+        Returns the number of memberships removed.
+    """
+
+    members = await db.find(DB_COLLECTION_TCM, query, fields=["test_cycle_key", "execution_key"])
+    groups = defaultdict(list)
+    for member in members:
+        groups[(member["test_cycle_key"], result_key(results[member["execution_key"]]))].append(member["_id"])
+
+    # Uncount only what this delete removed, a concurrent removal of the
+    # same memberships is uncounted by whichever call deleted them
+    deltas = defaultdict(Counter)
+    removed_count = 0
+    for (test_cycle_key, result), member_keys in groups.items():
+        _, deleted_count = await db.delete(DB_COLLECTION_TCM, {"_id": {"$in": member_keys}})
+        deltas[test_cycle_key][result] -= deleted_count
+        removed_count += deleted_count
+    await inc_cycle_results(db, deltas)
+
+    return removed_count
+
+
+async def move_results(db: DatabaseClient,
+                       execution_key: str,
+                       before: str | None,
+                       after: str | None) -> None:
+    """ Move an execution between result counters of every cycle it is in. """
+
+    if before == after:
+        return
+
+    members = await db.find(DB_COLLECTION_TCM, {"execution_key": execution_key}, fields=["test_cycle_key"])
+    deltas = defaultdict(Counter)
+    for member in members:
+        deltas[member["test_cycle_key"]][result_key(before)] -= 1
+        deltas[member["test_cycle_key"]][result_key(after)] += 1
+    await inc_cycle_results(db, deltas)
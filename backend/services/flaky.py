@@ -0,0 +1,119 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/flaky.py
+
+import numpy as np
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TE,
+    RESULT_FAIL,
+    RESULT_PASS
+)
+from backend.db.db import DatabaseClient
+
+
+async def load_history(db: DatabaseClient,
+                       project_key: str,
+                       window: int) -> tuple:
+    """ Load the last window passed and failed dated executions of each test
+        case of a project, ordered by test case then time, as the test case
+        keys, an array of test case codes indexing them and an array of
+        failed flags.
+    """
+
+    # Only the last window executions of each test case leave the database
+    executions = await db.find_latest(DB_COLLECTION_TE,
+                                      {"project_key": project_key,
+                                       "executed_at": {"$ne": None},
+                                       "result": {"$in": [RESULT_PASS, RESULT_FAIL]}},
+                                      "test_case_key",
+                                      [("executed_at", 1)],
+                                      window,
+                                      fields=["test_case_key", "result"])
+
+    keys = []
+    codes = np.empty(len(executions), dtype=np.int64)
+    failed = np.empty(len(executions), dtype=bool)
+    for index, execution in enumerate(executions):
+        if not keys or keys[-1] != execution["test_case_key"]:
+            keys.append(execution["test_case_key"])
+        codes[index] = len(keys) - 1
+        failed[index] = execution["result"] == RESULT_FAIL
+
+    return keys, codes, failed
+
+
+def score_history(codes: np.ndarray,
+                  failed: np.ndarray,
+                  window: int) -> dict:
+    """ Score the last window results of each test case, vectorized over all
+        test cases. Codes number the test cases from 0 in ascending order,
+        the results of each are ordered oldest first. Returns arrays of
+        scores indexed by code.
+    """
+
+    groups = int(codes[-1]) + 1 if len(codes) else 0
+    counts = np.bincount(codes, minlength=groups)
+    starts = np.cumsum(counts) - counts
+
+    # Keep the last window results of each test case
+    position = np.arange(len(codes)) - starts[codes]
+    recent = position >= (counts - window)[codes]
+    codes, failed = codes[recent], failed[recent]
+
+    runs = np.bincount(codes, minlength=groups)
+    failures = np.bincount(codes, weights=failed, minlength=groups)
+    same = codes[1:] == codes[:-1]
+    flipped = same & (failed[1:] != failed[:-1])
+    flips = np.bincount(codes[1:][flipped], minlength=groups)
+
+    # Streaks are runs of equal results within a test case
+    run_starts = np.r_[True, ~same | (failed[1:] != failed[:-1])]
+    run_lengths = np.diff(np.r_[np.flatnonzero(run_starts), len(codes)])
+    run_codes, run_failed = codes[run_starts], failed[run_starts]
+    longest_fail_streak = np.zeros(groups, dtype=np.int64)
+    np.maximum.at(longest_fail_streak, run_codes[run_failed], run_lengths[run_failed])
+    last_runs = np.r_[run_codes[1:] != run_codes[:-1], True]
+
+    return {"runs": runs,
+            "flips": flips,
+            "flip_rate": flips / np.maximum(runs - 1, 1),
+            "failure_rate": failures / runs,
+            "longest_fail_streak": longest_fail_streak,
+            "current_streak": run_lengths[last_runs],
+            "current_failed": run_failed[last_runs]}
+
+
+async def flaky_test_cases(db: DatabaseClient,
+                           project_key: str,
+                           window: int,
+                           limit: int) -> list:
+    """ Get the test cases of a project whose result flipped between pass
+        and fail within their last window executions, most flips first.
+    """
+
+    keys, codes, failed = await load_history(db, project_key, window)
+    if not keys:
+        return []
+
+    # Highest flip rate first, then failure rate, codes follow key order
+    scores = score_history(codes, failed, window)
+    flaky = np.flatnonzero(scores["flips"] > 0)
+    order = np.lexsort((flaky,
+                        -scores["failure_rate"][flaky],
+                        -scores["flip_rate"][flaky]))
+
+    return [{"test_case_key": keys[index],
+             "runs": int(scores["runs"][index]),
+             "flips": int(scores["flips"][index]),
+             "flip_rate": float(scores["flip_rate"][index]),
+             "failure_rate": float(scores["failure_rate"][index]),
+             "longest_fail_streak": int(scores["longest_fail_streak"][index]),
+             "current_streak": int(scores["current_streak"][index]),
+             "current_result": RESULT_FAIL if scores["current_failed"][index] else RESULT_PASS}
+            for index in flaky[order[:limit]]]
@@ -0,0 +1,214 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/folders.py
+
+from collections import Counter, defaultdict
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TC,
+    DB_COLLECTION_FLD,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DuplicateKeyError
+)
+from backend.models.folders import Folder
+from backend.services.cycle_members import result_key
+from backend.tools.errors import NotFoundError
+
+# Test case fields a folder rollup depends on
+FOLDER_FIELDS = ["project_key", "folder", "last_result"]
+
+
+def folder_path(folder: str | None) -> str | None:
+    """ Normalize a test case folder into a path of non empty segments. """
+
+    if not folder:
+        return None
+
+    return "/".join(segment.strip() for segment in folder.split("/") if segment.strip()) or None
+
+
+def ancestor_paths(path: str) -> list:
+    """ Get the paths from the top level folder down to path. """
+
+    segments = path.split("/")
+
+    return ["/".join(segments[:depth]) for depth in range(1, len(segments) + 1)]
+
+
+def folder_id(project_key: str,
+              path: str) -> str:
+    """ Get the _id of a folder node. """
+
+    return f"{project_key}/{path}"
+
+
+def folder_node(project_key: str,
+                path: str) -> dict:
+    """ Build an empty folder node. """
+
+    segments = path.split("/")
+    node = Folder(project_key=project_key,
+                  path=path,
+                  parent="/".join(segments[:-1]) or None,
+                  name=segments[-1],
+                  depth=len(segments),
+                  total=0,
+                  direct=0,
+                  results={}).model_dump()
+    node["_id"] = folder_id(project_key, path)
+
+    return node
+
+
+def add_test_case(deltas: dict,
+                  test_case: dict,
+                  sign: int) -> None:
+    """ Add (sign 1) or remove (sign -1) a test case from the folder deltas.
+        It counts towards the total and last result rollup of every folder
+        up to the top level, and the direct count of its own folder.
+    """
+
+    path = folder_path(test_case.get("folder"))
+    if path is None:
+        return
+
+    project_key = test_case["project_key"]
+    result = result_key(test_case.get("last_result"))
+    for ancestor in ancestor_paths(path):
+        deltas[(project_key, ancestor)]["total"] += sign
+        deltas[(project_key, ancestor)][f"results.{result}"] += sign
+    deltas[(project_key, path)]["direct"] += sign
+
+
+async def inc_folders(db: DatabaseClient,
+                      deltas: dict) -> None:
+    """ Apply (project_key, path) -> Counter of field deltas to the folder
+        index, creating folders that gain test cases and dropping emptied ones.
+    """
+
+    incs = {}
+    for key, counter in deltas.items():
+        inc = {field: delta for field, delta in counter.items() if delta}
+        if inc:
+            incs[key] = inc
+
+    if not incs:
+        return
+
+    # Create missing folders, existing ones are rejected as duplicates
+    inserted_count, errors = await db.create_many(DB_COLLECTION_FLD,
+                                                  [folder_node(*key) for key, inc in incs.items()
+                                                   if inc.get("total", 0) > 0])
+    for error in errors.values():
+        if not isinstance(error, DuplicateKeyError):
+            raise error
+
+    await db.bulk_write(DB_COLLECTION_FLD,
+                        [("update_one", {"_id": folder_id(*key)}, {"$inc": inc})
+                         for key, inc in incs.items()])
+
+    emptied = [folder_id(*key) for key, inc in incs.items() if inc.get("total", 0) < 0]
+    if emptied:
+        await db.delete(DB_COLLECTION_FLD, {"_id": {"$in": emptied}, "total": {"$lte": 0}})
+
+
+async def move_test_cases(db: DatabaseClient,
+                          changes: list) -> None:
+    """ Apply (before, after) test case changes to the folder index, either
+        side None for a created or deleted test case. Test cases need the
+        FOLDER_FIELDS.
+    """
+
+    deltas = defaultdict(Counter)
+    for before, after in changes:
+        if before is not None:
+            add_test_case(deltas, before, -1)
+        if after is not None:
+            add_test_case(deltas, after, 1)
+
+    await inc_folders(db, deltas)
+
+
+async def rebuild_folders(db: DatabaseClient,
+                          project_key: str,
+                          batch_size: int = STREAM_BATCH_SIZE) -> int:
+    """ Recount the folder index of a project from its test cases,
+        replacing counters that drifted from concurrent writes.
+        Memory grows with the number of folders, not test cases.
+        Returns the number of folders.
+    """
+
+    deltas = defaultdict(Counter)
+    async for test_case in db.find_iter(DB_COLLECTION_TC, {"project_key": project_key},
+                                        batch_size=batch_size, fields=FOLDER_FIELDS):
+        add_test_case(deltas, test_case, 1)
+
+    nodes = []
+    for key, counter in deltas.items():
+        node = folder_node(*key)
+        node["total"] = counter["total"]
+        node["direct"] = counter["direct"]
+        node["results"] = {field.split(".", 1)[1]: count for field, count in counter.items()
+                           if field.startswith("results.") and count}
+        nodes.append(node)
+
+    await db.delete(DB_COLLECTION_FLD, {"project_key": project_key})
+    for start in range(0, len(nodes), batch_size):
+        await db.create_many(DB_COLLECTION_FLD, nodes[start:start + batch_size])
+
+    return len(nodes)
+
+
+async def folder_tree(db: DatabaseClient,
+                      project_key: str,
+                      parent: str | None = None,
+                      depth: int = 1) -> list:
+    """ Get the folders below parent, or the top level folders, nested
+        depth levels deep. Folders beyond the last level have children
+        None, to be expanded by a request for their own subtree.
+    """
+
+    query = {"project_key": project_key}
+    base_depth = 0
+    parent = folder_path(parent)
+    if parent is not None:
+        node = await db.find_one(DB_COLLECTION_FLD, {"_id": folder_id(project_key, parent)},
+                                 fields=["depth"])
+        if node is None:
+            raise NotFoundError(f"Folder {parent} not found")
+
+        base_depth = node["depth"]
+        query["path"] = {"$gte": f"{parent}/", "$lt": f"{parent}0"}
+
+    query["depth"] = {"$lte": base_depth + depth}
+    nodes = await db.find(DB_COLLECTION_FLD, query, sort=[("path", 1)])
+
+    tree = []
+    by_path = {}
+    for node in sorted(nodes, key=lambda node: (node["depth"], node["path"])):
+        if node["total"] <= 0:
+            continue
+
+        item = {"path": node["path"],
+                "name": node["name"],
+                "total": node["total"],
+                "direct": node["direct"],
+                "results": {result: count for result, count in (node["results"] or {}).items() if count},
+                "has_children": node["total"] > node["direct"],
+                "children": [] if node["depth"] < base_depth + depth else None}
+        by_path[node["path"]] = item
+
+        if node["depth"] == base_depth + 1:
+            tree.append(item)
+        elif node["parent"] in by_path:
+            by_path[node["parent"]]["children"].append(item)
+
+    return tree
@@ -0,0 +1,105 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/job_handlers.py
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_JOB,
+    JOB_KIND_RESET,
+    JOB_KIND_DELETE_PROJECT,
+    JOB_KIND_DELETE_TEST_CASES,
+    JOB_KIND_DELETE_TEST_CASE,
+    JOB_KIND_REBUILD_FOLDERS,
+    JOB_KIND_REBUILD_ROLLUPS,
+    JOB_KIND_RECOMPUTE_CYCLE
+)
+from backend.db.db import DatabaseClient
+from backend.services.cascade import (
+    purge_project,
+    purge_test_case,
+    purge_test_cases
+)
+from backend.services.folders import rebuild_folders
+from backend.services.projects import restore_project
+from backend.services.rollups import rebuild_rollups
+from backend.services.summary import clear_summaries
+from backend.services.test_cycles import recompute_cycle_results
+from backend.services.trends import clear_trends
+
+
+async def reset_database(db: DatabaseClient,
+                         job: dict) -> None:
+    """ Drop all data, keeping only the record of this job. """
+
+    await db.configure(clean_db=True, keep=[DB_COLLECTION_JOB])
+    await db.delete(DB_COLLECTION_JOB, {"_id": {"$ne": job["_id"]}})
+    clear_summaries()
+    clear_trends()
+
+
+async def delete_project(db: DatabaseClient,
+                         job: dict) -> None:
+    """ Delete a tombstoned project and everything it owns. """
+
+    await purge_project(db, job["params"]["project_key"], job["_id"])
+
+
+async def cancel_delete_project(db: DatabaseClient,
+                                job: dict) -> None:
+    """ Show what remains of a project whose deletion was cancelled. """
+
+    await restore_project(db, job["params"]["project_key"])
+
+
+async def delete_test_cases(db: DatabaseClient,
+                            job: dict) -> None:
+    """ Delete all test cases of a project with their executions. """
+
+    await purge_test_cases(db, job["params"]["project_key"], job["_id"])
+
+
+async def delete_test_case(db: DatabaseClient,
+                           job: dict) -> None:
+    """ Delete the executions of a deleted test case. """
+
+    await purge_test_case(db, job["params"]["project_key"], job["params"]["test_case_key"], job["_id"])
+
+
+async def rebuild_project_folders(db: DatabaseClient,
+                                  job: dict) -> None:
+    """ Recount the folder index of a project. """
+
+    await rebuild_folders(db, job["params"]["project_key"])
+
+
+async def rebuild_project_rollups(db: DatabaseClient,
+                                  job: dict) -> None:
+    """ Recount the daily execution rollups of a project. """
+
+    await rebuild_rollups(db, job["params"]["project_key"])
+
+
+async def recompute_cycle(db: DatabaseClient,
+                          job: dict) -> None:
+    """ Recount the execution results of a test cycle. """
+
+    await recompute_cycle_results(db, job["params"]["test_cycle_key"])
+
+
+JOB_HANDLERS = {
+    JOB_KIND_RESET: reset_database,
+    JOB_KIND_DELETE_PROJECT: delete_project,
+    JOB_KIND_DELETE_TEST_CASES: delete_test_cases,
+    JOB_KIND_DELETE_TEST_CASE: delete_test_case,
+    JOB_KIND_REBUILD_FOLDERS: rebuild_project_folders,
+    JOB_KIND_REBUILD_ROLLUPS: rebuild_project_rollups,
+    JOB_KIND_RECOMPUTE_CYCLE: recompute_cycle
+}
+
+JOB_CANCEL_HANDLERS = {
+    JOB_KIND_DELETE_PROJECT: cancel_delete_project
+}
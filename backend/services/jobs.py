@@ -0,0 +1,212 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/jobs.py
+
+import asyncio
+import logging
+import uuid
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_JOB,
+    JOB_PENDING,
+    JOB_RUNNING,
+    JOB_COMPLETED,
+    JOB_FAILED,
+    JOB_CANCELLED,
+    JOB_CONCURRENCY
+)
+from backend.db.db import DatabaseClient
+from backend.models.jobs import Job
+from backend.tools.errors import (
+    BadRequestError,
+    NotFoundError
+)
+from backend.tools.tools import get_current_utc_time
+
+logger = logging.getLogger(__name__)
+
+
+async def get_job(db: DatabaseClient,
+                  job_id: str) -> dict:
+    """ Get a job by id, raising NotFoundError if missing. """
+
+    job = await db.find_one(DB_COLLECTION_JOB, {"_id": job_id})
+    if job is None:
+        raise NotFoundError(f"Job {job_id} not found")
+
+    return job
+
+
+async def set_job_progress(db: DatabaseClient,
+                           job_id: str,
+                           progress: dict) -> None:
+    """ Record the progress counters of a running job. """
+
+    await db.update(DB_COLLECTION_JOB, {"_id": job_id}, {"progress": progress})
+
+
+class JobRunner:
+    """ Runs persisted jobs on a bounded pool of asyncio workers.
+        Handlers map a job kind to a coroutine function taking the
+        database client and the job, cancel handlers undo the partial
+        work of a job cancelled by the user.
+    """
+
+    def __init__(self,
+                 db: DatabaseClient,
+                 handlers: dict,
+                 cancel_handlers: dict | None = None,
+                 concurrency: int = JOB_CONCURRENCY):
+        self._db = db
+        self._handlers = handlers
+        self._cancel_handlers = cancel_handlers or {}
+        self._concurrency = concurrency
+        self._queue = asyncio.Queue()
+        self._workers = []
+        self._running = {}
+        self._cancelled = set()
+
+    async def start(self) -> None:
+        """ Start the workers, requeueing jobs interrupted by a shutdown. """
+
+        interrupted = await self._db.find(DB_COLLECTION_JOB,
+                                          {"status": {"$in": [JOB_PENDING, JOB_RUNNING]}},
+                                          sort=[("created_at", 1)])
+        for job in interrupted:
+            logger.info(f"Requeue job {job['_id']} ({job['kind']})")
+            self._queue.put_nowait(job)
+
+        self._workers = [asyncio.create_task(self._worker()) for _ in range(self._concurrency)]
+
+    async def stop(self) -> None:
+        """ Stop the workers, running jobs stay recorded as running
+            and are resumed on the next start.
+        """
+
+        tasks = self._workers + list(self._running.values())
+        for task in tasks:
+            task.cancel()
+        await asyncio.gather(*tasks, return_exceptions=True)
+        self._workers = []
+
+    async def submit(self,
+                     kind: str,
+                     params: dict | None = None) -> dict:
+        """ Record a pending job and queue it, returning the job. """
+
+        if kind not in self._handlers:
+            raise ValueError(f"Unknown job kind {kind}")
+
+        job_id = uuid.uuid4().hex
+        db_insert = Job(job_id=job_id,
+                        kind=kind,
+                        status=JOB_PENDING,
+                        params=params,
+                        progress={},
+                        error=None,
+                        created_at=get_current_utc_time(),
+                        started_at=None,
+                        finished_at=None).model_dump()
+        db_insert["_id"] = job_id
+        await self._db.create(DB_COLLECTION_JOB, db_insert)
+        self._queue.put_nowait(db_insert)
+
+        return db_insert
+
+    async def cancel(self,
+                     job_id: str) -> dict:
+        """ Cancel a pending or running job, waiting for a running job to
+            stop. Raises BadRequestError if the job already finished.
+        """
+
+        job = await get_job(self._db, job_id)
+        if job["status"] not in (JOB_PENDING, JOB_RUNNING):
+            raise BadRequestError(f"Job {job_id} is already {job['status']}")
+
+        self._cancelled.add(job_id)
+        task = self._running.get(job_id)
+        if task is not None:
+            task.cancel()
+            await asyncio.wait([task])
+
+        else:
+            await self._undo(job)
+            await self._finish(job, JOB_CANCELLED)
+
+        return await get_job(self._db, job_id)
+
+    async def cancel_all(self) -> None:
+        """ Cancel every pending and running job. """
+
+        jobs = await self._db.find(DB_COLLECTION_JOB,
+                                   {"status": {"$in": [JOB_PENDING, JOB_RUNNING]}},
+                                   fields=["_id"])
+        for job in jobs:
+            try:
+                await self.cancel(job["_id"])
+
+            except BadRequestError:
+                pass
+
+    async def _finish(self,
+                      job: dict,
+                      state: str,
+                      error: str | None = None) -> None:
+        """ Record the final state of a job. """
+
+        await self._db.update(DB_COLLECTION_JOB, {"_id": job["_id"]},
+                              {"status": state, "error": error, "finished_at": get_current_utc_time()})
+
+    async def _undo(self,
+                    job: dict) -> None:
+        """ Run the cancel handler of a cancelled job, if its kind has one. """
+
+        if job["kind"] in self._cancel_handlers:
+            await self._cancel_handlers[job["kind"]](self._db, job)
+
+    async def _worker(self) -> None:
+        """ Run queued jobs one at a time. """
+
+        while True:
+            job = await self._queue.get()
+            try:
+                if job["_id"] in self._cancelled:
+                    continue
+
+                task = asyncio.create_task(self._run(job))
+                self._running[job["_id"]] = task
+                await asyncio.wait([task])
+
+            finally:
+                self._running.pop(job["_id"], None)
+                self._cancelled.discard(job["_id"])
+                self._queue.task_done()
+
+    async def _run(self,
+                   job: dict) -> None:
+        """ Run a job handler, recording its state transitions. """
+
+        await self._db.update(DB_COLLECTION_JOB, {"_id": job["_id"]},
+                              {"status": JOB_RUNNING, "started_at": get_current_utc_time()})
+        try:
+            await self._handlers[job["kind"]](self._db, job)
+
+        except asyncio.CancelledError:
+            if job["_id"] not in self._cancelled:
+                raise
+
+            logger.info(f"Job {job['_id']} ({job['kind']}) cancelled")
+            await self._undo(job)
+            await self._finish(job, JOB_CANCELLED)
+
+        except Exception as e:
+            logger.exception(f"Job {job['_id']} ({job['kind']}) failed")
+            await self._finish(job, JOB_FAILED, str(e))
+
+        else:
+            await self._finish(job, JOB_COMPLETED)
@@ -0,0 +1,78 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/projects.py
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    JOB_KIND_DELETE_PROJECT,
+    JOB_KIND_DELETE_TEST_CASES
+)
+from backend.db.db import DatabaseClient
+from backend.services.jobs import JobRunner
+from backend.tools.errors import NotFoundError
+from backend.tools.tools import get_current_utc_time
+
+# Matches projects not pending deletion
+LIVE_PROJECT = {"deleted_at": None}
+
+
+async def get_project(db: DatabaseClient,
+                      project_key: str,
+                      fields: list | None = None) -> dict:
+    """ Get a project by key, raising NotFoundError if missing or deleted. """
+
+    project = await db.find_one(DB_COLLECTION_PRJ,
+                                {"_id": project_key, **LIVE_PROJECT},
+                                fields=fields)
+    if project is None:
+        raise NotFoundError(f"Project {project_key} not found")
+
+    return project
+
+
+async def deleted_project_keys(db: DatabaseClient) -> list:
+    """ Get the keys of projects pending deletion, whose documents are hidden from reads. """
+
+    projects = await db.find(DB_COLLECTION_PRJ, {"deleted_at": {"$ne": None}}, fields=["_id"])
+
+    return [project["_id"] for project in projects]
+
+
+async def delete_project(db: DatabaseClient,
+                         jobs: JobRunner,
+                         project_key: str) -> dict:
+    """ Tombstone a project, hiding it from reads, and start a job deleting
+        it with everything it owns. Returns the job.
+    """
+
+    project = await db.update_one_returning(DB_COLLECTION_PRJ,
+                                            {"_id": project_key, **LIVE_PROJECT},
+                                            {"deleted_at": get_current_utc_time()})
+    if project is None:
+        raise NotFoundError(f"Project {project_key} not found")
+
+    return await jobs.submit(JOB_KIND_DELETE_PROJECT, {"project_key": project_key})
+
+
+async def restore_project(db: DatabaseClient,
+                          project_key: str) -> None:
+    """ Clear the tombstone of a project whose deletion was cancelled. """
+
+    await db.update(DB_COLLECTION_PRJ, {"_id": project_key}, {"deleted_at": None})
+
+
+async def delete_test_cases(db: DatabaseClient,
+                            jobs: JobRunner,
+                            project_key: str) -> dict:
+    """ Start a job deleting all test cases of a project with their
+        executions. Returns the job.
+    """
+
+    await get_project(db, project_key, fields=["_id"])
+
+    return await jobs.submit(JOB_KIND_DELETE_TEST_CASES, {"project_key": project_key})
@@ -0,0 +1,216 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/rollups.py
+
+from collections import Counter, defaultdict
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_RLP,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DuplicateKeyError
+)
+from backend.models.rollups import Rollup
+from backend.services.cycle_members import result_key
+from backend.services.summary import forget_summary
+from backend.services.trends import forget_trends
+from backend.tools.tools import (
+    format_utc_time,
+    parse_utc_time
+)
+
+# Execution fields a daily rollup depends on
+ROLLUP_FIELDS = ["project_key", "test_case_key", "result", "started_at", "finished_at", "executed_at"]
+
+# Test case fields copied onto its rollups, to group trends by
+ROLLUP_GROUP_FIELDS = ["folder", "priority"]
+
+
+def rollup_day(time: str) -> str:
+    """ Truncate an ISO time to the start of its UTC day. """
+
+    return format_utc_time(parse_utc_time(time).replace(hour=0, minute=0, second=0))
+
+
+def rollup_id(project_key: str,
+              test_case_key: str,
+              day: str) -> str:
+    """ Get the _id of the rollup of a test case on a day. """
+
+    return f"{project_key}/{test_case_key}/{day}"
+
+
+def rollup_node(project_key: str,
+                test_case_key: str,
+                day: str) -> dict:
+    """ Build an empty rollup. """
+
+    rollup = Rollup(project_key=project_key,
+                    test_case_key=test_case_key,
+                    folder=None,
+                    priority=None,
+                    day=day,
+                    executions=0,
+                    results={},
+                    duration=0,
+                    timed=0).model_dump()
+    rollup["_id"] = rollup_id(project_key, test_case_key, day)
+
+    return rollup
+
+
+def execution_duration(execution: dict) -> int | None:
+    """ Get the seconds an execution ran, if both of its times are known. """
+
+    if execution.get("started_at") is None or execution.get("finished_at") is None:
+        return None
+
+    duration = parse_utc_time(execution["finished_at"]) - parse_utc_time(execution["started_at"])
+
+    return int(duration.total_seconds()) if duration.total_seconds() >= 0 else None
+
+
+def add_execution(deltas: dict,
+                  execution: dict,
+                  sign: int) -> None:
+    """ Add (sign 1) or remove (sign -1) an execution from the rollup deltas
+        of its test case on the day it ran. Undated executions are not rolled up.
+    """
+
+    if execution.get("executed_at") is None:
+        return
+
+    counter = deltas[(execution["project_key"], execution["test_case_key"], rollup_day(execution["executed_at"]))]
+    counter["executions"] += sign
+    counter[f"results.{result_key(execution.get('result'))}"] += sign
+
+    duration = execution_duration(execution)
+    if duration is not None:
+        counter["duration"] += sign * duration
+        counter["timed"] += sign
+
+
+async def inc_rollups(db: DatabaseClient,
+                      deltas: dict) -> None:
+    """ Apply (project_key, test_case_key, day) -> Counter of field deltas
+        to the rollups, creating the rollups of days that gain executions.
+    """
+
+    incs = {}
+    for key, counter in deltas.items():
+        inc = {field: delta for field, delta in counter.items() if delta}
+        if inc:
+            incs[key] = inc
+
+    if not incs:
+        return
+
+    # Create missing rollups, existing ones are rejected as duplicates
+    rollups = [rollup_node(*key) for key, inc in incs.items() if inc.get("executions", 0) > 0]
+    inserted_count, errors = await db.create_many(DB_COLLECTION_RLP, rollups)
+    for error in errors.values():
+        if not isinstance(error, DuplicateKeyError):
+            raise error
+
+    if inserted_count:
+        await copy_groups(db, [rollup for index, rollup in enumerate(rollups) if index not in errors])
+
+    await db.bulk_write(DB_COLLECTION_RLP,
+                        [("update_one", {"_id": rollup_id(*key)}, {"$inc": inc})
+                         for key, inc in incs.items()])
+
+
+async def test_case_groups(db: DatabaseClient,
+                           query: dict) -> dict:
+    """ Get test case key -> ROLLUP_GROUP_FIELDS values of the test cases matching query. """
+
+    groups = {}
+    async for test_case in db.find_iter(DB_COLLECTION_TC, query, fields=ROLLUP_GROUP_FIELDS):
+        groups[test_case["_id"]] = {field: test_case.get(field) for field in ROLLUP_GROUP_FIELDS}
+
+    return groups
+
+
+async def copy_groups(db: DatabaseClient,
+                      rollups: list) -> None:
+    """ Copy the folder and priority of their test cases onto new rollups. """
+
+    groups = await test_case_groups(db, {"_id": {"$in": list({rollup["test_case_key"] for rollup in rollups})}})
+    await db.bulk_write(DB_COLLECTION_RLP,
+                        [("update_one", {"_id": rollup["_id"]}, groups[rollup["test_case_key"]])
+                         for rollup in rollups
+                         if any(groups.get(rollup["test_case_key"], {}).values())])
+
+
+async def regroup_rollups(db: DatabaseClient,
+                          test_case: dict) -> None:
+    """ Follow a change of the folder or priority of a test case on its rollups. """
+
+    await db.update(DB_COLLECTION_RLP,
+                    {"project_key": test_case["project_key"],
+                     "test_case_key": test_case["_id"]},
+                    {field: test_case.get(field) for field in ROLLUP_GROUP_FIELDS})
+
+
+async def move_executions(db: DatabaseClient,
+                          changes: list) -> None:
+    """ Apply (before, after) execution changes to the daily rollups, either
+        side None for a created or deleted execution. Executions need the
+        ROLLUP_FIELDS.
+    """
+
+    deltas = defaultdict(Counter)
+    for before, after in changes:
+        if before is not None:
+            add_execution(deltas, before, -1)
+        if after is not None:
+            add_execution(deltas, after, 1)
+
+    await inc_rollups(db, deltas)
+
+
+async def rebuild_rollups(db: DatabaseClient,
+                          project_key: str,
+                          batch_size: int = STREAM_BATCH_SIZE) -> int:
+    """ Recount the daily rollups of a project from its executions,
+        replacing counters that drifted from concurrent writes, and drop
+        the cached trends and summary of the project.
+        Memory grows with the number of rollups, not executions.
+        Returns the number of rollups.
+    """
+
+    deltas = defaultdict(Counter)
+    async for execution in db.find_iter(DB_COLLECTION_TE, {"project_key": project_key},
+                                        batch_size=batch_size, fields=ROLLUP_FIELDS):
+        add_execution(deltas, execution, 1)
+
+    groups = await test_case_groups(db, {"project_key": project_key})
+    rollups = []
+    for key, counter in deltas.items():
+        rollup = rollup_node(*key)
+        rollup.update(groups.get(rollup["test_case_key"], {}))
+        rollup["executions"] = counter["executions"]
+        rollup["results"] = {field.split(".", 1)[1]: count for field, count in counter.items()
+                             if field.startswith("results.") and count}
+        rollup["duration"] = counter["duration"]
+        rollup["timed"] = counter["timed"]
+        rollups.append(rollup)
+
+    await db.delete(DB_COLLECTION_RLP, {"project_key": project_key})
+    for start in range(0, len(rollups), batch_size):
+        await db.create_many(DB_COLLECTION_RLP, rollups[start:start + batch_size])
+
+    # Reads racing the rebuild see the invalidation and are not cached
+    forget_trends(project_key)
+    forget_summary(project_key)
+
+    return len(rollups)
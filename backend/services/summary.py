@@ -0,0 +1,88 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/summary.py
+
+import asyncio
+import time
+from collections import Counter
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
+    SUMMARY_CACHE_TTL,
+    SUMMARY_CACHE_SIZE
+)
+from backend.db.db import DatabaseClient
+from backend.services.cycle_members import result_key
+
+# project_key -> (expiry, summary)
+_summary_cache = {}
+
+# project_key -> invalidation count, so a summary racing a write is not cached
+_summary_generations = Counter()
+
+
+def forget_summary(project_key: str) -> None:
+    """ Drop the cached summary of a project after a write to it. """
+
+    _summary_generations[project_key] += 1
+    _summary_cache.pop(project_key, None)
+
+
+def clear_summaries() -> None:
+    """ Drop all cached summaries. """
+
+    _summary_generations.update(list(_summary_cache))
+    _summary_cache.clear()
+
+
+def count_by(groups: list,
+             field: str) -> dict:
+    """ Sum group counts by the value of one field, None counted as "none". """
+
+    counts = Counter()
+    for group in groups:
+        counts[result_key(group.get(field))] += group["count"]
+
+    return dict(counts)
+
+
+async def project_summary(db: DatabaseClient,
+                          project_key: str) -> dict:
+    """ Get the test case, test cycle and execution counts of a project.
+        Each collection is counted by a single grouped query, the queries
+        run concurrently and the summary is cached until the next write.
+    """
+
+    cached = _summary_cache.get(project_key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    generation = _summary_generations[project_key]
+    query = {"project_key": project_key}
+    test_cases, test_cycles, executions = await asyncio.gather(
+        db.group_count(DB_COLLECTION_TC, query, ["status", "priority"]),
+        db.group_count(DB_COLLECTION_TCY, query, ["status"]),
+        db.group_count(DB_COLLECTION_TE, query, ["result"]))
+
+    summary = {"project_key": project_key,
+               "test_cases": sum(group["count"] for group in test_cases),
+               "test_cases_by_status": count_by(test_cases, "status"),
+               "test_cases_by_priority": count_by(test_cases, "priority"),
+               "test_cycles": sum(group["count"] for group in test_cycles),
+               "test_cycles_by_status": count_by(test_cycles, "status"),
+               "executions": sum(group["count"] for group in executions),
+               "executions_by_result": count_by(executions, "result")}
+
+    if generation == _summary_generations[project_key]:
+        if len(_summary_cache) >= SUMMARY_CACHE_SIZE:
+            _summary_cache.clear()
+        _summary_cache[project_key] = (time.monotonic() + SUMMARY_CACHE_TTL, summary)
+
+    return summary
@@ -0,0 +1,211 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/test_cases.py
+
+import asyncio
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import DatabaseClient
+from backend.services.folders import (
+    FOLDER_FIELDS,
+    move_test_cases
+)
+from backend.services.projects import LIVE_PROJECT
+from backend.tools.errors import NotFoundError
+from backend.tools.tools import parse_list
+
+
+async def get_test_case(db: DatabaseClient,
+                        project_key: str,
+                        test_case_key: str,
+                        fields: list | None = None) -> dict:
+    """ Get a test case within its project, raising NotFoundError if either
+        is missing or the project is pending deletion. The test case and
+        project are looked up concurrently.
+    """
+
+    test_case, project = await asyncio.gather(
+        db.find_one(DB_COLLECTION_TC,
+                    {"_id": test_case_key,
+                     "project_key": project_key},
+                    fields=fields),
+        db.find_one(DB_COLLECTION_PRJ,
+                    {"_id": project_key, **LIVE_PROJECT},
+                    fields=["_id"]))
+    if project is None:
+        raise NotFoundError(f"Project {project_key} not found")
+
+    if test_case is None:
+        raise NotFoundError(f"Test case {test_case_key} not found")
+
+    return test_case
+
+
+def test_case_filter(project_key: str,
+                     filters) -> dict:
+    """ Build the query of a project's test cases matching TestCaseFilters.
+        List filters are comma separated and match any value, folder
+        matches a prefix as an index range, labels match any or all.
+    """
+
+    query = {"project_key": project_key}
+    for name in ("status", "priority", "test_frequency"):
+        values = parse_list(getattr(filters, name))
+        if values:
+            query[name] = {"$in": values}
+
+    if filters.folder:
+        upper = filters.folder[:-1] + chr(ord(filters.folder[-1]) + 1)
+        query["folder"] = {"$gte": filters.folder, "$lt": upper}
+
+    labels = parse_list(filters.labels)
+    if labels:
+        query["labels"] = {"$all" if filters.labels_match == "all" else "$in": labels}
+
+    return query
+
+
+def executed_at(execution: dict) -> str | None:
+    """ Get the time an execution ran, finished_at falling back to started_at. """
+
+    return execution.get("finished_at") or execution.get("started_at")
+
+
+def latest_execution(executions: list) -> dict | None:
+    """ Get the most recently run execution, undated executions sort first. """
+
+    return max(executions, key=lambda execution: executed_at(execution) or "", default=None)
+
+
+def last_result_update(execution: dict) -> tuple:
+    """ Build a conditional update recording an execution as the last result
+        of its test case. It only matches if no later execution was recorded,
+        so out of order uploads do not regress the test case.
+    """
+
+    execution_time = executed_at(execution)
+    newer = [{"last_executed_at": None}, {"last_execution_key": execution["_id"]}]
+    if execution_time is not None:
+        newer.append({"last_executed_at": {"$lte": execution_time}})
+
+    return ("update_one",
+            {"_id": execution["test_case_key"], "$or": newer},
+            {"last_result": execution["result"],
+             "last_execution_key": execution["_id"],
+             "last_executed_at": execution_time})
+
+
+def records_last_result(test_case: dict,
+                        execution: dict) -> bool:
+    """ Check if the last_result_update of an execution matches a test case. """
+
+    execution_time = executed_at(execution)
+
+    return (test_case.get("last_executed_at") is None
+            or test_case.get("last_execution_key") == execution["_id"]
+            or (execution_time is not None and test_case["last_executed_at"] <= execution_time))
+
+
+async def record_last_results(db: DatabaseClient,
+                              executions: list) -> None:
+    """ Record the latest of the given executions of each test case as its
+        last result, in a single batch of conditional updates.
+    """
+
+    by_test_case = {}
+    for execution in executions:
+        by_test_case.setdefault(execution["test_case_key"], []).append(execution)
+    latest = {test_case_key: latest_execution(test_case_executions)
+              for test_case_key, test_case_executions in by_test_case.items()}
+
+    test_cases = await db.find(DB_COLLECTION_TC,
+                               {"_id": {"$in": list(latest)}},
+                               fields=[*FOLDER_FIELDS, "last_executed_at", "last_execution_key"])
+
+    await db.bulk_write(DB_COLLECTION_TC,
+                        [last_result_update(execution) for execution in latest.values()])
+
+    # Move the updated test cases between folder result rollups
+    await move_test_cases(db, [(test_case, {**test_case, "last_result": latest[test_case["_id"]]["result"]})
+                               for test_case in test_cases
+                               if records_last_result(test_case, latest[test_case["_id"]])])
+
+
+async def last_execution(db: DatabaseClient,
+                         project_key: str,
+                         test_case_key: str) -> dict | None:
+    """ Get the most recently run execution of a test case, read from the
+        top of the project_key, test_case_key, executed_at index.
+    """
+
+    executions = await db.find(DB_COLLECTION_TE,
+                               {"project_key": project_key,
+                                "test_case_key": test_case_key},
+                               sort=[("executed_at", -1)],
+                               limit=1,
+                               fields=["result", "executed_at"])
+
+    return executions[0] if executions else None
+
+
+async def refresh_last_results(db: DatabaseClient,
+                               test_case_keys: list) -> None:
+    """ Recompute the last result of test cases from their execution history,
+        for when the recorded last execution was deleted.
+    """
+
+    test_cases = await db.find(DB_COLLECTION_TC,
+                               {"_id": {"$in": test_case_keys}},
+                               fields=FOLDER_FIELDS)
+    latest = await asyncio.gather(*(last_execution(db, test_case["project_key"], test_case["_id"])
+                                    for test_case in test_cases))
+
+    operations = []
+    last_results = {}
+    for test_case, execution in zip(test_cases, latest):
+        if execution is None:
+            last = {"last_result": None, "last_execution_key": None, "last_executed_at": None}
+        else:
+            last = {"last_result": execution["result"],
+                    "last_execution_key": execution["_id"],
+                    "last_executed_at": execution["executed_at"]}
+        operations.append(("update_one", {"_id": test_case["_id"]}, last))
+        last_results[test_case["_id"]] = last["last_result"]
+
+    await db.bulk_write(DB_COLLECTION_TC, operations)
+
+    # Move the updated test cases between folder result rollups
+    await move_test_cases(db, [(test_case, {**test_case, "last_result": last_results[test_case["_id"]]})
+                               for test_case in test_cases])
+
+
+async def backfill_last_results(db: DatabaseClient,
+                                query: dict | None = None,
+                                batch_size: int = STREAM_BATCH_SIZE) -> int:
+    """ Recompute the last result of every test case matching query,
+        a batch of test cases at a time. Returns the number of test cases.
+    """
+
+    total = 0
+    batch = []
+    async for test_case in db.find_iter(DB_COLLECTION_TC, query or {}, batch_size=batch_size, fields=["_id"]):
+        batch.append(test_case["_id"])
+        if len(batch) >= batch_size:
+            await refresh_last_results(db, batch)
+            total, batch = total + len(batch), []
+
+    if batch:
+        await refresh_last_results(db, batch)
+        total += len(batch)
+
+    return total
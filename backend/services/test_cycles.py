@@ -0,0 +1,219 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/test_cycles.py
+
+from collections import Counter
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import DatabaseClient
+from backend.services.cycle_members import (
+    add_members,
+    remove_members,
+    result_key
+)
+from backend.services.summary import forget_summary
+from backend.services.test_executions import get_execution
+from backend.tools.errors import (
+    BadRequestError,
+    NotFoundError
+)
+
+
+async def get_cycle(db: DatabaseClient,
+                    test_cycle_key: str,
+                    fields: list | None = None) -> dict:
+    """ Get a test cycle by key, raising NotFoundError if missing. """
+
+    cycle = await db.find_one(DB_COLLECTION_TCY,
+                              {"_id": test_cycle_key},
+                              fields=fields)
+    if cycle is None:
+        raise NotFoundError(f"Test cycle {test_cycle_key} not found")
+
+    return cycle
+
+
+async def attach_execution(db: DatabaseClient,
+                           test_cycle_key: str,
+                           execution_key: str) -> dict:
+    """ Add a test execution to a test cycle, returning the cycle. """
+
+    await get_cycle(db, test_cycle_key, fields=["_id"])
+    execution = await get_execution(db, execution_key, fields=["project_key", "result"])
+
+    # Insert the membership, the unique _id rejects executions already in the cycle
+    if not await add_members(db, [(test_cycle_key, execution)]):
+        raise BadRequestError(f"Execution {execution_key} "
+                              f"already in cycle {test_cycle_key}")
+
+    # Update execution cycle id
+    await db.update(DB_COLLECTION_TE,
+                    {"_id": execution_key},
+                    {"test_cycle_key": test_cycle_key})
+
+    return await get_cycle(db, test_cycle_key)
+
+
+async def detach_execution(db: DatabaseClient,
+                           test_cycle_key: str,
+                           execution_key: str) -> dict:
+    """ Remove a test execution from a test cycle, returning the cycle. """
+
+    await get_cycle(db, test_cycle_key, fields=["_id"])
+    execution = await get_execution(db, execution_key, fields=["result"])
+
+    # Remove the membership
+    await remove_members(db,
+                         {"test_cycle_key": test_cycle_key,
+                          "execution_key": execution_key},
+                         {execution_key: execution.get("result")})
+
+    # Clear execution cycle id, unless it has moved to another cycle
+    await db.update(DB_COLLECTION_TE,
+                    {"_id": execution_key,
+                     "test_cycle_key": test_cycle_key},
+                    {"test_cycle_key": None})
+
+    return await get_cycle(db, test_cycle_key)
+
+
+async def find_cycle_executions(db: DatabaseClient,
+                                execution_keys: list) -> dict:
+    """ Get the executions to add to or remove from a test cycle in one query,
+        as execution key -> execution, raising NotFoundError if any is missing.
+    """
+
+    execution_keys = list(dict.fromkeys(execution_keys))
+    if not execution_keys:
+        return {}
+
+    found = await db.find(DB_COLLECTION_TE,
+                          {"_id": {"$in": execution_keys}},
+                          fields=["project_key", "result"])
+    executions = {execution["_id"]: execution for execution in found}
+    missing = set(execution_keys) - set(executions)
+    if missing:
+        raise NotFoundError(f"Test executions {', '.join(sorted(missing))} not found")
+
+    return executions
+
+
+async def update_cycle_executions(db: DatabaseClient,
+                                  test_cycle_key: str,
+                                  add: list,
+                                  remove: list,
+                                  executions: dict | None = None) -> dict:
+    """ Add and remove many test executions of a test cycle at once,
+        returning the cycle. Removals are applied after additions.
+        Executions already found by find_cycle_executions are not looked up again.
+    """
+
+    await get_cycle(db, test_cycle_key, fields=["_id"])
+
+    # Check all executions exist in one query
+    if executions is None:
+        executions = await find_cycle_executions(db, add + remove)
+
+    # Removals win over additions of the same execution
+    add = [key for key in dict.fromkeys(add) if key not in set(remove)]
+
+    # Insert memberships unordered, executions already in the cycle are skipped
+    await add_members(db, [(test_cycle_key, executions[key]) for key in add])
+    if remove:
+        await remove_members(db,
+                             {"test_cycle_key": test_cycle_key,
+                              "execution_key": {"$in": remove}},
+                             {key: executions[key].get("result") for key in remove})
+
+    # Update execution cycle ids in one batch
+    operations = []
+    if add:
+        operations.append(("update_many",
+                           {"_id": {"$in": add}},
+                           {"test_cycle_key": test_cycle_key}))
+    if remove:
+        operations.append(("update_many",
+                           {"_id": {"$in": remove},
+                            "test_cycle_key": test_cycle_key},
+                           {"test_cycle_key": None}))
+    await db.bulk_write(DB_COLLECTION_TE, operations)
+
+    return await get_cycle(db, test_cycle_key)
+
+
+async def delete_cycle(db: DatabaseClient,
+                       test_cycle_key: str) -> None:
+    """ Delete a test cycle with its memberships, raising NotFoundError if missing. """
+
+    cycle = await get_cycle(db, test_cycle_key, fields=["project_key"])
+    result, deleted_count = await db.delete_one(DB_COLLECTION_TCY,
+                                                {"_id": test_cycle_key})
+    if deleted_count == 0:
+        raise NotFoundError(f"Test cycle {test_cycle_key} not found")
+
+    await db.delete(DB_COLLECTION_TCM,
+                    {"test_cycle_key": test_cycle_key})
+    await db.update(DB_COLLECTION_TE,
+                    {"test_cycle_key": test_cycle_key},
+                    {"test_cycle_key": None})
+    forget_summary(cycle["project_key"])
+
+
+def cycle_summary(cycle: dict) -> dict:
+    """ Build the result summary of a test cycle from its counters. """
+
+    results = {result: count for result, count in (cycle.get("result_counts") or {}).items() if count}
+
+    return {"test_cycle_key": cycle["_id"],
+            "total": sum(results.values()),
+            "results": results}
+
+
+async def recompute_cycle_results(db: DatabaseClient,
+                                  test_cycle_key: str,
+                                  batch_size: int = STREAM_BATCH_SIZE) -> dict:
+    """ Recount the results of every execution in a test cycle, replacing
+        counters that drifted from concurrent writes. Results are counted by
+        the database a batch of members at a time. Returns the summary.
+    """
+
+    await get_cycle(db, test_cycle_key, fields=["_id"])
+
+    counts = Counter()
+    batch = []
+    async for member in db.find_iter(DB_COLLECTION_TCM, {"test_cycle_key": test_cycle_key},
+                                     batch_size=batch_size, fields=["execution_key"]):
+        batch.append(member["execution_key"])
+        if len(batch) >= batch_size:
+            counts.update(await count_results(db, batch))
+            batch = []
+
+    if batch:
+        counts.update(await count_results(db, batch))
+
+    cycle = await db.update_one_returning(DB_COLLECTION_TCY,
+                                          {"_id": test_cycle_key},
+                                          {"result_counts": dict(counts)})
+    if cycle is None:
+        raise NotFoundError(f"Test cycle {test_cycle_key} not found")
+
+    return cycle_summary(cycle)
+
+
+async def count_results(db: DatabaseClient,
+                        execution_keys: list) -> Counter:
+    """ Count the executions of the given keys by result counter key. """
+
+    groups = await db.group_count(DB_COLLECTION_TE, {"_id": {"$in": execution_keys}}, ["result"])
+
+    return Counter({result_key(group["result"]): group["count"] for group in groups})
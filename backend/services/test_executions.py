@@ -0,0 +1,228 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/test_executions.py
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DuplicateKeyError
+)
+from backend.models.test_executions import TestExecution
+from backend.services.cycle_members import (
+    add_members,
+    move_results,
+    remove_members
+)
+from backend.services.rollups import (
+    ROLLUP_FIELDS,
+    move_executions
+)
+from backend.services.test_cases import (
+    executed_at,
+    record_last_results,
+    refresh_last_results
+)
+from backend.services.summary import forget_summary
+from backend.services.trends import forget_trends
+from backend.tools.errors import (
+    BadRequestError,
+    NotFoundError
+)
+
+
+async def get_execution(db: DatabaseClient,
+                        execution_key: str,
+                        fields: list | None = None) -> dict:
+    """ Get a test execution by key, raising NotFoundError if missing. """
+
+    execution = await db.find_one(DB_COLLECTION_TE,
+                                  {"_id": execution_key},
+                                  fields=fields)
+    if execution is None:
+        raise NotFoundError(f"Test execution {execution_key} not found")
+
+    return execution
+
+
+async def check_cycle_exists(db: DatabaseClient,
+                             test_cycle_key: str | None) -> None:
+    """ Raise NotFoundError if a referenced test cycle does not exist. """
+
+    if test_cycle_key is None:
+        return
+
+    if await db.find_one(DB_COLLECTION_TCY, {"_id": test_cycle_key}, fields=["_id"]) is None:
+        raise NotFoundError(f"Test cycle {test_cycle_key} not found")
+
+
+async def create_execution(db: DatabaseClient,
+                           project_key: str,
+                           test_case_key: str,
+                           execution_data: dict) -> dict:
+    """ Create a test execution for a test case, returning the stored document.
+        An execution created in a test cycle is added to its members.
+    """
+
+    execution_key = execution_data["execution_key"]
+
+    # Validate execution_key starts with project_key
+    if not execution_key.startswith(project_key):
+        raise BadRequestError(f"execution_key {execution_key} "
+                              f"does not belong to project {project_key}")
+
+    await check_cycle_exists(db, execution_data.get("test_cycle_key"))
+
+    # Initialize missing keys
+    execution_data["project_key"] = project_key
+    execution_data["test_case_key"] = test_case_key
+
+    # Assign _id
+    db_insert = TestExecution(**execution_data).model_dump()
+    db_insert["_id"] = execution_key
+
+    # Create the execution in the database, the unique _id rejects duplicates
+    try:
+        await db.create(DB_COLLECTION_TE, db_insert)
+
+    except DuplicateKeyError:
+        raise BadRequestError(f"execution_key {execution_key} already exists.")
+
+    if db_insert["test_cycle_key"] is not None:
+        await add_members(db, [(db_insert["test_cycle_key"], db_insert)])
+
+    await record_last_results(db, [db_insert])
+    await move_executions(db, [(None, db_insert)])
+    forget_trends(project_key, [db_insert["executed_at"]])
+    forget_summary(project_key)
+
+    return db_insert
+
+
+async def update_execution(db: DatabaseClient,
+                           execution_key: str,
+                           update_data: dict) -> dict:
+    """ Update a test execution, returning the updated document.
+        Result changes move the execution between the counters of its
+        cycles, a new test_cycle_key adds it to that cycle.
+    """
+
+    await check_cycle_exists(db, update_data.get("test_cycle_key"))
+
+    # Update reading the previous values in the same operation
+    previous = await db.update_one_returning(DB_COLLECTION_TE,
+                                             {"_id": execution_key},
+                                             update_data,
+                                             before=True)
+    if previous is None:
+        raise NotFoundError(f"Test execution {execution_key} not found")
+
+    execution = {**previous, **update_data}
+
+    # Keep the indexed execution time in step with the updated times
+    if {"started_at", "finished_at"} & update_data.keys():
+        execution["executed_at"] = executed_at(execution)
+        if execution["executed_at"] != previous.get("executed_at"):
+            await db.update(DB_COLLECTION_TE,
+                            {"_id": execution_key},
+                            {"executed_at": execution["executed_at"]})
+
+    await move_results(db, execution_key, previous["result"], execution["result"])
+    if execution["test_cycle_key"] not in (None, previous["test_cycle_key"]):
+        await add_members(db, [(execution["test_cycle_key"], execution)])
+
+    if {"result", "started_at", "finished_at"} & update_data.keys():
+        await record_last_results(db, [execution])
+        await move_executions(db, [(previous, execution)])
+        forget_trends(execution["project_key"], [previous.get("executed_at"), execution.get("executed_at")])
+        forget_summary(execution["project_key"])
+
+    return execution
+
+
+async def delete_execution(db: DatabaseClient,
+                           execution_key: str) -> None:
+    """ Delete a test execution and its cycle memberships,
+        raising NotFoundError if missing.
+    """
+
+    execution = await get_execution(db, execution_key, fields=ROLLUP_FIELDS)
+
+    result, deleted_count = await db.delete_one(DB_COLLECTION_TE,
+                                                {"_id": execution_key})
+    if deleted_count == 0:
+        raise NotFoundError(f"Test execution {execution_key} not found")
+
+    await remove_members(db,
+                         {"execution_key": execution_key},
+                         {execution_key: execution.get("result")})
+
+    await move_executions(db, [(execution, None)])
+    forget_trends(execution["project_key"], [execution["executed_at"]])
+    forget_summary(execution["project_key"])
+
+    # Fall back to the previous execution if this was the last result
+    if await db.count(DB_COLLECTION_TC, {"_id": execution["test_case_key"],
+                                         "last_execution_key": execution_key}):
+        await refresh_last_results(db, [execution["test_case_key"]])
+
+
+async def delete_executions(db: DatabaseClient,
+                            query: dict) -> int:
+    """ Delete all test executions matching query and their cycle memberships,
+        returning the number deleted.
+    """
+
+    executions = await db.find(DB_COLLECTION_TE, query, fields=ROLLUP_FIELDS)
+    if not executions:
+        return 0
+
+    execution_keys = [execution["_id"] for execution in executions]
+    result, deleted_count = await db.delete(DB_COLLECTION_TE,
+                                            {"_id": {"$in": execution_keys}})
+
+    await remove_members(db,
+                         {"execution_key": {"$in": execution_keys}},
+                         {execution["_id"]: execution.get("result") for execution in executions})
+    await refresh_last_results(db, list({execution["test_case_key"] for execution in executions}))
+    await move_executions(db, [(execution, None) for execution in executions])
+    for execution in executions:
+        forget_trends(execution["project_key"], [execution["executed_at"]])
+        forget_summary(execution["project_key"])
+
+    return deleted_count
+
+
+async def backfill_executed_at(db: DatabaseClient,
+                               query: dict | None = None,
+                               batch_size: int = STREAM_BATCH_SIZE) -> int:
+    """ Derive executed_at of the test executions matching query that were
+        stored without it, a batch at a time. Returns the number updated.
+    """
+
+    total = 0
+    operations = []
+    async for execution in db.find_iter(DB_COLLECTION_TE,
+                                        {**(query or {}), "executed_at": None},
+                                        batch_size=batch_size,
+                                        fields=["started_at", "finished_at"]):
+        if executed_at(execution) is None:
+            continue
+
+        operations.append(("update_one", {"_id": execution["_id"]}, {"executed_at": executed_at(execution)}))
+        if len(operations) >= batch_size:
+            await db.bulk_write(DB_COLLECTION_TE, operations)
+            total, operations = total + len(operations), []
+
+    await db.bulk_write(DB_COLLECTION_TE, operations)
+
+    return total + len(operations)
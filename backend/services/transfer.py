@@ -0,0 +1,187 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/transfer.py
+
+import json
+
+from pydantic import ValidationError
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    DB_COLLECTION_TC,
+    DB_COLLECTION_TE,
+    DB_COLLECTION_TCY,
+    DB_COLLECTION_TCM,
+    JOB_KIND_DELETE_PROJECT,
+    STREAM_BATCH_SIZE
+)
+from backend.db.db import (
+    DatabaseClient,
+    DuplicateKeyError
+)
+from backend.models.projects import Project
+from backend.models.test_cases import TestCase
+from backend.models.test_cycles import (
+    TestCycle,
+    TestCycleMember
+)
+from backend.models.test_executions import TestExecution
+from backend.services.folders import rebuild_folders
+from backend.services.jobs import JobRunner
+from backend.services.projects import restore_project
+from backend.services.rollups import rebuild_rollups
+from backend.services.test_cycles import recompute_cycle_results
+from backend.tools.errors import BadRequestError
+from backend.tools.tools import get_current_utc_time
+
+# Exported tables in import order, with the model validating their documents
+TRANSFER_MODELS = {
+    DB_COLLECTION_PRJ: Project,
+    DB_COLLECTION_TC: TestCase,
+    DB_COLLECTION_TCY: TestCycle,
+    DB_COLLECTION_TE: TestExecution,
+    DB_COLLECTION_TCM: TestCycleMember
+}
+
+
+async def export_records(db: DatabaseClient,
+                         project: dict):
+    """ Iterate over a project and everything it owns as
+        {"table", "document"} records, straight from database cursors.
+        Memberships are limited to the project's own cycles and executions.
+    """
+
+    query = {"project_key": project["_id"]}
+    yield {"table": DB_COLLECTION_PRJ, "document": project}
+
+    for table in (DB_COLLECTION_TC, DB_COLLECTION_TCY, DB_COLLECTION_TE):
+        async for doc in db.find_iter(table, query):
+            yield {"table": table, "document": doc}
+
+    async for cycle in db.find_iter(DB_COLLECTION_TCY, query, fields=["_id"]):
+        async for member in db.find_iter(DB_COLLECTION_TCM, {"test_cycle_key": cycle["_id"], **query}):
+            yield {"table": DB_COLLECTION_TCM, "document": member}
+
+
+def parse_record(line: bytes,
+                 project_key: str) -> tuple:
+    """ Parse and validate an exported record, returning (table, document).
+        Raises BadRequestError for malformed records or foreign documents.
+    """
+
+    try:
+        record = json.loads(line)
+        table, doc = record["table"], record["document"]
+        model = TRANSFER_MODELS[table]
+        db_insert = model.model_validate({k: v for k, v in doc.items() if k != "_id"}).model_dump()
+
+    except (ValueError, TypeError, KeyError, AttributeError, ValidationError) as e:
+        raise BadRequestError(f"Invalid export record: {e}")
+
+    if db_insert["project_key"] != project_key:
+        raise BadRequestError(f"Export record of {table} {doc.get('_id')} "
+                              f"does not belong to project {project_key}")
+
+    if not isinstance(doc.get("_id"), str):
+        raise BadRequestError(f"Export record of {table} has no _id")
+    db_insert["_id"] = doc["_id"]
+
+    return table, db_insert
+
+
+async def insert_batch(db: DatabaseClient,
+                       table: str,
+                       batch: list) -> int:
+    """ Insert a batch of imported documents, rejecting existing keys. """
+
+    inserted_count, errors = await db.create_many(table, batch)
+    for index, error in errors.items():
+        if isinstance(error, DuplicateKeyError):
+            raise BadRequestError(f"{table} {batch[index]['_id']} already exists")
+        raise error
+
+    return inserted_count
+
+
+async def import_records(db: DatabaseClient,
+                         project_key: str,
+                         lines) -> dict:
+    """ Insert the records of an export in bulk batches, keeping only one
+        batch per table in memory. Returns the count imported per table.
+    """
+
+    counts = dict.fromkeys(TRANSFER_MODELS, 0)
+    batches = {table: [] for table in TRANSFER_MODELS if table != DB_COLLECTION_PRJ}
+    cycle_keys = []
+    async for line in lines:
+        if not line.strip():
+            continue
+
+        table, db_insert = parse_record(line, project_key)
+        if table == DB_COLLECTION_PRJ:
+            raise BadRequestError("Export contains more than one project")
+
+        if table == DB_COLLECTION_TCY:
+            cycle_keys.append(db_insert["_id"])
+
+        batches[table].append(db_insert)
+        if len(batches[table]) >= STREAM_BATCH_SIZE:
+            counts[table] += await insert_batch(db, table, batches[table])
+            batches[table] = []
+
+    for table, batch in batches.items():
+        counts[table] += await insert_batch(db, table, batch)
+
+    # Cycle counters of the source may include executions of other projects
+    for test_cycle_key in cycle_keys:
+        await recompute_cycle_results(db, test_cycle_key)
+
+    # Folders and rollups are derived, they are not exported
+    await rebuild_folders(db, project_key)
+    await rebuild_rollups(db, project_key)
+
+    return counts
+
+
+async def import_project(db: DatabaseClient,
+                         jobs: JobRunner,
+                         project_key: str,
+                         lines) -> dict:
+    """ Create a project from the lines of an export. The project stays
+        hidden until every record is written, a failed import is deleted
+        in the background. Returns the count imported per table.
+    """
+
+    # The project record comes first
+    project = None
+    async for line in lines:
+        if line.strip():
+            table, project = parse_record(line, project_key)
+            break
+
+    if project is None or table != DB_COLLECTION_PRJ:
+        raise BadRequestError("Export does not start with a project")
+
+    project["deleted_at"] = get_current_utc_time()
+    try:
+        await db.create(DB_COLLECTION_PRJ, project)
+
+    except DuplicateKeyError:
+        raise BadRequestError(f"Project {project_key} already exists")
+
+    try:
+        counts = await import_records(db, project_key, lines)
+
+    except BaseException:
+        await jobs.submit(JOB_KIND_DELETE_PROJECT, {"project_key": project_key})
+        raise
+
+    await restore_project(db, project_key)
+    counts[DB_COLLECTION_PRJ] = 1
+
+    return counts
@@ -0,0 +1,161 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# services/trends.py
+
+from collections import Counter
+from datetime import (
+    datetime,
+    timedelta,
+    timezone
+)
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_RLP,
+    RESULT_NONE,
+    RESULT_PASS,
+    TREND_CACHE_SIZE
+)
+from backend.db.db import DatabaseClient
+from backend.services.cycle_members import result_key
+from backend.services.folders import folder_path
+from backend.tools.tools import (
+    format_utc_time,
+    parse_utc_time
+)
+
+BUCKET_LENGTHS = {
+    "day": timedelta(days=1),
+    "week": timedelta(weeks=1)
+}
+
+# (project_key, unit, group_by) -> {bucket start: [trend points]},
+# closed buckets only, the current bucket is always recounted
+_trend_cache = {}
+
+# project_key -> invalidation count, so a count racing a write is not cached
+_trend_generations = Counter()
+
+
+def bucket_start(time: datetime,
+                 unit: str) -> datetime:
+    """ Truncate a UTC time to the start of its day or Monday week. """
+
+    start = time.replace(hour=0, minute=0, second=0, microsecond=0)
+    if unit == "week":
+        start -= timedelta(days=start.weekday())
+
+    return start
+
+
+def forget_trends(project_key: str,
+                  times: list | None = None) -> None:
+    """ Drop the cached buckets of a project containing any of the ISO times
+        of executions written, or all of its buckets if no times are given.
+    """
+
+    _trend_generations[project_key] += 1
+    for (key, unit, group_by), buckets in list(_trend_cache.items()):
+        if key != project_key:
+            continue
+
+        if times is None:
+            del _trend_cache[(key, unit, group_by)]
+            continue
+
+        for time in times:
+            if time is not None:
+                buckets.pop(format_utc_time(bucket_start(parse_utc_time(time), unit)), None)
+
+
+def clear_trends() -> None:
+    """ Drop all cached buckets. """
+
+    _trend_generations.update(key for key, _, _ in _trend_cache)
+    _trend_cache.clear()
+
+
+async def bucket_points(db: DatabaseClient,
+                        project_key: str,
+                        unit: str,
+                        group_by: str | None,
+                        buckets: int) -> dict:
+    """ Get bucket start -> trend points per group of the last buckets of a
+        project up to the current one. Closed buckets are read from the
+        cache, the rest are summed from the daily rollups, which carry the
+        folder and priority of their test case.
+    """
+
+    length = BUCKET_LENGTHS[unit]
+    current = bucket_start(datetime.now(timezone.utc), unit)
+    starts = [format_utc_time(current - length * i) for i in reversed(range(buckets))]
+
+    key = (project_key, unit, group_by)
+    cached = _trend_cache.get(key, {})
+    missing = [start for start in starts[:-1] if start not in cached] + starts[-1:]
+
+    generation = _trend_generations[project_key]
+    rollups = await db.find(DB_COLLECTION_RLP,
+                            {"project_key": project_key,
+                             "day": {"$gte": missing[0],
+                                     "$lt": format_utc_time(current + length)}},
+                            fields=["day", "results", *([group_by] if group_by else [])])
+    counted = {start: {} for start in missing}
+    for rollup in rollups:
+        start = format_utc_time(bucket_start(parse_utc_time(rollup["day"]), unit))
+        if start not in counted:
+            continue
+
+        group = rollup.get(group_by) if group_by else None
+        if group_by == "folder":
+            group = folder_path(group)
+        results = counted[start].setdefault(group, Counter())
+        for result, count in (rollup["results"] or {}).items():
+            results[result_key(result)] += count
+
+    points = {start: [trend_point(start, group, +results)
+                      for group, results in sorted(groups.items(), key=lambda item: item[0] or "")
+                      if +results]
+              for start, groups in counted.items()}
+
+    # Cache the closed buckets unless a write invalidated them meanwhile
+    if generation == _trend_generations[project_key]:
+        if key not in _trend_cache and len(_trend_cache) >= TREND_CACHE_SIZE:
+            _trend_cache.clear()
+        _trend_cache.setdefault(key, cached).update({start: points[start] for start in missing[:-1]})
+
+    return {start: points[start] if start in points else cached[start] for start in starts}
+
+
+def trend_point(bucket: str,
+                group: str | None,
+                results: Counter) -> dict:
+    """ Build a trend point, the pass rate is over executions with a result. """
+
+    total = sum(results.values())
+    executed = total - results[RESULT_NONE]
+
+    return {"bucket": bucket,
+            "group": group,
+            "total": total,
+            "results": dict(results),
+            "pass_rate": results[RESULT_PASS] / executed if executed else None}
+
+
+async def project_trends(db: DatabaseClient,
+                         project_key: str,
+                         unit: str,
+                         group_by: str | None,
+                         buckets: int) -> list:
+    """ Get the execution result counts and pass rate of a project per time
+        bucket, and per the current folder or priority of the test cases if
+        grouped. Buckets and groups without executions are left out.
+    """
+
+    points = await bucket_points(db, project_key, unit, group_by, buckets)
+
+    return [point for start in points for point in points[start]]
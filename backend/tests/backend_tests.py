@@ -6,11 +6,38 @@
 # License: MIT
 # ================================================================
 
+import asyncio
+import gzip
 import logging
+import os
+from datetime import datetime, timedelta, timezone
+import tempfile
+import time
 import unittest
 
 import pytest
 import requests
+import zstandard
+
+from backend.app_def.app_def import (
+    DB_COLLECTION_PRJ,
+    DB_COLLECTION_TCY
+)
+from backend.db.sqlite import SqliteClient
+from backend.services.job_handlers import (
+    JOB_CANCEL_HANDLERS,
+    JOB_HANDLERS
+)
+from backend.services.cycle_members import (
+    add_members,
+    remove_members
+)
+from backend.services.jobs import JobRunner
+from backend.services.projects import (
+    delete_project,
+    get_project
+)
+from backend.tools.errors import NotFoundError
 
 
 class OrbitBackendSanityTest(unittest.TestCase):
@@ -45,7 +72,22 @@ class OrbitBackendSanityTest(unittest.TestCase):
 
         # Cleanup existing db
         response = requests.post(f"{cls.url}/reset")
-        assert response.status_code == 204
+        assert cls.wait_for_job(response)["status"] == "completed"
+
+    @classmethod
+    def wait_for_job(cls, response, timeout=30):
+        """ Poll the job of an accepted request until it finishes """
+
+        assert response.status_code == 202
+        job_url = f"{cls.protocol}://{cls.host}:{cls.port}{response.headers['Location']}"
+        deadline = time.time() + timeout
+        while time.time() < deadline:
+            job = requests.get(job_url).json()
+            if job["status"] in ("completed", "failed"):
+                return job
+            time.sleep(0.1)
+
+        raise TimeoutError(f"Job {job_url} did not finish")
 
     @pytest.mark.order(1)
     def test_projects(self):
@@ -91,9 +133,9 @@ class OrbitBackendSanityTest(unittest.TestCase):
         for i in range(0, n):
             # Delete project
             response = requests.delete(f"{self.__class__.url}/projects/PRJ{i}")
-            assert response.status_code == 204
+            assert response.status_code == 202
 
-            # Verify project deleted
+            # Verify project hidden before the job finishes
             response = requests.get(f"{self.__class__.url}/projects")
             assert response.status_code == 200
             assert len(response.json()) == n - (i + 1)
@@ -169,7 +211,7 @@ class OrbitBackendSanityTest(unittest.TestCase):
         # Delete all test cases for project PRJ0
         prj_key = "PRJ0"
         response = requests.delete(f"{self.__class__.url}/projects/{prj_key}/test-cases/")
-        assert response.status_code == 204
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
 
         # Verify test cases deleted
         response = requests.get(f"{self.__class__.url}/test-cases")
@@ -239,6 +281,930 @@ class OrbitBackendSanityTest(unittest.TestCase):
         # self.__class__.clean_up_db()
         logging.info(f"--- Test: {self._testMethodName} Complete ---")
 
+    @pytest.mark.order(5)
+    def test_executions_batch(self):
+        """ Test: Batch executions """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        payload = {"project_key": project_key, "description": "Project #0"}
+        response = requests.post(f"{self.__class__.url}/projects", json=payload)
+        assert response.status_code == 201
+
+        n = 3
+        for i in range(0, n):
+            payload = {"test_case_key": f"{project_key}-T{i}", "project_key": project_key}
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+
+        # Create k executions per test case in one batch
+        k = 10
+        payload = [{"execution_key": f"{project_key}-E{i}-{j}",
+                    "test_case_key": f"{project_key}-T{i}",
+                    "result": "pass"} for i in range(0, n) for j in range(0, k)]
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/executions/batch", json=payload)
+        assert response.status_code == 201
+        assert len(response.json()) == n * k
+        for i in range(0, n):
+            response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T{i}/executions")
+            assert response.status_code == 200
+            assert len(response.json()) == k
+
+        # Verify per-item status for duplicate, unknown test case and foreign key
+        payload = [{"execution_key": f"{project_key}-E0-0", "test_case_key": f"{project_key}-T0"},
+                   {"execution_key": f"{project_key}-E99", "test_case_key": f"{project_key}-T99"},
+                   {"execution_key": f"PRJ1-E0", "test_case_key": f"{project_key}-T0"},
+                   {"execution_key": f"{project_key}-E100", "test_case_key": f"{project_key}-T0"}]
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/executions/batch", json=payload)
+        assert response.status_code == 207
+        assert [r["status_code"] for r in response.json()] == [400, 404, 400, 201]
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(6)
+    def test_pagination(self):
+        """ Test: Paginated list """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        payload = {"project_key": project_key, "description": "Project #0"}
+        response = requests.post(f"{self.__class__.url}/projects", json=payload)
+        assert response.status_code == 201
+
+        n = 25
+        for i in range(0, n):
+            payload = {"test_case_key": f"{project_key}-T{i:02}", "project_key": project_key, "title": f"{i % 3}"}
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+
+        # Walk all pages following the next cursor
+        limit = 4
+        keys = []
+        params = {"limit": limit, "sort": "-title", "count": True}
+        while True:
+            response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases", params=params)
+            assert response.status_code == 200
+            assert len(response.json()) <= limit
+            assert response.headers["X-Total-Count"] == str(n)
+            keys += [(tc["title"], tc["test_case_key"]) for tc in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-Cursor"]
+
+        assert keys == sorted(keys, reverse=True)
+        assert len(set(keys)) == n
+
+        # Stream all test cases as NDJSON
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                params={"limit": limit}, headers={"Accept": "application/x-ndjson"})
+        assert response.status_code == 200
+        assert response.headers["Content-Type"] == "application/x-ndjson"
+        assert len(response.text.splitlines()) == n
+
+        # Verify invalid or unindexed sort field and cursor are rejected
+        response = requests.get(f"{self.__class__.url}/test-cases", params={"sort": "unknown"})
+        assert response.status_code == 400
+        response = requests.get(f"{self.__class__.url}/test-cases", params={"sort": "description"})
+        assert response.status_code == 400
+        response = requests.get(f"{self.__class__.url}/test-cases", params={"after": "invalid"})
+        assert response.status_code == 400
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(7)
+    def test_cycle_membership(self):
+        """ Test: Cycle membership """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        test_cycle_key = f"{project_key}-C0"
+        payload = {"project_key": project_key, "description": "Project #0"}
+        response = requests.post(f"{self.__class__.url}/projects", json=payload)
+        assert response.status_code == 201
+        payload = {"test_case_key": f"{project_key}-T0", "project_key": project_key}
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+        assert response.status_code == 201
+        payload = {"test_cycle_key": test_cycle_key}
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/cycles", json=payload)
+        assert response.status_code == 201
+
+        n = 20
+        payload = [{"execution_key": f"{project_key}-E{i:02}",
+                    "test_case_key": f"{project_key}-T0",
+                    "result": "pass" if i % 4 else "fail"} for i in range(0, n)]
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/executions/batch", json=payload)
+        assert response.status_code == 201
+
+        # A cycle created with unknown executions is not stored
+        payload = {"test_cycle_key": f"{project_key}-C1", "executions": [f"{project_key}-E00", f"{project_key}-X"]}
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/cycles", json=payload)
+        assert response.status_code == 404
+        response = requests.get(f"{self.__class__.url}/cycles/{project_key}-C1")
+        assert response.status_code == 404
+
+        # Add a single execution, adding it twice is rejected
+        response = requests.post(f"{self.__class__.url}/cycles/{test_cycle_key}/executions",
+                                 params={"execution_key": f"{project_key}-E00"})
+        assert response.status_code == 200
+        response = requests.post(f"{self.__class__.url}/cycles/{test_cycle_key}/executions",
+                                 params={"execution_key": f"{project_key}-E00"})
+        assert response.status_code == 400
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/executions")
+        assert [e["execution_key"] for e in response.json()] == [f"{project_key}-E00"]
+
+        # Add and remove many executions in one call, keeping members unique
+        payload = {"add": [f"{project_key}-E{i:02}" for i in range(0, n)],
+                   "remove": [f"{project_key}-E{i:02}" for i in range(0, n, 2)]}
+        response = requests.patch(f"{self.__class__.url}/cycles/{test_cycle_key}/executions", json=payload)
+        assert response.status_code == 200
+        response = requests.get(f"{self.__class__.url}/executions/{project_key}-E01")
+        assert response.json()["test_cycle_key"] == test_cycle_key
+        response = requests.get(f"{self.__class__.url}/executions/{project_key}-E00")
+        assert response.json()["test_cycle_key"] is None
+
+        # Walk expanded cycle executions page by page
+        keys = []
+        params = {"limit": 3, "count": True}
+        while True:
+            response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/executions", params=params)
+            assert response.status_code == 200
+            assert response.headers["X-Total-Count"] == str(n // 2)
+            keys += [e["execution_key"] for e in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-Cursor"]
+        assert keys == [f"{project_key}-E{i:02}" for i in range(1, n, 2)]
+
+        # Filter cycle executions by result
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/executions",
+                                params={"result": "fail", "sort": "-_id"})
+        assert response.status_code == 200
+        assert response.json() == []
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/executions",
+                                params={"result": "pass", "sort": "-_id"})
+        assert [e["execution_key"] for e in response.json()] == list(reversed(keys))
+
+        # Remove a single execution, unknown executions are rejected
+        response = requests.delete(f"{self.__class__.url}/cycles/{test_cycle_key}/executions/{project_key}-E01")
+        assert response.status_code == 200
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/executions")
+        assert len(response.json()) == n // 2 - 1
+
+        # Verify result counters follow execution updates and deletes
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/summary")
+        assert response.status_code == 200
+        assert response.json()["results"] == {"pass": n // 2 - 1}
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E03", json={"result": "fail"})
+        assert response.status_code == 200
+        response = requests.delete(f"{self.__class__.url}/executions/{project_key}-E05")
+        assert response.status_code == 204
+        summary = {"test_cycle_key": test_cycle_key, "total": n // 2 - 2, "results": {"pass": n // 2 - 3, "fail": 1}}
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/summary")
+        assert response.json() == summary
+        job = self.__class__.wait_for_job(requests.post(f"{self.__class__.url}/cycles/{test_cycle_key}/summary/recompute"))
+        assert job["status"] == "completed"
+        response = requests.get(f"{self.__class__.url}/cycles/{test_cycle_key}/summary")
+        assert response.json() == summary
+
+        payload = {"add": [f"{project_key}-E99"]}
+        response = requests.patch(f"{self.__class__.url}/cycles/{test_cycle_key}/executions", json=payload)
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(8)
+    def test_last_result(self):
+        """ Test: Test case last result """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        test_case_key = f"{project_key}-T0"
+        payload = {"project_key": project_key, "description": "Project #0"}
+        response = requests.post(f"{self.__class__.url}/projects", json=payload)
+        assert response.status_code == 201
+        payload = {"test_case_key": test_case_key, "project_key": project_key}
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+        assert response.status_code == 201
+
+        def last_result():
+            url = f"{self.__class__.url}/projects/{project_key}/test-cases/{test_case_key}"
+            test_case = requests.get(url, params={"fields": "last_result,last_execution_key"}).json()
+            return test_case["last_result"], test_case["last_execution_key"]
+
+        # Newer executions replace the last result, older uploads do not
+        executions_url = f"{self.__class__.url}/projects/{project_key}/test-cases/{test_case_key}/executions"
+        payload = {"execution_key": f"{project_key}-E1", "result": "pass", "finished_at": "2024-01-02T00:00:00Z"}
+        response = requests.post(executions_url, json=payload)
+        assert response.status_code == 201
+        assert last_result() == ("pass", f"{project_key}-E1")
+        payload = {"execution_key": f"{project_key}-E0", "result": "fail", "finished_at": "2024-01-01T00:00:00Z"}
+        response = requests.post(executions_url, json=payload)
+        assert response.status_code == 201
+        assert last_result() == ("pass", f"{project_key}-E1")
+
+        # Updating the last execution updates the last result
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E1", json={"result": "blocked"})
+        assert response.status_code == 200
+        assert last_result() == ("blocked", f"{project_key}-E1")
+
+        # Deleting the last execution falls back to the previous one
+        response = requests.delete(f"{self.__class__.url}/executions/{project_key}-E1")
+        assert response.status_code == 204
+        assert last_result() == ("fail", f"{project_key}-E0")
+        response = requests.delete(executions_url)
+        assert response.status_code == 204
+        assert last_result() == (None, None)
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(9)
+    def test_cascade_delete(self):
+        """ Test: Background cascade delete """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        # Project PRJ0 owns test cases and executions, some in a PRJ1 cycle
+        for project_key in ("PRJ0", "PRJ1"):
+            response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+            assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/PRJ1/cycles", json={"test_cycle_key": "PRJ1-C0"})
+        assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/PRJ0/cycles", json={"test_cycle_key": "PRJ0-C0"})
+        assert response.status_code == 201
+
+        n = 5
+        for i in range(0, n):
+            test_case_key = f"PRJ0-T{i}"
+            payload = {"test_case_key": test_case_key, "project_key": "PRJ0"}
+            response = requests.post(f"{self.__class__.url}/projects/PRJ0/test-cases", json=payload)
+            assert response.status_code == 201
+            payload = {"execution_key": f"PRJ0-E{i}", "result": "pass", "test_cycle_key": "PRJ1-C0"}
+            response = requests.post(f"{self.__class__.url}/projects/PRJ0/test-cases/{test_case_key}/executions",
+                                     json=payload)
+            assert response.status_code == 201
+
+        # Deleting a single test case deletes its executions in a job
+        response = requests.delete(f"{self.__class__.url}/projects/PRJ0/test-cases/PRJ0-T0")
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
+        response = requests.get(f"{self.__class__.url}/executions/PRJ0-E0")
+        assert response.status_code == 404
+        response = requests.get(f"{self.__class__.url}/cycles/PRJ1-C0/summary")
+        assert response.json()["total"] == n - 1
+
+        # The project is hidden at once and its children deleted by a job
+        response = requests.delete(f"{self.__class__.url}/projects/PRJ0")
+        assert response.status_code == 202
+        response_get = requests.get(f"{self.__class__.url}/projects/PRJ0")
+        assert response_get.status_code == 404
+        response_delete = requests.delete(f"{self.__class__.url}/projects/PRJ0")
+        assert response_delete.status_code == 404
+        response_get = requests.get(f"{self.__class__.url}/test-cases")
+        assert [case["_id"] for case in response_get.json()] == []
+        response_get = requests.get(f"{self.__class__.url}/projects/PRJ0/test-cases/PRJ0-T1")
+        assert response_get.status_code == 404
+        response_get = requests.get(f"{self.__class__.url}/executions/PRJ0-E1")
+        assert response_get.status_code == 404
+        response_get = requests.get(f"{self.__class__.url}/cycles/PRJ0-C0")
+        assert response_get.status_code == 404
+
+        job = self.__class__.wait_for_job(response)
+        assert job["status"] == "completed"
+        assert job["progress"]["test-cases"] == n - 1
+        assert job["progress"]["test-executions"] == n - 1
+
+        response = requests.get(f"{self.__class__.url}/test-cases")
+        assert len(response.json()) == 0
+        response = requests.get(f"{self.__class__.url}/executions/PRJ0-E1")
+        assert response.status_code == 404
+        response = requests.get(f"{self.__class__.url}/cycles/PRJ0-C0")
+        assert response.status_code == 404
+        response = requests.get(f"{self.__class__.url}/cycles/PRJ1-C0/summary")
+        assert response.json()["total"] == 0
+
+        # The key can be reused once the job is done
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": "PRJ0"})
+        assert response.status_code == 201
+
+        # Finished and unknown jobs cannot be cancelled
+        response = requests.post(f"{self.__class__.url}/jobs/{job['_id']}/cancel")
+        assert response.status_code == 400
+        response = requests.get(f"{self.__class__.url}/jobs/unknown")
+        assert response.status_code == 404
+        response = requests.post(f"{self.__class__.url}/jobs/unknown/cancel")
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(1)
+    def test_cancel_pending_job(self):
+        """ Test: Cancelling a queued project deletion restores the project """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+
+        async def cancel_pending_delete(db_url):
+            # A runner without workers keeps submitted jobs pending
+            db = SqliteClient(db_url=db_url)
+            await db.connect()
+            await db.configure()
+            jobs = JobRunner(db, JOB_HANDLERS, JOB_CANCEL_HANDLERS)
+            try:
+                await db.create(DB_COLLECTION_PRJ, {"_id": "PRJ0", "project_key": "PRJ0", "description": "",
+                                                    "created_at": "2025-01-01T00:00:00Z", "updated_at": None,
+                                                    "is_active": True, "deleted_at": None})
+                job = await delete_project(db, jobs, "PRJ0")
+                with pytest.raises(NotFoundError):
+                    await get_project(db, "PRJ0")
+
+                job = await jobs.cancel(job["_id"])
+                return job, await get_project(db, "PRJ0")
+
+            finally:
+                await db.close()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            job, project = asyncio.run(cancel_pending_delete(os.path.join(tmp_dir, "orbit.db")))
+        assert job["status"] == "cancelled"
+        assert project["_id"] == "PRJ0"
+        assert project["deleted_at"] is None
+
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(1)
+    def test_concurrent_member_removal(self):
+        """ Test: Concurrent removals of the same memberships uncount them once """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+
+        class RacingClient(SqliteClient):
+            # Both removals find the memberships before either deletes them
+            barrier = asyncio.Barrier(2)
+
+            async def find(self, *args, **kwargs):
+                results = await super().find(*args, **kwargs)
+                await self.barrier.wait()
+                return results
+
+        n = 5
+        executions = [{"_id": f"PRJ0-E{i}", "project_key": "PRJ0", "result": "pass"} for i in range(n)]
+
+        async def remove_twice(db_url):
+            db = RacingClient(db_url=db_url)
+            await db.connect()
+            await db.configure()
+            try:
+                await db.create(DB_COLLECTION_TCY, {"_id": "PRJ0-C0", "test_cycle_key": "PRJ0-C0",
+                                                    "project_key": "PRJ0", "result_counts": {}})
+                await add_members(db, [("PRJ0-C0", execution) for execution in executions])
+                results = {execution["_id"]: execution["result"] for execution in executions}
+                removed = await asyncio.gather(*[remove_members(db, {"test_cycle_key": "PRJ0-C0"}, results)
+                                                 for _ in range(2)])
+                return removed, await db.find_one(DB_COLLECTION_TCY, {"_id": "PRJ0-C0"})
+
+            finally:
+                await db.close()
+
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            removed, cycle = asyncio.run(remove_twice(os.path.join(tmp_dir, "orbit.db")))
+        assert sum(removed) == n
+        assert cycle["result_counts"] == {"pass": 0}
+
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(10)
+    def test_export_import(self):
+        """ Test: Project export and import """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/cycles",
+                                 json={"test_cycle_key": f"{project_key}-C0"})
+        assert response.status_code == 201
+
+        n = 4
+        for i in range(0, n):
+            test_case_key = f"{project_key}-T{i}"
+            payload = {"test_case_key": test_case_key, "project_key": project_key}
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+            payload = {"execution_key": f"{project_key}-E{i}", "result": "pass",
+                       "test_cycle_key": f"{project_key}-C0"}
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases/{test_case_key}/executions",
+                                     json=payload)
+            assert response.status_code == 201
+
+        # Export as gzip compressed JSONL
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/export")
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/gzip"
+        export = response.content
+        assert len(gzip.decompress(export).splitlines()) == 1 + n + 1 + n + n
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/export",
+                                params={"compression": "lz4"})
+        assert response.status_code == 400
+
+        # Export as zstd compressed JSONL
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/export",
+                                params={"compression": "zstd"})
+        assert response.status_code == 200
+        assert response.headers["content-type"] == "application/zstd"
+        zstd_export = zstandard.ZstdDecompressor().decompressobj().decompress(response.content)
+        assert zstd_export == gzip.decompress(export)
+
+        # Importing over an existing project is rejected
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/import", data=export)
+        assert response.status_code == 400
+
+        # Import restores the project after deletion, reading every member of multi-member gzip
+        response = requests.delete(f"{self.__class__.url}/projects/{project_key}")
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
+        lines = gzip.decompress(export).splitlines(keepends=True)
+        members = gzip.compress(b"".join(lines[:n])) + gzip.compress(b"".join(lines[n:]))
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/import", data=members)
+        assert response.status_code == 201
+        assert response.json()["counts"] == {"projects": 1, "test-cases": n, "test-cycles": 1,
+                                             "test-executions": n, "test-cycle-members": n}
+
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases")
+        assert len(response.json()) == n
+        response = requests.get(f"{self.__class__.url}/cycles/{project_key}-C0/summary")
+        assert response.json()["total"] == n
+        assert response.json()["results"] == {"pass": n}
+
+        # Records of another project are rejected and the partial import removed
+        response = requests.post(f"{self.__class__.url}/projects/PRJ1/import", data=export)
+        assert response.status_code == 400
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/import", data=b"not gzip")
+        assert response.status_code == 400
+        response = requests.post(f"{self.__class__.url}/projects/ZS0/import",
+                                 data=zstandard.ZstdCompressor().compress(b"x" * 64)[:-8] + b"\xff" * 16)
+        assert response.status_code == 400
+        response = requests.get(f"{self.__class__.url}/projects/ZS0")
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(11)
+    def test_search(self):
+        """ Test: Test case full text search """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        test_cases = {
+            "PRJ0": [{"title": "Login with valid password", "labels": ["auth"]},
+                     {"title": "Logout", "description": "Session ends after login timeout"},
+                     {"title": "Upload report", "labels": ["files", "login"]},
+                     {"title": "Export report"}],
+            "PRJ1": [{"title": "Login from another project"}]
+        }
+        for project_key, cases in test_cases.items():
+            response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+            assert response.status_code == 201
+            for i, case in enumerate(cases):
+                payload = {"test_case_key": f"{project_key}-T{i}", "project_key": project_key, **case}
+                response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+                assert response.status_code == 201
+
+        # Title matches rank above labels, labels above description
+        search_url = f"{self.__class__.url}/projects/PRJ0/test-cases/search"
+        response = requests.get(search_url, params={"q": "login"})
+        assert response.status_code == 200
+        assert [case["_id"] for case in response.json()] == ["PRJ0-T0", "PRJ0-T2", "PRJ0-T1"]
+        scores = [case["score"] for case in response.json()]
+        assert scores == sorted(scores, reverse=True)
+
+        # Page through the results with the next cursor
+        keys = []
+        params = {"q": "login", "limit": 2, "fields": "title"}
+        while True:
+            response = requests.get(search_url, params=params)
+            assert response.status_code == 200
+            keys += [case["_id"] for case in response.json()]
+            if "X-Next-Cursor" not in response.headers:
+                break
+            params["after"] = response.headers["X-Next-Cursor"]
+        assert keys == ["PRJ0-T0", "PRJ0-T2", "PRJ0-T1"]
+
+        # Updates and deletes are reflected in the index
+        response = requests.put(f"{self.__class__.url}/projects/PRJ0/test-cases/PRJ0-T3",
+                                json={"title": "Export report after login"})
+        assert response.status_code == 200
+        response = requests.delete(f"{self.__class__.url}/projects/PRJ0/test-cases/PRJ0-T0")
+        assert response.status_code == 202
+        response = requests.get(search_url, params={"q": "login"})
+        assert sorted(case["_id"] for case in response.json()) == ["PRJ0-T1", "PRJ0-T2", "PRJ0-T3"]
+
+        response = requests.get(search_url, params={"q": "reports"})
+        assert sorted(case["_id"] for case in response.json()) == ["PRJ0-T2", "PRJ0-T3"]
+        response = requests.get(search_url, params={"q": "missing"})
+        assert response.json() == []
+        response = requests.get(search_url)
+        assert response.status_code == 422
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(12)
+    def test_case_filters(self):
+        """ Test: Test case filters """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        cases = [{"status": "ready", "priority": "high", "folder": "ui/login", "labels": ["smoke", "auth"]},
+                 {"status": "ready", "priority": "low", "folder": "ui/upload", "labels": ["smoke"],
+                  "test_frequency": ["nightly"]},
+                 {"status": "draft", "priority": "high", "folder": "api", "labels": ["auth"],
+                  "test_frequency": ["nightly", "weekly"]},
+                 {"status": "draft", "priority": "medium"}]
+        for i, case in enumerate(cases):
+            payload = {"test_case_key": f"{project_key}-T{i}", "project_key": project_key, **case}
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+
+        def filtered(**params):
+            response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases", params=params)
+            assert response.status_code == 200
+            return [case["_id"] for case in response.json()]
+
+        assert filtered(status="ready") == ["PRJ0-T0", "PRJ0-T1"]
+        assert filtered(status="draft", priority="high,medium") == ["PRJ0-T2", "PRJ0-T3"]
+        assert filtered(folder="ui/") == ["PRJ0-T0", "PRJ0-T1"]
+        assert filtered(folder="api") == ["PRJ0-T2"]
+        assert filtered(labels="smoke,auth") == ["PRJ0-T0", "PRJ0-T1", "PRJ0-T2"]
+        assert filtered(labels="smoke,auth", labels_match="all") == ["PRJ0-T0"]
+        assert filtered(test_frequency="nightly", priority="high") == ["PRJ0-T2"]
+        assert filtered(status="ready", limit=1, sort="-_id") == ["PRJ0-T1"]
+
+        response = requests.get(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                params={"labels": "smoke", "labels_match": "some"})
+        assert response.status_code == 422
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(13)
+    def test_folders(self):
+        """ Test: Folder tree """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        folders = ["ui/login", "ui/login", "ui", "ui/upload/files", "api", None]
+        for i, folder in enumerate(folders):
+            payload = {"test_case_key": f"{project_key}-T{i}", "project_key": project_key}
+            if folder is not None:
+                payload["folder"] = folder
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+
+        folders_url = f"{self.__class__.url}/projects/{project_key}/folders"
+
+        def tree(**params):
+            response = requests.get(folders_url, params=params)
+            assert response.status_code == 200
+            return response.json()
+
+        # Top level folders with subtree totals, unexpanded children
+        top = tree()
+        assert [(node["path"], node["total"], node["direct"], node["has_children"], node["children"])
+                for node in top] == [("api", 1, 1, False, None), ("ui", 4, 1, True, None)]
+
+        # Lazily expand one subtree
+        ui = tree(parent="ui")
+        assert [(node["path"], node["total"], node["has_children"]) for node in ui] == \
+               [("ui/login", 2, False), ("ui/upload", 1, True)]
+        nested = tree(parent="ui", depth=2)
+        assert nested[1]["children"][0]["path"] == "ui/upload/files"
+        response = requests.get(folders_url, params={"parent": "missing"})
+        assert response.status_code == 404
+
+        # Last results roll up to every ancestor
+        executions_url = f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0/executions"
+        response = requests.post(executions_url, json={"execution_key": f"{project_key}-E0", "result": "fail"})
+        assert response.status_code == 201
+        assert tree()[1]["results"] == {"fail": 1, "none": 3}
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E0", json={"result": "pass"})
+        assert response.status_code == 200
+        assert tree(parent="ui")[0]["results"] == {"pass": 1, "none": 1}
+
+        # Moving and deleting test cases updates the index, emptied folders disappear
+        response = requests.put(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T3",
+                                json={"folder": "api/files"})
+        assert response.status_code == 200
+        response = requests.delete(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0")
+        assert response.status_code == 202
+        assert [(node["path"], node["total"], node["has_children"]) for node in tree()] == \
+               [("api", 2, True), ("ui", 2, True)]
+        assert [node["path"] for node in tree(parent="ui")] == ["ui/login"]
+        assert tree(parent="ui")[0]["results"] == {"none": 1}
+
+        # A rebuild recounts the same tree
+        expected = tree(depth=3)
+        response = requests.post(f"{folders_url}/rebuild")
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
+        assert tree(depth=3) == expected
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(14)
+    def test_execution_history(self):
+        """ Test: Execution history by time range """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                 json={"test_case_key": f"{project_key}-T0", "project_key": project_key})
+        assert response.status_code == 201
+
+        # Times are normalized to UTC, finished_at falls back to started_at
+        executions = [{"execution_key": f"{project_key}-E0", "started_at": "2024-01-01T10:00:00Z",
+                       "finished_at": "2024-01-01T10:30:00Z"},
+                      {"execution_key": f"{project_key}-E1", "started_at": "2024-01-02T12:00:00+02:00"},
+                      {"execution_key": f"{project_key}-E2", "finished_at": "2024-01-03T00:00:00"},
+                      {"execution_key": f"{project_key}-E3"}]
+        for execution in executions:
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0/executions",
+                                     json=execution)
+            assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0/executions",
+                                 json={"execution_key": f"{project_key}-E4", "started_at": "yesterday"})
+        assert response.status_code == 422
+
+        response = requests.get(f"{self.__class__.url}/executions/{project_key}-E1")
+        assert response.status_code == 200
+        assert response.json()["started_at"] == "2024-01-02T10:00:00Z"
+        assert response.json()["executed_at"] == "2024-01-02T10:00:00Z"
+
+        history_url = f"{self.__class__.url}/projects/{project_key}/executions"
+
+        def history(**params):
+            response = requests.get(history_url, params=params)
+            assert response.status_code == 200
+            return [execution["_id"] for execution in response.json()]
+
+        # Most recent first, the range is [from, to)
+        assert history() == [f"{project_key}-E2", f"{project_key}-E1", f"{project_key}-E0", f"{project_key}-E3"]
+        assert history(**{"from": "2024-01-01T10:30:00Z", "to": "2024-01-03T00:00:00Z"}) == \
+               [f"{project_key}-E1", f"{project_key}-E0"]
+        assert history(**{"from": "2024-01-02", "sort": "executed_at"}) == [f"{project_key}-E1", f"{project_key}-E2"]
+
+        # Updating a time moves the execution in the history
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E0",
+                                json={"finished_at": "2024-01-04T00:00:00Z"})
+        assert response.status_code == 200
+        assert history(limit=1) == [f"{project_key}-E0"]
+        response = requests.get(history_url, params={"to": "not a time"})
+        assert response.status_code == 422
+        response = requests.get(f"{self.__class__.url}/projects/PRJ9/executions")
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(15)
+    def test_trends(self):
+        """ Test: Pass rate trends """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        for i, (folder, priority) in enumerate([("ui", "high"), ("api", "low")]):
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                     json={"test_case_key": f"{project_key}-T{i}", "project_key": project_key,
+                                           "folder": folder, "priority": priority})
+            assert response.status_code == 201
+
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        day = [(today - timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%SZ") for i in range(3)]
+        executions = [("T0", "pass", day[0]), ("T1", "fail", day[0]), ("T0", "pass", day[1]),
+                      ("T0", None, day[1]), ("T1", "pass", day[2]), ("T1", "pass", None)]
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/executions/batch",
+                                 json=[{"execution_key": f"{project_key}-E{i}", "test_case_key": f"{project_key}-{key}",
+                                        **({"result": result} if result else {}),
+                                        **({"started_at": started_at} if started_at else {})}
+                                       for i, (key, result, started_at) in enumerate(executions)])
+        assert response.status_code == 201
+
+        trends_url = f"{self.__class__.url}/projects/{project_key}/trends"
+
+        def trends(**params):
+            response = requests.get(trends_url, params=params)
+            assert response.status_code == 200
+            return [(point["bucket"], point["group"], point["total"], point["pass_rate"]) for point in response.json()]
+
+        # Undated executions and buckets before the range are left out
+        assert trends(buckets=2) == [(day[1], None, 2, 1.0), (day[0], None, 2, 0.5)]
+        assert trends(buckets=3, group_by="folder") == \
+               [(day[2], "api", 1, 1.0), (day[1], "ui", 2, 1.0), (day[0], "api", 1, 0.0), (day[0], "ui", 1, 1.0)]
+
+        # Late results in a cached closed bucket are recounted
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T1/executions",
+                                 json={"execution_key": f"{project_key}-E9", "result": "fail", "finished_at": day[1]})
+        assert response.status_code == 201
+        assert trends(buckets=2, group_by="priority") == \
+               [(day[1], "high", 2, 1.0), (day[1], "low", 1, 0.0), (day[0], "high", 1, 1.0), (day[0], "low", 1, 0.0)]
+        response = requests.delete(f"{self.__class__.url}/executions/{project_key}-E9")
+        assert response.status_code == 204
+        assert trends(buckets=2) == [(day[1], None, 2, 1.0), (day[0], None, 2, 0.5)]
+
+        # Moving a test case to another folder regroups the cached buckets
+        response = requests.put(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T1",
+                                json={"folder": "ui"})
+        assert response.status_code == 200
+        assert trends(buckets=3, group_by="folder") == \
+               [(day[2], "ui", 1, 1.0), (day[1], "ui", 2, 1.0), (day[0], "ui", 2, 0.5)]
+
+        # Week buckets start on Monday
+        monday = (today - timedelta(days=today.weekday())).strftime("%Y-%m-%dT%H:%M:%SZ")
+        assert trends(bucket="week", buckets=1)[0][0] == monday
+        response = requests.get(trends_url, params={"bucket": "month"})
+        assert response.status_code == 422
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(16)
+    def test_rollups(self):
+        """ Test: Daily execution rollups """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                 json={"test_case_key": f"{project_key}-T0", "project_key": project_key})
+        assert response.status_code == 201
+
+        today = datetime.now(timezone.utc).replace(hour=0, minute=0, second=0, microsecond=0)
+        day = [(today - timedelta(days=i)).strftime("%Y-%m-%dT%H:%M:%SZ") for i in range(2)]
+        executions_url = f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0/executions"
+        for i, result in enumerate(["pass", "fail", "pass"]):
+            response = requests.post(executions_url, json={"execution_key": f"{project_key}-E{i}", "result": result,
+                                                           "started_at": day[1], "finished_at": day[1]})
+            assert response.status_code == 201
+
+        trends_url = f"{self.__class__.url}/projects/{project_key}/trends"
+
+        def trends():
+            response = requests.get(trends_url, params={"buckets": 2})
+            assert response.status_code == 200
+            return [(point["bucket"], point["results"]) for point in response.json()]
+
+        assert trends() == [(day[1], {"pass": 2, "fail": 1})]
+
+        # Result and time changes move executions between rollups
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E1", json={"result": "pass"})
+        assert response.status_code == 200
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E2", json={"finished_at": day[0]})
+        assert response.status_code == 200
+        assert trends() == [(day[1], {"pass": 2}), (day[0], {"pass": 1})]
+
+        # A rebuild recounts the same totals from the executions
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/rollups/rebuild")
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
+        assert trends() == [(day[1], {"pass": 2}), (day[0], {"pass": 1})]
+        response = requests.post(f"{self.__class__.url}/projects/PRJ9/rollups/rebuild")
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(17)
+    def test_project_summary(self):
+        """ Test: Project summary """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        for i, (status, priority) in enumerate([("active", "high"), ("active", "low"), ("draft", None)]):
+            payload = {"test_case_key": f"{project_key}-T{i}", "project_key": project_key, "status": status}
+            if priority is not None:
+                payload["priority"] = priority
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases", json=payload)
+            assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/cycles",
+                                 json={"test_cycle_key": f"{project_key}-C0", "status": "open"})
+        assert response.status_code == 201
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T0/executions",
+                                 json={"execution_key": f"{project_key}-E0", "result": "pass"})
+        assert response.status_code == 201
+
+        summary_url = f"{self.__class__.url}/projects/{project_key}/summary"
+        response = requests.get(summary_url)
+        assert response.status_code == 200
+        assert response.json() == {"project_key": project_key,
+                                   "test_cases": 3,
+                                   "test_cases_by_status": {"active": 2, "draft": 1},
+                                   "test_cases_by_priority": {"high": 1, "low": 1, "none": 1},
+                                   "test_cycles": 1,
+                                   "test_cycles_by_status": {"open": 1},
+                                   "executions": 1,
+                                   "executions_by_result": {"pass": 1}}
+
+        # Writes to the project invalidate the cached summary
+        response = requests.put(f"{self.__class__.url}/executions/{project_key}-E0", json={"result": "fail"})
+        assert response.status_code == 200
+        response = requests.put(f"{self.__class__.url}/cycles/{project_key}-C0", json={"status": "closed"})
+        assert response.status_code == 200
+        response = requests.delete(f"{self.__class__.url}/projects/{project_key}/test-cases/{project_key}-T2")
+        assert self.__class__.wait_for_job(response)["status"] == "completed"
+        summary = requests.get(summary_url).json()
+        assert summary["test_cases_by_status"] == {"active": 2}
+        assert summary["test_cycles_by_status"] == {"closed": 1}
+        assert summary["executions_by_result"] == {"fail": 1}
+        response = requests.get(f"{self.__class__.url}/projects/PRJ9/summary")
+        assert response.status_code == 404
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
+    @pytest.mark.order(18)
+    def test_flaky(self):
+        """ Test: Flaky test case detection """
+
+        logging.info(f"--- Starting test: {self._testMethodName} ---")
+        self.__class__.clean_up_db()
+
+        project_key = "PRJ0"
+        response = requests.post(f"{self.__class__.url}/projects", json={"project_key": project_key})
+        assert response.status_code == 201
+        histories = {"T0": ["pass", "fail", "pass", "fail", "fail"],
+                     "T1": ["fail", "fail", "fail", "pass", "pass"],
+                     "T2": ["pass", "pass", "pass"],
+                     "T3": ["pass", "fail", "pass"]}
+        executions = []
+        for key, results in histories.items():
+            response = requests.post(f"{self.__class__.url}/projects/{project_key}/test-cases",
+                                     json={"test_case_key": f"{project_key}-{key}", "project_key": project_key})
+            assert response.status_code == 201
+            # Uploaded newest first, scored in execution time order
+            for i, result in reversed(list(enumerate(results))):
+                executions.append({"execution_key": f"{project_key}-{key}-E{i}",
+                                   "test_case_key": f"{project_key}-{key}",
+                                   "result": result, "finished_at": f"2024-01-0{i + 1}T00:00:00Z"})
+        response = requests.post(f"{self.__class__.url}/projects/{project_key}/executions/batch", json=executions)
+        assert response.status_code == 201
+
+        flaky_url = f"{self.__class__.url}/projects/{project_key}/flaky"
+        response = requests.get(flaky_url)
+        assert response.status_code == 200
+        flaky = response.json()
+        assert [test_case["test_case_key"] for test_case in flaky] == \
+               [f"{project_key}-T3", f"{project_key}-T0", f"{project_key}-T1"]
+        assert flaky[1] == {"test_case_key": f"{project_key}-T0", "runs": 5, "flips": 3, "flip_rate": 0.75,
+                            "failure_rate": 0.6, "longest_fail_streak": 2, "current_streak": 2,
+                            "current_result": "fail"}
+
+        # Only the last window executions are scored
+        response = requests.get(flaky_url, params={"window": 2, "limit": 1})
+        assert response.status_code == 200
+        assert [(test_case["test_case_key"], test_case["runs"], test_case["flips"]) for test_case in response.json()] \
+               == [(f"{project_key}-T3", 2, 1)]
+        response = requests.get(flaky_url, params={"window": 1})
+        assert response.status_code == 422
+
+        self.__class__.clean_up_db()
+        logging.info(f"--- Test: {self._testMethodName} Complete ---")
+
     # @pytest.mark.order(4)
     # def test_cycles(self):
     #     """ Test: Cycle """
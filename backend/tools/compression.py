@@ -0,0 +1,172 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# tools/compression.py
+
+import zlib
+
+try:
+    import zstandard
+except ImportError:
+    zstandard = None
+
+GZIP = "gzip"
+ZSTD = "zstd"
+
+MEDIA_TYPES = {GZIP: "application/gzip", ZSTD: "application/zstd"}
+EXTENSIONS = {GZIP: "gz", ZSTD: "zst"}
+
+_GZIP_MAGIC = b"\x1f\x8b"
+_ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+_MAGIC_LENGTH = max(len(_GZIP_MAGIC), len(_ZSTD_MAGIC))
+
+
+class _Identity:
+    """Pass through decompressor for uncompressed uploads."""
+
+    def decompress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+class _GzipDecompressor:
+    """Decompress concatenated gzip members, starting a new zlib
+       decompressobj on the data left over where a member ends.
+    """
+
+    def __init__(self):
+        self._decompressor = self._member()
+
+    @staticmethod
+    def _member():
+        return zlib.decompressobj(wbits=zlib.MAX_WBITS | 16)
+
+    def decompress(self, data: bytes) -> bytes:
+        out = self._decompressor.decompress(data)
+        while self._decompressor.eof and self._decompressor.unused_data:
+            data = self._decompressor.unused_data
+            self._decompressor = self._member()
+            out += self._decompressor.decompress(data)
+
+        return out
+
+    def flush(self) -> bytes:
+        return self._decompressor.flush()
+
+
+class _ZstdDecompressor:
+    """Adapt a zstandard decompressobj to the zlib interface,
+       raising zlib.error on corrupt input.
+    """
+
+    def __init__(self):
+        self._decompressor = zstandard.ZstdDecompressor().decompressobj()
+
+    def decompress(self, data: bytes) -> bytes:
+        try:
+            return self._decompressor.decompress(data)
+
+        except zstandard.ZstdError as e:
+            raise zlib.error(str(e)) from e
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def check_codec(codec: str) -> None:
+    """Raise ValueError if a compression codec is unknown or not installed."""
+
+    if codec not in MEDIA_TYPES:
+        raise ValueError(f"Unknown compression {codec}, choices: {', '.join(MEDIA_TYPES)}")
+
+    if codec == ZSTD and zstandard is None:
+        raise ValueError("zstd compression requires the zstandard package")
+
+
+def compressor(codec: str):
+    """Get an incremental compressor with compress() and flush()."""
+
+    check_codec(codec)
+    if codec == ZSTD:
+        return zstandard.ZstdCompressor().compressobj()
+
+    return zlib.compressobj(wbits=zlib.MAX_WBITS | 16)
+
+
+def decompressor(head: bytes):
+    """Get an incremental decompressor with decompress() and flush(),
+       detecting the codec from the first bytes of the stream.
+    """
+
+    if head.startswith(_GZIP_MAGIC):
+        return _GzipDecompressor()
+
+    if head.startswith(_ZSTD_MAGIC):
+        check_codec(ZSTD)
+        return _ZstdDecompressor()
+
+    return _Identity()
+
+
+async def compress_stream(chunks,
+                          codec: str):
+    """Compress an async iterator of text chunks, yielding compressed bytes."""
+
+    stream = compressor(codec)
+    async for chunk in chunks:
+        data = stream.compress(chunk.encode())
+        if data:
+            yield data
+
+    yield stream.flush()
+
+
+def _decompress(stream,
+                data: bytes) -> bytes:
+    """Decompress a chunk, raising ValueError on corrupt input."""
+
+    try:
+        return stream.decompress(data)
+
+    except zlib.error as e:
+        raise ValueError(f"Invalid compressed stream: {e}")
+
+
+async def decompress_lines(chunks):
+    """Decompress an async iterator of byte chunks, yielding complete lines.
+       The codec is detected once enough bytes arrived to hold its magic.
+       Raises ValueError on corrupt input.
+    """
+
+    stream = None
+    head = b""
+    pending = b""
+    async for chunk in chunks:
+        if stream is None:
+            head += chunk
+            if len(head) < _MAGIC_LENGTH:
+                continue
+
+            stream, chunk = decompressor(head), head
+
+        pending += _decompress(stream, chunk)
+        *lines, pending = pending.split(b"\n")
+        for line in lines:
+            yield line
+
+    # Streams shorter than the magic are detected from what there is
+    if stream is None and head:
+        stream = decompressor(head)
+        pending += _decompress(stream, head)
+
+    if stream is not None:
+        pending += stream.flush()
+
+    for line in pending.split(b"\n"):
+        yield line
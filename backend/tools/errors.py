@@ -0,0 +1,41 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# tools/errors.py
+
+from fastapi import Request, status
+from starlette.responses import JSONResponse
+
+
+class OrbitError(Exception):
+    """ Base error carrying the HTTP status and message returned to clients. """
+
+    status_code = status.HTTP_500_INTERNAL_SERVER_ERROR
+
+    def __init__(self, message: str):
+        super().__init__(message)
+        self.message = message
+
+
+class NotFoundError(OrbitError):
+    """ Raised when a requested resource does not exist. """
+
+    status_code = status.HTTP_404_NOT_FOUND
+
+
+class BadRequestError(OrbitError):
+    """ Raised when a request conflicts with existing data or is invalid. """
+
+    status_code = status.HTTP_400_BAD_REQUEST
+
+
+async def orbit_error_handler(request: Request,
+                              exc: OrbitError) -> JSONResponse:
+    """ Render an OrbitError as the standard error response. """
+
+    return JSONResponse(status_code=exc.status_code,
+                        content={"error": exc.message})
@@ -0,0 +1,202 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# tools/pagination.py
+
+import base64
+import binascii
+import json
+import time
+
+from fastapi import Request, status
+from pydantic import BaseModel, Field
+from starlette.responses import JSONResponse, StreamingResponse
+
+from backend.app_def.app_def import (
+    PAGE_LIMIT_DEFAULT,
+    PAGE_LIMIT_MAX,
+    COUNT_CACHE_TTL,
+    COUNT_CACHE_SIZE,
+    DB_SORT_FIELDS
+)
+from backend.tools.streaming import (
+    stream_documents,
+    wants_ndjson
+)
+from backend.tools.tools import parse_fields
+
+# (table, query) -> (expiry, count)
+_count_cache = {}
+
+
+class PageParams(BaseModel):
+    limit: int = Field(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX)
+    after: str | None = None
+    sort: str = "_id"
+    count: bool = False
+    fields: str | None = None
+
+
+class SearchParams(BaseModel):
+    q: str = Field(min_length=1)
+    limit: int = Field(PAGE_LIMIT_DEFAULT, ge=1, le=PAGE_LIMIT_MAX)
+    after: str | None = None
+    fields: str | None = None
+
+
+# Search results are ranked by relevance, _id breaks ties
+SEARCH_SORT = [("score", -1), ("_id", 1)]
+
+
+def parse_sort(sort: str) -> list:
+    """Parse a sort parameter ("field" or "-field") into keyset sort order,
+       with _id as the tie-breaker.
+    """
+
+    field, direction = (sort[1:], -1) if sort.startswith("-") else (sort, 1)
+    if field == "_id":
+        return [("_id", direction)]
+
+    return [(field, direction), ("_id", direction)]
+
+
+def encode_cursor(doc: dict, sort: list) -> str:
+    """Encode the keyset position of a document as an opaque cursor."""
+
+    position = [doc.get(field) for field, _ in sort]
+
+    return base64.urlsafe_b64encode(json.dumps(position).encode()).decode()
+
+
+def decode_cursor(cursor: str, sort: list) -> dict:
+    """Decode a cursor into a field -> value keyset position."""
+
+    try:
+        position = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+
+    except (binascii.Error, UnicodeDecodeError, ValueError):
+        raise ValueError(f"Invalid cursor {cursor}")
+
+    if not isinstance(position, list) or len(position) != len(sort):
+        raise ValueError(f"Cursor {cursor} does not match sort order")
+
+    return {field: value for (field, _), value in zip(sort, position)}
+
+
+async def count_documents(db,
+                          table: str,
+                          query: dict) -> int:
+    """Count documents, using the estimated count for unfiltered queries
+       and caching results for COUNT_CACHE_TTL seconds.
+    """
+
+    key = (table, json.dumps(query, sort_keys=True, default=str))
+    cached = _count_cache.get(key)
+    if cached is not None and cached[0] > time.monotonic():
+        return cached[1]
+
+    count = await db.count(table, query, estimated=not query)
+    if len(_count_cache) >= COUNT_CACHE_SIZE:
+        _count_cache.clear()
+    _count_cache[key] = (time.monotonic() + COUNT_CACHE_TTL, count)
+
+    return count
+
+
+async def find_page(request: Request,
+                    table: str,
+                    query: dict,
+                    page: PageParams,
+                    model: type[BaseModel],
+                    link: tuple = None) -> JSONResponse | StreamingResponse:
+    """Retrieve one page of documents as a JSON array. The cursor for the next
+       page is returned in the X-Next-Cursor and Link headers, and the total
+       count in X-Total-Count when requested.
+       Clients accepting application/x-ndjson instead get every document
+       from the cursor position onwards streamed, ignoring the page limit.
+       A link of (link_table, link_query, link_field) pages documents joined
+       through a link table instead, these are never streamed.
+    """
+
+    # Validate sort field and cursor, sorting only by indexed fields
+    sort = parse_sort(page.sort)
+    if sort[0][0] != "_id" and sort[0][0] not in DB_SORT_FIELDS.get(table, model.model_fields):
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": f"Cannot sort by {sort[0][0]}"})
+
+    try:
+        after = decode_cursor(page.after, sort) if page.after else None
+        fields = parse_fields(page.fields, model)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
+
+    # Sort fields are always returned, they make up the next cursor
+    if fields:
+        fields = list(dict.fromkeys([*fields, *(field for field, _ in sort)]))
+
+    if wants_ndjson(request) and link is None:
+        return stream_documents(request, table, query, sort=sort, after=after, fields=fields)
+
+    # Fetch one extra document to detect a following page
+    db = request.app.state.db
+    if link is None:
+        results = await db.find(table, query, sort=sort, limit=page.limit + 1, after=after, fields=fields)
+    else:
+        results = await db.find_linked(*link, table, query,
+                                       sort=sort, limit=page.limit + 1, after=after, fields=fields)
+
+    headers = {}
+    if len(results) > page.limit:
+        results = results[:page.limit]
+        cursor = encode_cursor(results[-1], sort)
+        headers["X-Next-Cursor"] = cursor
+        headers["Link"] = f'<{request.url.include_query_params(after=cursor)}>; rel="next"'
+
+    if page.count and link is None:
+        headers["X-Total-Count"] = str(await count_documents(db, table, query))
+    elif page.count:
+        headers["X-Total-Count"] = str(await db.count_linked(*link, table, query))
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=results,
+                        headers=headers)
+
+
+async def search_page(request: Request,
+                      table: str,
+                      query: dict,
+                      search: SearchParams,
+                      model: type[BaseModel]) -> JSONResponse:
+    """Retrieve one page of full text search results as a JSON array, most
+       relevant first with their score. The cursor for the next page is
+       returned in the X-Next-Cursor and Link headers.
+    """
+
+    try:
+        after = decode_cursor(search.after, SEARCH_SORT) if search.after else None
+        fields = parse_fields(search.fields, model)
+
+    except ValueError as e:
+        return JSONResponse(status_code=status.HTTP_400_BAD_REQUEST,
+                            content={"error": str(e)})
+
+    # Fetch one extra document to detect a following page
+    db = request.app.state.db
+    results = await db.search(table, query, search.q, limit=search.limit + 1, after=after, fields=fields)
+
+    headers = {}
+    if len(results) > search.limit:
+        results = results[:search.limit]
+        cursor = encode_cursor(results[-1], SEARCH_SORT)
+        headers["X-Next-Cursor"] = cursor
+        headers["Link"] = f'<{request.url.include_query_params(after=cursor)}>; rel="next"'
+
+    return JSONResponse(status_code=status.HTTP_200_OK,
+                        content=results,
+                        headers=headers)
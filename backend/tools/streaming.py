@@ -0,0 +1,56 @@
+# ================================================================
+# Orbit API
+# Description: FastAPI backend for the Orbit application.
+# Author: Jerry
+# License: MIT
+# ================================================================
+
+# tools/streaming.py
+
+import json
+
+from fastapi import Request, status
+from starlette.responses import StreamingResponse
+
+from backend.app_def.app_def import STREAM_BATCH_SIZE
+
+NDJSON_MEDIA_TYPE = "application/x-ndjson"
+
+
+def wants_ndjson(request: Request) -> bool:
+    """Check if the client asked for newline delimited JSON."""
+
+    return NDJSON_MEDIA_TYPE in request.headers.get("accept", "")
+
+
+async def ndjson_lines(documents,
+                       batch_size: int = STREAM_BATCH_SIZE):
+    """Encode documents from an async iterator as NDJSON,
+       yielding one chunk per batch of documents.
+    """
+
+    lines = []
+    async for doc in documents:
+        lines.append(json.dumps(doc) + "\n")
+        if len(lines) >= batch_size:
+            yield "".join(lines)
+            lines = []
+
+    if lines:
+        yield "".join(lines)
+
+
+def stream_documents(request: Request,
+                     table: str,
+                     query: dict,
+                     sort: list = None,
+                     after: dict = None,
+                     fields: list = None) -> StreamingResponse:
+    """Stream all documents matching a query as NDJSON straight from the database cursor."""
+
+    db = request.app.state.db
+    documents = db.find_iter(table, query, sort=sort, after=after, fields=fields)
+
+    return StreamingResponse(ndjson_lines(documents),
+                             status_code=status.HTTP_200_OK,
+                             media_type=NDJSON_MEDIA_TYPE)
@@ -8,8 +8,10 @@
 # tools/tools.py
 
 from datetime import datetime, timezone
+from typing import Annotated
 
 from bson import ObjectId
+from pydantic import AfterValidator, BaseModel, create_model
 
 
 def convert_objectid(doc):
@@ -21,10 +23,97 @@ def convert_objectid(doc):
     return doc
 
 
+def parse_fields(fields: str | None,
+                 model: type[BaseModel]) -> list | None:
+    """Parse a comma separated field list, validating names against a model."""
+
+    if not fields:
+        return None
+
+    names = [name.strip() for name in fields.split(",") if name.strip()]
+    unknown = [name for name in names if name != "_id" and name not in model.model_fields]
+    if unknown:
+        raise ValueError(f"Unknown fields {', '.join(unknown)}")
+
+    return names
+
+
+def select_fields(doc: dict,
+                  fields: list | None) -> dict:
+    """Keep only the given fields of a document with its _id, all if no fields given."""
+
+    if not fields:
+        return doc
+
+    return {name: value for name, value in doc.items() if name == "_id" or name in fields}
+
+
+def parse_list(value: str | None) -> list:
+    """Parse a comma separated query parameter into a list of values."""
+
+    if not value:
+        return []
+
+    return [item.strip() for item in value.split(",") if item.strip()]
+
+
+def partial_model(model: type[BaseModel]) -> type[BaseModel]:
+    """Create a copy of a model with every field optional, for projected documents."""
+
+    fields = {name: (field.annotation | None, None) for name, field in model.model_fields.items()}
+
+    return create_model(f"{model.__name__}Partial",
+                        __config__=model.model_config,
+                        **fields)
+
+
+def parse_utc_time(value: str) -> datetime:
+    """Parse an ISO formatted time into an aware UTC datetime, naive times are UTC."""
+
+    try:
+        parsed = datetime.fromisoformat(value)
+
+    except (TypeError, ValueError):
+        raise ValueError(f"Invalid ISO time {value}")
+
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+
+    return parsed.astimezone(timezone.utc)
+
+
+def format_utc_time(value: datetime) -> str:
+    """Format a datetime as an ISO UTC string to the second, naive times are UTC."""
+
+    if value.tzinfo is not None:
+        value = value.astimezone(timezone.utc)
+
+    return value.strftime("%Y-%m-%dT%H:%M:%SZ")
+
+
+def normalize_utc_time(value: str) -> str:
+    """Normalize an ISO formatted time to the ISO UTC string format of the API."""
+
+    return format_utc_time(parse_utc_time(value))
+
+
+def utc_time_to_epoch(value: str) -> int:
+    """Convert an ISO formatted time to integer seconds since the epoch."""
+
+    return int(parse_utc_time(value).timestamp())
+
+
+def epoch_to_utc_time(value: int) -> str:
+    """Convert integer seconds since the epoch to an ISO UTC string."""
+
+    return format_utc_time(datetime.fromtimestamp(value, timezone.utc))
+
+
+# ISO time string normalized to UTC, rejecting invalid times
+UtcTime = Annotated[str, AfterValidator(normalize_utc_time)]
+
+
 def get_current_utc_time():
     """Get the current UTC time as an ISO formatted string."""
 
-    current_utc_iso = datetime.now(timezone.utc).replace(microsecond=0)
-    current_utc_iso = current_utc_iso.isoformat().replace("+00:00", "Z")
-
-    return current_utc_iso
+    return format_utc_time(datetime.now(timezone.utc))